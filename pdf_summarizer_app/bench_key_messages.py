@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""Benchmark PDFProcessor.extract_key_messages against the original scorer.
+
+Usage: python bench_key_messages.py [--legacy-max N]
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+import argparse
+import time
+from src.services.pdf_processor import PDFProcessor
+from test_pdf_processor import generate_key_message_text, legacy_extract_key_messages
+
+SENTENCE_COUNTS = [1000, 10000, 50000, 100000]
+
+def time_call(func, *args):
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--legacy-max', type=int, default=10000,
+                        help='largest sentence count to run the quadratic legacy scorer on')
+    args = parser.parse_args()
+    
+    processor = PDFProcessor(cache=False)
+    
+    print(f"{'sentences':>10} {'scorer (s)':>12} {'us/sentence':>12} {'legacy (s)':>12}")
+    for sentence_count in SENTENCE_COUNTS:
+        text = generate_key_message_text(sentence_count)
+        elapsed = time_call(processor.extract_key_messages, text, 5)
+        
+        legacy = '-'
+        if sentence_count <= args.legacy_max:
+            legacy = f"{time_call(legacy_extract_key_messages, text, 5):.3f}"
+        
+        print(f"{sentence_count:>10} {elapsed:>12.3f} {elapsed / sentence_count * 1e6:>12.2f} {legacy:>12}")
+
+if __name__ == "__main__":
+    main()
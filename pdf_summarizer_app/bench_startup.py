@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""Benchmark app startup: time `import src.main` in fresh interpreters.
+
+Usage: python bench_startup.py [--runs N]
+"""
+
+import sys
+import os
+import argparse
+import statistics
+import subprocess
+import tempfile
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+IMPORT_SNIPPET = """
+import time
+start = time.perf_counter()
+import src.main
+print(time.perf_counter() - start)
+"""
+
+def time_startup(database_url):
+    """Return the seconds a fresh interpreter spends importing src.main."""
+    env = dict(os.environ, DATABASE_URL=database_url)
+    output = subprocess.run([sys.executable, '-c', IMPORT_SNIPPET], cwd=APP_DIR, env=env,
+                            capture_output=True, text=True, check=True).stdout
+    return float(output.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        database_url = f"sqlite:///{os.path.join(temp_dir, 'bench.db')}"
+        timings = [time_startup(database_url) for _ in range(args.runs)]
+    
+    print(f"import src.main over {args.runs} runs: "
+          f"median {statistics.median(timings):.3f}s, min {min(timings):.3f}s, max {max(timings):.3f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""Benchmark the NumPy LexRank/TextRank rankers against sumy's implementations.
+
+sumy compares every pair of sentences in Python, so it is only run up to
+--sumy-max sentences. Usage: python bench_text_ranking.py [--sumy-max N]
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+import argparse
+import time
+from sumy.summarizers.lex_rank import LexRankSummarizer
+from sumy.summarizers.text_rank import TextRankSummarizer
+from src.services.nlp_document import ParsedDocument
+from src.services.text_ranking import summarize_native
+from test_pdf_processor import generate_long_document
+
+SENTENCE_COUNTS = [1000, 10000, 50000]
+METHODS = [
+    ('lexrank', 'lexrank_native', LexRankSummarizer),
+    ('textrank', 'textrank_native', TextRankSummarizer)
+]
+
+def time_call(func, *args):
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sumy-max', type=int, default=1000,
+                        help='largest sentence count to run the sumy summarizers on')
+    args = parser.parse_args()
+    
+    print(f"{'sentences':>10} {'method':>10} {'native (s)':>12} {'sumy (s)':>12}")
+    for sentence_count in SENTENCE_COUNTS:
+        document = ParsedDocument(generate_long_document(sentence_count))
+        for sumy_name, native_name, summarizer_class in METHODS:
+            native = time_call(summarize_native, document, 5, native_name)
+            
+            sumy = '-'
+            if sentence_count <= args.sumy_max:
+                sumy = f"{time_call(summarizer_class(), document.sumy_document, 5):.3f}"
+            
+            print(f"{sentence_count:>10} {sumy_name:>10} {native:>12.3f} {sumy:>12}")
+
+if __name__ == "__main__":
+    main()
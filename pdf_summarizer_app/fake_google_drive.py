@@ -0,0 +1,478 @@
+#!/usr/bin/env python3
+"""Local stand-in for the parts of the Google Drive v3 API the app uses.
+
+Serves files.list, files.get (metadata and ``alt=media`` downloads with
+Range support), changes.getStartPageToken, changes.list, multipart
+batches of metadata requests, and changes.watch / channels.stop push
+channels over HTTP. Watched channels get notifications POSTed to their
+address on every change, and the server can be told to answer with
+rate-limit errors (``fail_next``), so
+the real googleapiclient code paths can be exercised offline. Tests start
+it in a background thread::
+
+    with FakeGoogleDrive() as drive:
+        drive.add_file('report.pdf', pdf_bytes)
+        service = GoogleDriveService(api_endpoint=drive.url)
+
+Run it directly (``python fake_google_drive.py --port 8089``) and set
+GOOGLE_DRIVE_API_ENDPOINT=http://127.0.0.1:8089/ to point the app at it.
+"""
+
+import argparse
+import email.policy
+import hashlib
+import json
+import re
+import threading
+import time
+import urllib.request
+import uuid
+from collections import deque
+from datetime import datetime, timezone
+from email.parser import BytesParser
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+MAX_BATCH_SIZE = 100
+
+_QUERY_CLAUSE = re.compile(
+    r"^(?:mimeType\s*=\s*'(?P<mime>[^']*)'"
+    r"|createdTime\s*>=\s*'(?P<created>[^']*)'"
+    r"|modifiedTime\s*>=\s*'(?P<modified>[^']*)'"
+    r"|'(?P<parent>[^']*)'\s+in\s+parents"
+    r"|trashed\s*=\s*(?P<trashed>true|false))$"
+)
+
+
+def _timestamp(value=None):
+    value = value or datetime.now(timezone.utc)
+    return value.astimezone(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] + 'Z'
+
+
+def _error_body(status, message, reason=None):
+    detail = {'message': message, 'reason': reason} if reason else {'message': message}
+    return {'error': {'code': status, 'message': message, 'errors': [detail]}}
+
+
+def _normalize_timestamp(value):
+    """Compare query timestamps as Drive does, regardless of their precision."""
+    parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return _timestamp(parsed)
+
+
+class FakeGoogleDrive:
+    """In-memory Drive with a change log, served on a local HTTP port."""
+
+    def __init__(self, host='127.0.0.1', port=0):
+        self.files = {}
+        self.contents = {}
+        self.changes = []
+        self.requests = []
+        # Seconds to wait before serving each media request, to simulate network time
+        self.media_delay = 0
+        self._failures = deque()
+        # Push channels by ID, and the notifications sent to them
+        self.channels = {}
+        self.notifications = []
+        self._deliveries = []
+        self._next_id = 1
+        self._lock = threading.RLock()
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    # -- server lifecycle --------------------------------------------------
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}/'
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    # -- drive state -------------------------------------------------------
+
+    def add_file(self, name, content=b'', parents=None, mime_type='application/pdf', created_time=None):
+        """Create a file and record the change; returns its metadata."""
+        with self._lock:
+            file_id = f'fake{self._next_id:06d}'
+            self._next_id += 1
+            now = _timestamp()
+            self.files[file_id] = {
+                'id': file_id,
+                'name': name,
+                'mimeType': mime_type,
+                'parents': list(parents or ['root']),
+                'createdTime': created_time or now,
+                'modifiedTime': now,
+                'trashed': False,
+                'webViewLink': f'https://drive.google.com/file/d/{file_id}/view',
+            }
+            self._set_content(file_id, content)
+            self._record_change(file_id)
+            return dict(self.files[file_id])
+
+    def update_file(self, file_id, content=None, name=None):
+        """Change a file's content and/or name and record the change."""
+        with self._lock:
+            metadata = self.files[file_id]
+            if content is not None:
+                self._set_content(file_id, content)
+            if name is not None:
+                metadata['name'] = name
+            metadata['modifiedTime'] = _timestamp()
+            self._record_change(file_id)
+            return dict(metadata)
+
+    def trash_file(self, file_id):
+        with self._lock:
+            self.files[file_id]['trashed'] = True
+            self.files[file_id]['modifiedTime'] = _timestamp()
+            self._record_change(file_id)
+
+    def delete_file(self, file_id):
+        with self._lock:
+            del self.files[file_id]
+            del self.contents[file_id]
+            self._record_change(file_id, removed=True)
+
+    def fail_next(self, count, status=429, retry_after=None):
+        """Answer the next ``count`` API requests (batch sub-requests included) with a rate-limit error.
+
+        Use status 429, or 403 for Drive's ``userRateLimitExceeded``.
+        """
+        with self._lock:
+            self._failures.extend([(status, retry_after)] * count)
+
+    def take_failure(self):
+        """Pop the next injected failure as (status, body, Retry-After), or None."""
+        with self._lock:
+            if not self._failures:
+                return None
+            status, retry_after = self._failures.popleft()
+        reason = 'rateLimitExceeded' if status == 429 else 'userRateLimitExceeded'
+        return status, _error_body(status, 'Rate limit exceeded', reason), retry_after
+
+    def requests_to(self, path_prefix):
+        """Requests received for paths starting with ``path_prefix``."""
+        return [request for request in self.requests if request['path'].startswith(path_prefix)]
+
+    def _set_content(self, file_id, content):
+        self.contents[file_id] = content
+        self.files[file_id]['size'] = str(len(content))
+        self.files[file_id]['md5Checksum'] = hashlib.md5(content).hexdigest()
+
+    def _record_change(self, file_id, removed=False):
+        self.changes.append({'fileId': file_id, 'removed': removed, 'time': _timestamp()})
+        for channel in list(self.channels.values()):
+            self._notify(channel, 'change')
+
+    # -- push notifications --------------------------------------------------
+
+    def watch_changes(self, params, body):
+        """Open a channel; like Drive, it confirms itself with a 'sync' message."""
+        channel = {
+            'kind': 'api#channel',
+            'id': body['id'],
+            'resourceId': uuid.uuid4().hex,
+            'resourceUri': f"{self.url}changes?pageToken={params.get('pageToken')}",
+            'address': body['address'],
+            'token': body.get('token'),
+            'expiration': body.get('expiration') or str(int((time.time() + 3600) * 1000)),
+            'messageNumber': 0,
+        }
+        with self._lock:
+            self.channels[channel['id']] = channel
+        self._notify(channel, 'sync')
+        return {key: value for key, value in channel.items() if key not in ('address', 'token', 'messageNumber')}
+
+    def stop_channel(self, body):
+        with self._lock:
+            channel = self.channels.get(body.get('id'))
+            if channel is None or channel['resourceId'] != body.get('resourceId'):
+                return False
+            del self.channels[body['id']]
+            return True
+
+    def _notify(self, channel, state):
+        """POST a notification to the channel's address on a background thread."""
+        with self._lock:
+            channel['messageNumber'] += 1
+            headers = {
+                'X-Goog-Channel-ID': channel['id'],
+                'X-Goog-Channel-Expiration': channel['expiration'],
+                'X-Goog-Message-Number': str(channel['messageNumber']),
+                'X-Goog-Resource-ID': channel['resourceId'],
+                'X-Goog-Resource-State': state,
+                'X-Goog-Resource-URI': channel['resourceUri'],
+            }
+            if channel['token']:
+                headers['X-Goog-Channel-Token'] = channel['token']
+        delivery = threading.Thread(target=self._deliver, args=(channel['address'], headers), daemon=True)
+        self._deliveries.append(delivery)
+        delivery.start()
+
+    def _deliver(self, address, headers):
+        request = urllib.request.Request(address, data=b'', headers=headers, method='POST')
+        try:
+            with urllib.request.urlopen(request, timeout=10) as response:
+                status = response.status
+        except urllib.error.HTTPError as e:
+            status = e.code
+        except OSError:
+            status = None
+        with self._lock:
+            self.notifications.append({'state': headers['X-Goog-Resource-State'],
+                                       'channel': headers['X-Goog-Channel-ID'], 'status': status})
+
+    def flush_notifications(self, timeout=10):
+        """Wait until every notification sent so far has been delivered."""
+        for delivery in list(self._deliveries):
+            delivery.join(timeout)
+
+    # -- API -----------------------------------------------------------------
+
+    def _matches(self, metadata, query):
+        for clause in filter(None, (part.strip() for part in query.split(' and '))):
+            match = _QUERY_CLAUSE.match(clause)
+            if not match:
+                raise ValueError(f'Unsupported query clause: {clause}')
+            if match['mime'] is not None and metadata['mimeType'] != match['mime']:
+                return False
+            if match['created'] is not None and metadata['createdTime'] < _normalize_timestamp(match['created']):
+                return False
+            if match['modified'] is not None and metadata['modifiedTime'] < _normalize_timestamp(match['modified']):
+                return False
+            if match['parent'] is not None and match['parent'] not in metadata['parents']:
+                return False
+            if match['trashed'] is not None and metadata['trashed'] != (match['trashed'] == 'true'):
+                return False
+        return True
+
+    def list_files(self, params):
+        query = params.get('q', '')
+        page_size = min(int(params.get('pageSize', DEFAULT_PAGE_SIZE)), MAX_PAGE_SIZE)
+        offset = int(params.get('pageToken') or 0)
+        with self._lock:
+            matching = [dict(m) for m in self.files.values() if self._matches(m, query)]
+        response = {'files': matching[offset:offset + page_size]}
+        if offset + page_size < len(matching):
+            response['nextPageToken'] = str(offset + page_size)
+        return response
+
+    def get_start_page_token(self):
+        with self._lock:
+            return {'startPageToken': str(len(self.changes) + 1)}
+
+    def list_changes(self, params):
+        page_size = min(int(params.get('pageSize', DEFAULT_PAGE_SIZE)), MAX_PAGE_SIZE)
+        include_removed = params.get('includeRemoved', 'true') == 'true'
+        start = int(params['pageToken']) - 1
+        with self._lock:
+            page = self.changes[start:start + page_size]
+            changes = []
+            for change in page:
+                if change['removed'] and not include_removed:
+                    continue
+                entry = {'kind': 'drive#change', 'changeType': 'file', **change}
+                if not change['removed'] and change['fileId'] in self.files:
+                    entry['file'] = dict(self.files[change['fileId']])
+                changes.append(entry)
+            end = start + len(page)
+            response = {'changes': changes}
+            if end < len(self.changes):
+                response['nextPageToken'] = str(end + 1)
+            else:
+                response['newStartPageToken'] = str(end + 1)
+        return response
+
+    def get_file(self, file_id):
+        with self._lock:
+            if file_id not in self.files:
+                return None
+            return dict(self.files[file_id])
+
+    def handle_get(self, path, params):
+        """Route a metadata GET; returns (status, JSON body)."""
+        try:
+            if path == '/files':
+                return 200, self.list_files(params)
+            if path == '/changes/startPageToken':
+                return 200, self.get_start_page_token()
+            if path == '/changes':
+                return 200, self.list_changes(params)
+            if path.startswith('/files/'):
+                file_id = path[len('/files/'):]
+                metadata = self.get_file(file_id)
+                if metadata is None:
+                    return 404, _error_body(404, f'File not found: {file_id}')
+                return 200, metadata
+        except ValueError as e:
+            return 400, _error_body(400, str(e))
+        return 404, _error_body(404, f'Unknown path: {path}')
+
+    def handle_batch(self, content_type, body):
+        """Answer a multipart/mixed batch of GET sub-requests.
+
+        Returns (status, content type, payload). Like Drive, more than
+        MAX_BATCH_SIZE sub-requests are refused outright.
+        """
+        message = BytesParser(policy=email.policy.HTTP).parsebytes(
+            b'Content-Type: ' + content_type.encode('ascii') + b'\r\n\r\n' + body)
+        parts = list(message.iter_parts())
+        if len(parts) > MAX_BATCH_SIZE:
+            payload = json.dumps(_error_body(400, f'Too many requests in batch: {len(parts)}')).encode('utf-8')
+            return 400, 'application/json; charset=UTF-8', payload
+
+        boundary = 'batch_fake_drive_boundary'
+        lines = []
+        for part in parts:
+            request_line = part.get_payload(decode=True).decode('utf-8').split('\n', 1)[0].strip()
+            method, target = request_line.split(' ')[:2]
+            url = urlparse(target)
+            path = url.path.rstrip('/')
+            if path.startswith('/drive/v3'):
+                path = path[len('/drive/v3'):]
+            params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+            self.requests.append({'method': method, 'path': path, 'params': params, 'batched': True})
+
+            failure = self.take_failure()
+            if failure:
+                status, response = failure[:2]
+            elif method == 'GET':
+                status, response = self.handle_get(path, params)
+            else:
+                status, response = 405, _error_body(405, f'Unsupported batch method: {method}')
+            content_id = part['Content-ID'].strip('<>')
+            lines += [f'--{boundary}', 'Content-Type: application/http', f'Content-ID: <response-{content_id}>', '',
+                      f'HTTP/1.1 {status} {HTTPStatus(status).phrase}',
+                      'Content-Type: application/json; charset=UTF-8', '', json.dumps(response)]
+        lines.append(f'--{boundary}--')
+        return 200, f'multipart/mixed; boundary={boundary}', '\r\n'.join(lines).encode('utf-8')
+
+    # -- HTTP ----------------------------------------------------------------
+
+    def _make_handler(self):
+        drive = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def _send_json(self, status, body, retry_after=None):
+                payload = json.dumps(body).encode('utf-8')
+                self.send_response(status)
+                if retry_after is not None:
+                    self.send_header('Retry-After', str(retry_after))
+                self.send_header('Content-Type', 'application/json; charset=UTF-8')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def _send_error(self, status, message):
+                self._send_json(status, _error_body(status, message))
+
+            def _send_media(self, file_id):
+                if drive.media_delay:
+                    time.sleep(drive.media_delay)
+                content = drive.contents[file_id]
+                byte_range = re.match(r'bytes=(\d+)-(\d*)', self.headers.get('Range', ''))
+                if byte_range and len(content) == 0:
+                    self.send_response(416)
+                    self.send_header('Content-Range', 'bytes */0')
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                if byte_range:
+                    start = int(byte_range.group(1))
+                    end = min(int(byte_range.group(2) or len(content) - 1), len(content) - 1)
+                    chunk = content[start:end + 1]
+                    self.send_response(206)
+                    self.send_header('Content-Range', f'bytes {start}-{end}/{len(content)}')
+                else:
+                    chunk = content
+                    self.send_response(200)
+                self.send_header('Content-Type', 'application/octet-stream')
+                self.send_header('Content-Length', str(len(chunk)))
+                self.end_headers()
+                self.wfile.write(chunk)
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+                path = url.path.rstrip('/')
+                drive.requests.append({'method': 'GET', 'path': path, 'params': params})
+                failure = drive.take_failure()
+                if failure:
+                    return self._send_json(*failure)
+
+                if path.startswith('/files/') and params.get('alt') == 'media':
+                    file_id = path[len('/files/'):]
+                    if drive.get_file(file_id) is None:
+                        return self._send_error(404, f'File not found: {file_id}')
+                    return self._send_media(file_id)
+                self._send_json(*drive.handle_get(path, params))
+
+            def do_POST(self):
+                url = urlparse(self.path)
+                path = url.path.rstrip('/')
+                params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+                drive.requests.append({'method': 'POST', 'path': path, 'params': params})
+                body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+
+                if path == '/changes/watch':
+                    return self._send_json(200, drive.watch_changes(params, json.loads(body)))
+                if path == '/channels/stop':
+                    if not drive.stop_channel(json.loads(body)):
+                        return self._send_error(404, 'Channel not found')
+                    self.send_response(204)
+                    self.end_headers()
+                    return
+                if path not in ('/batch', '/batch/drive/v3'):
+                    return self._send_error(404, f'Unknown path: {path}')
+                status, content_type, payload = drive.handle_batch(self.headers['Content-Type'], body)
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+        return Handler
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Run a local fake Google Drive API.')
+    parser.add_argument('--port', type=int, default=8089)
+    parser.add_argument('--pdf-dir', help='Upload every PDF in this directory at startup')
+    args = parser.parse_args()
+
+    fake_drive = FakeGoogleDrive(port=args.port)
+    if args.pdf_dir:
+        import os
+        for name in sorted(os.listdir(args.pdf_dir)):
+            if name.lower().endswith('.pdf'):
+                with open(os.path.join(args.pdf_dir, name), 'rb') as pdf_file:
+                    fake_drive.add_file(name, pdf_file.read())
+    print(f'Fake Google Drive listening on {fake_drive.url}')
+    try:
+        fake_drive._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
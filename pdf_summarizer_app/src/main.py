@@ -1,3 +1,4 @@
+import multiprocessing
 import os
 import sys
 # DON'T CHANGE THIS !!!
@@ -13,6 +14,7 @@ from src.routes.auth import auth_bp
 from src.routes.pdf import pdf_bp
 from src.routes.email import email_bp
 from src.routes.scheduler import scheduler_bp, init_scheduler_routes
+from src.services.drive_push import DRIVE_PUSH_ENABLED
 from src.services.scheduler_service import SchedulerService
 
 app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
@@ -37,18 +39,34 @@ app.register_blueprint(email_bp, url_prefix='/api/email')
 app.register_blueprint(scheduler_bp, url_prefix='/api/scheduler')
 
 # uncomment if you need to use database
-app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'app.db')}"
+app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv(
+    'DATABASE_URL', f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'app.db')}"
+)
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 db.init_app(app)
 with app.app_context():
     db.create_all()
 
-# Initialize scheduler service
-scheduler_service = SchedulerService(app)
-init_scheduler_routes(scheduler_service)
+# Processing pool workers are spawned and re-run this module; only the
+# main process may start the scheduler, or every worker would run the jobs too
+if multiprocessing.parent_process() is None:
+    # Initialize scheduler service
+    scheduler_service = SchedulerService(app)
+    init_scheduler_routes(scheduler_service)
 
-# Schedule weekly tasks on startup
-scheduler_service.schedule_weekly_tasks()
+    # Schedule weekly tasks on startup
+    scheduler_service.schedule_weekly_tasks()
+
+    # Optional push ingestion; the weekly scan stays as a fallback
+    if DRIVE_PUSH_ENABLED:
+        scheduler_service.schedule_push_tasks()
+
+@app.cli.command('provision-nltk')
+def provision_nltk():
+    """Download the NLTK data used by the summarizers."""
+    from src.services.nlp_document import provision_nltk_data
+    for name, available in provision_nltk_data().items():
+        print(f"{name}: {'ok' if available else 'missing'}")
 
 @app.route('/', defaults={'path': ''})
 @app.route('/<path:path>')
@@ -1,20 +1,55 @@
 from src.models.user import db
 from datetime import datetime
+import json
+import zlib
 
 class PDFSummary(db.Model):
+    # Drive syncs look up a user's summaries by Drive file ID; a user has one summary per file
+    __table_args__ = (db.Index('ix_pdf_summary_user_drive_file', 'user_id', 'drive_file_id', unique=True),)
+
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     title = db.Column(db.String(255), nullable=False)
     file_path = db.Column(db.String(500), nullable=False)
     google_drive_link = db.Column(db.String(500), nullable=False)
+    drive_file_id = db.Column(db.String(255), nullable=True)
+    # Version of the Drive file the summary was built from, to detect content changes
+    drive_modified_time = db.Column(db.DateTime, nullable=True)
+    drive_md5_checksum = db.Column(db.String(32), nullable=True)
     summary = db.Column(db.Text, nullable=False)
     key_messages = db.Column(db.Text, nullable=True)
+    # JSON {method: {sentence_count: summary}} of alternative summaries
+    summary_bundle = db.Column(db.Text, nullable=True)
+    # JSON pre-flight triage facts (page count, encryption, producer, decision)
+    triage = db.Column(db.Text, nullable=True)
     date_added = db.Column(db.DateTime, default=datetime.utcnow)
     date_processed = db.Column(db.DateTime, default=datetime.utcnow)
+    # Shared processing result of the Drive file, when it has a checksum
+    document_id = db.Column(db.Integer, db.ForeignKey('pdf_document.id'), nullable=True, index=True)
+    document = db.relationship('PDFDocument', lazy='select')
+    # Extracted text lives in its own table and is only loaded when accessed
+    document_text = db.relationship('PDFText', uselist=False, lazy='select',
+                                    cascade='all, delete-orphan', backref='summary')
 
     def __repr__(self):
         return f'<PDFSummary {self.title}>'
 
+    @property
+    def text(self):
+        """The extracted text of the PDF, or None if it was not stored."""
+        if self.document_text:
+            return self.document_text.text
+        return self.document.text if self.document else None
+
+    @text.setter
+    def text(self, value):
+        if not value:
+            self.document_text = None
+        elif self.document_text:
+            self.document_text.text = value
+        else:
+            self.document_text = PDFText(text=value)
+
     def to_dict(self):
         return {
             'id': self.id,
@@ -22,9 +57,77 @@ class PDFSummary(db.Model):
             'title': self.title,
             'file_path': self.file_path,
             'google_drive_link': self.google_drive_link,
+            'drive_file_id': self.drive_file_id,
+            'document_id': self.document_id,
+            'drive_modified_time': self.drive_modified_time.isoformat() if self.drive_modified_time else None,
+            'drive_md5_checksum': self.drive_md5_checksum,
             'summary': self.summary,
             'key_messages': self.key_messages,
+            'summary_bundle': json.loads(self.summary_bundle) if self.summary_bundle else {},
+            'triage': json.loads(self.triage) if self.triage else {},
             'date_added': self.date_added.isoformat() if self.date_added else None,
             'date_processed': self.date_processed.isoformat() if self.date_processed else None
         }
 
+
+class PDFText(db.Model):
+    """zlib-compressed extracted text of a PDFSummary, kept out of the summaries table."""
+    __tablename__ = 'pdf_text'
+    id = db.Column(db.Integer, primary_key=True)
+    summary_id = db.Column(db.Integer, db.ForeignKey('pdf_summary.id'), nullable=False, unique=True)
+    compressed_text = db.Column(db.LargeBinary, nullable=False)
+    char_count = db.Column(db.Integer, nullable=False, default=0)
+
+    def __init__(self, text='', **kwargs):
+        super().__init__(**kwargs)
+        self.text = text
+
+    def __repr__(self):
+        return f'<PDFText {self.summary_id} ({self.char_count} chars)>'
+
+    @property
+    def text(self):
+        return _decompress_text(self.compressed_text)
+
+    @text.setter
+    def text(self, value):
+        self.compressed_text = _compress_text(value)
+        self.char_count = len(value)
+
+
+class PDFDocument(db.Model):
+    """Processing result of a Drive file, shared by every user who has the same file.
+
+    Keyed by Drive's md5Checksum of the content. When a user's sync finds a
+    PDF whose checksum is already here, their summary is filled in from
+    this row instead of downloading and processing the file again.
+    """
+    __tablename__ = 'pdf_document'
+    id = db.Column(db.Integer, primary_key=True)
+    md5_checksum = db.Column(db.String(32), nullable=False, unique=True)
+    title = db.Column(db.String(255), nullable=False)
+    summary = db.Column(db.Text, nullable=False)
+    key_messages = db.Column(db.Text, nullable=True)
+    summary_bundle = db.Column(db.Text, nullable=True)
+    triage = db.Column(db.Text, nullable=True)
+    compressed_text = db.Column(db.LargeBinary, nullable=True)
+    date_processed = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<PDFDocument {self.md5_checksum}>'
+
+    @property
+    def text(self):
+        return _decompress_text(self.compressed_text) if self.compressed_text else None
+
+    @text.setter
+    def text(self, value):
+        self.compressed_text = _compress_text(value) if value else None
+
+
+def _compress_text(text):
+    return zlib.compress(text.encode('utf-8'), 6)
+
+
+def _decompress_text(data):
+    return zlib.decompress(data).decode('utf-8')
@@ -11,6 +11,15 @@ class User(UserMixin, db.Model):
     password_hash = db.Column(db.String(255), nullable=False)
     google_drive_folder_id = db.Column(db.String(255), nullable=True)
     notification_email = db.Column(db.String(120), nullable=True)
+    # Drive changes feed cursor; each sync reads only what changed since it
+    drive_changes_token = db.Column(db.String(255), nullable=True)
+    # JSON {file_id: failed attempts} of Drive files the next sync retries
+    drive_retry_files = db.Column(db.Text, nullable=True)
+    # Drive push notification channel watching this user's changes, if push mode is on
+    drive_channel_id = db.Column(db.String(64), nullable=True, unique=True)
+    drive_channel_resource_id = db.Column(db.String(255), nullable=True)
+    drive_channel_token = db.Column(db.String(64), nullable=True)
+    drive_channel_expiration = db.Column(db.DateTime, nullable=True)
 
     def set_password(self, password):
         self.password_hash = generate_password_hash(password)
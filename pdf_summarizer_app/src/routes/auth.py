@@ -62,6 +62,10 @@ def update_settings():
     data = request.get_json()
     
     if 'google_drive_folder_id' in data:
+        if data['google_drive_folder_id'] != current_user.google_drive_folder_id:
+            # A new folder starts over with a full listing instead of the changes feed
+            current_user.drive_changes_token = None
+            current_user.drive_retry_files = None
         current_user.google_drive_folder_id = data['google_drive_folder_id']
     
     if 'notification_email' in data:
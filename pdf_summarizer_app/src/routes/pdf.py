@@ -1,10 +1,14 @@
 import os
+import json
 import tempfile
 from flask import Blueprint, jsonify, request
 from flask_login import login_required, current_user
 from src.models.pdf_summary import PDFSummary, db
+from src.services.drive_sync import DriveSyncService, user_sync_lock
 from src.services.google_drive import GoogleDriveService
-from src.services.pdf_processor import PDFProcessor
+from src.services.pdf_processor import SUMMARY_METHODS
+from src.services.pdf_triage import DECISION_DEFER
+from src.services.processing_pool import get_processing_pool
 from datetime import datetime
 
 pdf_bp = Blueprint('pdf', __name__)
@@ -29,72 +33,56 @@ def delete_summary(summary_id):
     db.session.commit()
     return '', 204
 
-@pdf_bp.route('/scan-drive', methods=['POST'])
+@pdf_bp.route('/summaries/<int:summary_id>/resummarize', methods=['POST'])
 @login_required
-def scan_google_drive():
-    """Scan Google Drive for new PDF files and process them."""
+def resummarize(summary_id):
+    """Recompute a summary from the stored text with a different method or length."""
+    summary = PDFSummary.query.filter_by(id=summary_id, user_id=current_user.id).first_or_404()
+    data = request.get_json(silent=True) or {}
+    
+    method = data.get('method', 'lsa')
+    if method not in SUMMARY_METHODS:
+        return jsonify({'error': f"Unknown method '{method}'. Use one of: {', '.join(SUMMARY_METHODS)}"}), 400
+    
     try:
-        # Initialize services
-        drive_service = GoogleDriveService()
-        pdf_processor = PDFProcessor()
-        
-        # Get user's Google Drive folder ID (if specified)
-        folder_id = current_user.google_drive_folder_id
+        sentences_count = int(data.get('sentences_count', 3))
+        max_messages = int(data.get('max_messages', 5))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'sentences_count and max_messages must be integers'}), 400
+    if not 1 <= sentences_count <= 50 or not 0 <= max_messages <= 50:
+        return jsonify({'error': 'sentences_count must be 1-50 and max_messages 0-50'}), 400
+    
+    text = summary.text
+    if not text:
+        return jsonify({'error': 'No extracted text is stored for this summary; scan the file again'}), 409
+    
+    try:
+        result = get_processing_pool().submit_text(
+            text, summary.file_path, method=method, sentences_count=sentences_count,
+            max_messages=max_messages, bundle=False
+        ).result()
         
-        # List new PDF files from the last week
-        files = drive_service.list_files(folder_id=folder_id, days_back=7)
+        summary.summary = result['summary']
+        summary.key_messages = '\n'.join(result['key_messages']) if result['key_messages'] else ''
+        summary.date_processed = datetime.utcnow()
+        db.session.commit()
         
-        processed_files = []
-        errors = []
+        return jsonify(summary.to_dict()), 200
         
-        for file in files:
-            try:
-                # Check if we've already processed this file
-                existing_summary = PDFSummary.query.filter_by(
-                    user_id=current_user.id,
-                    google_drive_link=file['webViewLink']
-                ).first()
-                
-                if existing_summary:
-                    continue  # Skip already processed files
-                
-                # Download the file to a temporary location
-                with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as temp_file:
-                    temp_path = temp_file.name
-                
-                if drive_service.download_file(file['id'], temp_path):
-                    # Process the PDF
-                    result = pdf_processor.process_pdf(temp_path, file['name'])
-                    
-                    # Create summary record
-                    summary = PDFSummary(
-                        user_id=current_user.id,
-                        title=result['title'],
-                        file_path=file['name'],
-                        google_drive_link=file['webViewLink'],
-                        summary=result['summary'],
-                        key_messages='\n'.join(result['key_messages']) if result['key_messages'] else '',
-                        date_added=datetime.fromisoformat(file['createdTime'].replace('Z', '+00:00')),
-                        date_processed=datetime.utcnow()
-                    )
-                    
-                    db.session.add(summary)
-                    processed_files.append(result['title'])
-                
-                # Clean up temporary file
-                if os.path.exists(temp_path):
-                    os.unlink(temp_path)
-                    
-            except Exception as e:
-                errors.append(f"Error processing {file['name']}: {str(e)}")
-        
-        # Commit all changes
-        db.session.commit()
+    except Exception as e:
+        return jsonify({'error': f'Failed to re-summarize: {str(e)}'}), 500
+
+@pdf_bp.route('/scan-drive', methods=['POST'])
+@login_required
+def scan_google_drive():
+    """Sync the user's Google Drive folder: process new and changed PDFs."""
+    try:
+        # Very long documents are left to the scheduled scan
+        result = DriveSyncService().sync_user(current_user, defer_large=True)
         
         return jsonify({
-            'message': f'Processed {len(processed_files)} new files',
-            'processed_files': processed_files,
-            'errors': errors
+            'message': f"Processed {len(result['processed_files'])} new files",
+            **result
         }), 200
         
     except Exception as e:
@@ -123,32 +111,54 @@ def upload_pdf():
         try:
             # Initialize services
             drive_service = GoogleDriveService()
-            pdf_processor = PDFProcessor()
+            processing_pool = get_processing_pool()
+            
+            # Start processing in the pool while the file uploads
+            processing_job = processing_pool.submit(temp_path, file.filename, defer_large=True)
             
             # Upload to Google Drive
             folder_id = current_user.google_drive_folder_id
             uploaded_file = drive_service.upload_file(temp_path, file.filename, folder_id)
             
             if not uploaded_file:
+                processing_job.cancel()
                 return jsonify({'error': 'Failed to upload file to Google Drive'}), 500
             
-            # Process the PDF
-            result = pdf_processor.process_pdf(temp_path, file.filename)
+            # Wait for the processed PDF
+            result = processing_job.result()
             
-            # Create summary record
-            summary = PDFSummary(
-                user_id=current_user.id,
-                title=result['title'],
-                file_path=file.filename,
-                google_drive_link=uploaded_file['webViewLink'],
-                summary=result['summary'],
-                key_messages='\n'.join(result['key_messages']) if result['key_messages'] else '',
-                date_added=datetime.utcnow(),
-                date_processed=datetime.utcnow()
-            )
+            # A cached result of a large PDF keeps its 'defer' triage but has its text
+            if result.get('triage', {}).get('decision') == DECISION_DEFER and not result['text']:
+                return jsonify({
+                    'message': 'File uploaded; it is large and will be processed by the next scheduled scan',
+                    'google_drive_link': uploaded_file['webViewLink'],
+                    'triage': result['triage']
+                }), 202
             
-            db.session.add(summary)
-            db.session.commit()
+            # Store under the user's sync lock; a push-triggered sync may already have stored the file
+            with user_sync_lock(current_user.id):
+                summary = PDFSummary.query.filter_by(user_id=current_user.id,
+                                                     drive_file_id=uploaded_file['id']).first()
+                if summary is None:
+                    # Create summary record
+                    summary = PDFSummary(
+                        user_id=current_user.id,
+                        title=result['title'],
+                        file_path=file.filename,
+                        google_drive_link=uploaded_file['webViewLink'],
+                        drive_file_id=uploaded_file['id'],
+                        drive_md5_checksum=uploaded_file.get('md5Checksum'),
+                        summary=result['summary'],
+                        key_messages='\n'.join(result['key_messages']) if result['key_messages'] else '',
+                        summary_bundle=json.dumps(result.get('summary_bundle', {})),
+                        text=result.get('text'),
+                        triage=json.dumps(result.get('triage', {})),
+                        date_added=datetime.utcnow(),
+                        date_processed=datetime.utcnow()
+                    )
+                    
+                    db.session.add(summary)
+                    db.session.commit()
             
             return jsonify({
                 'message': 'File uploaded and processed successfully',
@@ -1,5 +1,7 @@
 from flask import Blueprint, jsonify, request
 from flask_login import login_required, current_user
+from src.services.drive_push import RESOURCE_STATE_SYNC, find_channel_user
+from src.services.drive_rate_limiter import get_drive_request_scheduler
 from src.services.scheduler_service import SchedulerService
 
 scheduler_bp = Blueprint('scheduler', __name__)
@@ -118,3 +120,27 @@ def send_weekly_summaries_now():
     except Exception as e:
         return jsonify({'error': f'Failed to send weekly summaries: {str(e)}'}), 500
 
+
+@scheduler_bp.route('/drive-api-stats', methods=['GET'])
+@login_required
+def get_drive_api_stats():
+    """Get the Drive API call, throttling and retry counters."""
+    return jsonify({'stats': get_drive_request_scheduler().stats()}), 200
+
+@scheduler_bp.route('/drive-notifications', methods=['POST'])
+def drive_notification():
+    """Receive a Google Drive push notification and queue a sync of that user's changes."""
+    if not scheduler_service:
+        return jsonify({'error': 'Scheduler not initialized'}), 500
+    
+    user = find_channel_user(request.headers.get('X-Goog-Channel-ID'),
+                             request.headers.get('X-Goog-Channel-Token'))
+    if user is None:
+        return jsonify({'error': 'Unknown channel'}), 404
+    
+    # The first message on a new channel only confirms it
+    if request.headers.get('X-Goog-Resource-State') == RESOURCE_STATE_SYNC:
+        return '', 204
+    
+    scheduler_service.enqueue_drive_sync(user.id)
+    return '', 202
@@ -0,0 +1,87 @@
+import os
+import re
+from collections import Counter
+from itertools import islice
+
+# Boilerplate detection settings - these can be overridden with environment variables
+STRIP_BOILERPLATE = os.getenv('PDF_STRIP_BOILERPLATE', 'true').lower() in ('1', 'true', 'yes')
+# Pages read ahead to learn the repeated lines before any page is released
+BOILERPLATE_SAMPLE_PAGES = int(os.getenv('PDF_BOILERPLATE_SAMPLE_PAGES', '30'))
+# A line is boilerplate when it appears on at least this share of the sampled pages...
+BOILERPLATE_MIN_PAGE_RATIO = float(os.getenv('PDF_BOILERPLATE_MIN_PAGE_RATIO', '0.5'))
+# ...and on at least this many pages
+BOILERPLATE_MIN_PAGES = int(os.getenv('PDF_BOILERPLATE_MIN_PAGES', '3'))
+# Lines up to this long are matched with their numbers ignored (page numbers, dates)
+NUMBERED_LINE_MAX_CHARS = 40
+
+_DIGITS = re.compile(r'\d+')
+_WHITESPACE = re.compile(r'\s+')
+
+
+def line_hash(line):
+    """Hash of a line with case and spacing normalized.
+
+    In short lines numbers also collapse to '#', so page numbers such as
+    "Page 3 of 40" and "Page 4 of 40" hash alike while longer body lines
+    must repeat exactly. Returns None for blank lines.
+    """
+    normalized = _WHITESPACE.sub(' ', line).strip().lower()
+    if not normalized:
+        return None
+    if len(normalized) <= NUMBERED_LINE_MAX_CHARS:
+        normalized = _DIGITS.sub('#', normalized)
+    return hash(normalized)
+
+
+def page_line_hashes(page_text):
+    """Return (line, hash) pairs for the lines of one page."""
+    return [(line, line_hash(line)) for line in page_text.splitlines()]
+
+
+def find_repeated_lines(pages_hashes, min_ratio=None, min_pages=None):
+    """Return the set of line hashes that repeat across many pages.
+
+    ``pages_hashes`` holds the (line, hash) pairs of each page; a hash
+    counts at most once per page.
+    """
+    min_ratio = BOILERPLATE_MIN_PAGE_RATIO if min_ratio is None else min_ratio
+    min_pages = BOILERPLATE_MIN_PAGES if min_pages is None else min_pages
+
+    pages_with_text = 0
+    page_counts = Counter()
+    for hashes in pages_hashes:
+        unique = {h for _, h in hashes if h is not None}
+        if unique:
+            pages_with_text += 1
+            page_counts.update(unique)
+
+    threshold = max(min_pages, min_ratio * pages_with_text)
+    return {h for h, count in page_counts.items() if count >= threshold}
+
+
+def _strip_lines(hashes, repeated):
+    return '\n'.join(line for line, h in hashes if h not in repeated)
+
+
+def strip_repeated_lines(pages, sample_pages=None, min_ratio=None, min_pages=None):
+    """Drop running headers, footers, page numbers and disclaimers from a page stream.
+
+    The first ``sample_pages`` raw page texts are buffered and hashed line
+    by line; lines found on many of them are removed from those pages and
+    from every later page, which are otherwise passed through as they
+    arrive. Yields the filtered text of each page in order.
+    """
+    sample_pages = BOILERPLATE_SAMPLE_PAGES if sample_pages is None else sample_pages
+    pages = iter(pages)
+
+    sample = [page_line_hashes(page_text) for page_text in islice(pages, sample_pages)]
+    repeated = find_repeated_lines(sample, min_ratio, min_pages)
+
+    for hashes in sample:
+        yield _strip_lines(hashes, repeated)
+
+    for page_text in pages:
+        if repeated:
+            yield _strip_lines(page_line_hashes(page_text), repeated)
+        else:
+            yield page_text
@@ -0,0 +1,115 @@
+import hmac
+import logging
+import os
+import secrets
+import uuid
+from datetime import datetime, timedelta, timezone
+from src.models.user import User, db
+from src.services.google_drive import GoogleDriveService
+
+logger = logging.getLogger(__name__)
+
+# Push mode is optional; the weekly polling scan keeps running either way
+DRIVE_PUSH_ENABLED = os.getenv('DRIVE_PUSH_ENABLED', 'false').lower() == 'true'
+# Public HTTPS address of the notification webhook, e.g. https://example.com/api/scheduler/drive-notifications
+DRIVE_WEBHOOK_URL = os.getenv('DRIVE_WEBHOOK_URL')
+# Requested channel lifetime (Drive caps changes channels at one week) and how early they are renewed
+DRIVE_CHANNEL_TTL_HOURS = int(os.getenv('DRIVE_CHANNEL_TTL_HOURS', '24'))
+DRIVE_CHANNEL_RENEW_MARGIN_MINUTES = int(os.getenv('DRIVE_CHANNEL_RENEW_MARGIN_MINUTES', '60'))
+DRIVE_CHANNEL_RENEWAL_INTERVAL_MINUTES = int(os.getenv('DRIVE_CHANNEL_RENEWAL_INTERVAL_MINUTES', '30'))
+# Notifications for a user within this window are coalesced into one sync
+DRIVE_PUSH_SYNC_DELAY_SECONDS = int(os.getenv('DRIVE_PUSH_SYNC_DELAY_SECONDS', '30'))
+
+# X-Goog-Resource-State sent once when a channel is opened, before any change
+RESOURCE_STATE_SYNC = 'sync'
+
+
+class DrivePushService:
+    """Registers and renews Drive ``changes.watch`` channels, one per user.
+
+    Drive notifies the webhook when a user's Drive changes. A notification
+    carries no file details, so the webhook just queues a sync of that
+    user. That sync reads the changes feed and handles only the files
+    that changed. Channels expire, so renew_channels() replaces them
+    shortly before they do.
+    """
+
+    def __init__(self, drive_service=None, webhook_url=None):
+        self.drive_service = drive_service or GoogleDriveService()
+        self.webhook_url = webhook_url or DRIVE_WEBHOOK_URL
+
+    def watch_user(self, user):
+        """Open a channel for the user's changes, then stop the one it replaces."""
+        if not self.webhook_url:
+            raise ValueError("DRIVE_WEBHOOK_URL is not configured")
+
+        self.drive_service.user_key = user.id
+        page_token = user.drive_changes_token or self.drive_service.get_start_page_token()
+        channel_id = uuid.uuid4().hex
+        token = secrets.token_urlsafe(32)
+        channel = self.drive_service.watch_changes(
+            page_token, channel_id, self.webhook_url, token=token,
+            expiration=datetime.utcnow() + timedelta(hours=DRIVE_CHANNEL_TTL_HOURS)
+        )
+
+        # Open the new channel first so no change falls between the two
+        self.stop_user(user)
+        user.drive_channel_id = channel_id
+        user.drive_channel_resource_id = channel.get('resourceId')
+        user.drive_channel_token = token
+        user.drive_channel_expiration = _parse_expiration(channel.get('expiration'))
+        logger.info(f"Watching Google Drive changes for user {user.username} until {user.drive_channel_expiration}")
+
+    def stop_user(self, user):
+        """Stop the user's channel, if any. A channel that is already gone is simply forgotten."""
+        if not user.drive_channel_id:
+            return
+        try:
+            self.drive_service.stop_channel(user.drive_channel_id, user.drive_channel_resource_id)
+        except Exception as e:
+            logger.warning(f"Error stopping Drive channel for user {user.username}: {e}")
+        user.drive_channel_id = None
+        user.drive_channel_resource_id = None
+        user.drive_channel_token = None
+        user.drive_channel_expiration = None
+
+    def needs_renewal(self, user, now=None):
+        if not user.drive_channel_id or not user.drive_channel_expiration:
+            return True
+        now = now or datetime.utcnow()
+        return user.drive_channel_expiration - now < timedelta(minutes=DRIVE_CHANNEL_RENEW_MARGIN_MINUTES)
+
+    def renew_channels(self, users):
+        """Open channels for users without one and replace those about to expire.
+
+        Returns the number of channels opened. A user whose channel cannot
+        be opened is still covered by the polling scan.
+        """
+        renewed = 0
+        for user in users:
+            if not self.needs_renewal(user):
+                continue
+            try:
+                self.watch_user(user)
+                renewed += 1
+            except Exception as e:
+                logger.error(f"Error watching Google Drive for user {user.username}: {e}")
+        db.session.commit()
+        return renewed
+
+
+def find_channel_user(channel_id, token):
+    """Return the user a notification's channel belongs to, or None if it is unknown or forged."""
+    if not channel_id:
+        return None
+    user = User.query.filter_by(drive_channel_id=channel_id).first()
+    if user is None or not hmac.compare_digest(user.drive_channel_token or '', token or ''):
+        return None
+    return user
+
+
+def _parse_expiration(value):
+    """Convert a channel expiration in Unix milliseconds to a naive UTC datetime."""
+    if not value:
+        return None
+    return datetime.fromtimestamp(int(value) / 1000, tz=timezone.utc).replace(tzinfo=None)
@@ -0,0 +1,186 @@
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+# Drive's default project quota is 12,000 queries per minute
+DRIVE_QUOTA_PER_MINUTE = int(os.getenv('DRIVE_QUOTA_PER_MINUTE', '12000'))
+# Burst size; a full metadata batch of 100 requests fits in one burst
+DRIVE_RATE_BURST = int(os.getenv('DRIVE_RATE_BURST', '100'))
+# Retries of rate-limited and transient errors, with exponential backoff and full jitter
+DRIVE_MAX_RETRIES = int(os.getenv('DRIVE_MAX_RETRIES', '6'))
+DRIVE_BACKOFF_BASE = float(os.getenv('DRIVE_BACKOFF_BASE_SECONDS', '0.5'))
+DRIVE_BACKOFF_MAX = float(os.getenv('DRIVE_BACKOFF_MAX_SECONDS', '32'))
+
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+RATE_LIMIT_REASONS = {'rateLimitExceeded', 'userRateLimitExceeded'}
+
+
+class TokenBucket:
+    """Token bucket refilled at ``rate`` tokens per second, holding at most ``capacity``.
+
+    Not thread-safe on its own; DriveRequestScheduler guards it with its lock.
+    """
+
+    def __init__(self, rate, capacity, clock=time.monotonic):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.clock = clock
+        self._updated = clock()
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, tokens=1):
+        """Seconds until ``tokens`` are available; 0 if they are available now."""
+        self._refill()
+        missing = min(tokens, self.capacity) - self.tokens
+        return max(0.0, missing / self.rate)
+
+    def take(self, tokens=1):
+        self._refill()
+        self.tokens -= min(tokens, self.capacity)
+
+
+def is_retryable(error):
+    """Whether a Drive API error is worth retrying: rate limits and transient failures."""
+    from googleapiclient.errors import HttpError
+
+    if isinstance(error, HttpError):
+        status = error.resp.status
+        if status in RETRYABLE_STATUSES:
+            return True
+        if status == 403:
+            reasons = {detail.get('reason') for detail in (error.error_details or []) if isinstance(detail, dict)}
+            return bool(reasons & RATE_LIMIT_REASONS) or 'rate limit' in str(error).lower()
+        return False
+    return isinstance(error, (ConnectionError, TimeoutError))
+
+
+def _retry_after(error):
+    """Seconds the server asked us to wait, if it sent a Retry-After header."""
+    resp = getattr(error, 'resp', None)
+    try:
+        return float(resp.get('retry-after')) if resp is not None and resp.get('retry-after') else None
+    except (TypeError, ValueError):
+        return None
+
+
+class DriveRequestScheduler:
+    """Process-wide gate for Drive API calls.
+
+    Every call takes tokens from a bucket sized to the project quota.
+    When callers have to wait, tokens are granted round-robin across user
+    keys, so one user with thousands of files cannot starve the others.
+    Rate-limited and transient errors are retried with exponential backoff
+    and full jitter, honouring Retry-After. ``stats()`` reports how many
+    calls were made, throttled by the bucket, failed with a retryable error,
+    retried and given up on.
+    """
+
+    def __init__(self, rate=None, burst=None, max_retries=None, backoff_base=None, backoff_max=None,
+                 sleep=time.sleep):
+        rate = DRIVE_QUOTA_PER_MINUTE / 60 if rate is None else rate
+        self.bucket = TokenBucket(rate, DRIVE_RATE_BURST if burst is None else burst)
+        self.max_retries = DRIVE_MAX_RETRIES if max_retries is None else max_retries
+        self.backoff_base = DRIVE_BACKOFF_BASE if backoff_base is None else backoff_base
+        self.backoff_max = DRIVE_BACKOFF_MAX if backoff_max is None else backoff_max
+        self.sleep = sleep
+        self._condition = threading.Condition()
+        self._waiting = {}
+        self._turns = deque()
+        self._stats = {'calls': 0, 'throttled': 0, 'retryable_errors': 0, 'retried': 0, 'failed': 0}
+
+    def acquire(self, user_key=None, tokens=1):
+        """Block until this user's turn comes up and ``tokens`` are available."""
+        ticket = object()
+        throttled = False
+        with self._condition:
+            if user_key not in self._waiting:
+                self._waiting[user_key] = deque()
+                self._turns.append(user_key)
+            self._waiting[user_key].append(ticket)
+
+            while True:
+                if self._turns[0] == user_key and self._waiting[user_key][0] is ticket:
+                    wait_time = self.bucket.wait_time(tokens)
+                    if wait_time <= 0:
+                        break
+                    throttled = True
+                    self._condition.wait(wait_time)
+                else:
+                    throttled = True
+                    self._condition.wait()
+
+            self.bucket.take(tokens)
+            self._waiting[user_key].popleft()
+            # Move this user to the back of the rotation
+            self._turns.popleft()
+            if self._waiting[user_key]:
+                self._turns.append(user_key)
+            else:
+                del self._waiting[user_key]
+            self._stats['calls'] += 1
+            if throttled:
+                self._stats['throttled'] += 1
+            self._condition.notify_all()
+
+    def backoff_delay(self, attempt, error=None):
+        """Full-jitter exponential backoff, or the server's Retry-After if longer."""
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        retry_after = _retry_after(error) if error is not None else None
+        return max(delay, retry_after or 0)
+
+    def retry_delay(self, attempt, error):
+        """Count a failed call; return how long to back off, or None if it should not be retried."""
+        if not is_retryable(error):
+            return None
+        self._count('retryable_errors')
+        if attempt >= self.max_retries:
+            self._count('failed')
+            return None
+        self._count('retried')
+        return self.backoff_delay(attempt, error)
+
+    def execute(self, call, user_key=None, tokens=1):
+        """Run ``call()`` under the rate limit, retrying retryable errors."""
+        attempt = 0
+        while True:
+            self.acquire(user_key, tokens)
+            try:
+                return call()
+            except Exception as e:
+                delay = self.retry_delay(attempt, e)
+                if delay is None:
+                    raise
+                logger.warning(f"Drive API call failed ({e}); retry {attempt + 1} in {delay:.2f}s")
+                self.sleep(delay)
+                attempt += 1
+
+    def _count(self, name):
+        with self._condition:
+            self._stats[name] += 1
+
+    def stats(self):
+        with self._condition:
+            return dict(self._stats)
+
+
+_drive_request_scheduler = None
+_drive_request_scheduler_lock = threading.Lock()
+
+
+def get_drive_request_scheduler():
+    """Return the process-wide Drive request scheduler, creating it on first use."""
+    global _drive_request_scheduler
+    with _drive_request_scheduler_lock:
+        if _drive_request_scheduler is None:
+            _drive_request_scheduler = DriveRequestScheduler()
+        return _drive_request_scheduler
@@ -0,0 +1,481 @@
+import json
+import logging
+import os
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime, timezone
+from src.models.pdf_summary import PDFDocument, PDFSummary, db
+from src.services.google_drive import GoogleDriveService
+from src.services.pdf_triage import DECISION_DEFER
+from src.services.processing_pool import get_processing_pool
+
+logger = logging.getLogger(__name__)
+
+# Window listed on a user's first sync, before they have a changes cursor
+INITIAL_SYNC_DAYS = int(os.getenv('DRIVE_INITIAL_SYNC_DAYS', '7'))
+PDF_MIME_TYPE = 'application/pdf'
+# Syncs a failing file is retried by before it is given up on
+SYNC_MAX_ATTEMPTS = int(os.getenv('DRIVE_SYNC_MAX_ATTEMPTS', '5'))
+# Metadata fetched for retried files; the same file fields the changes feed returns
+RETRY_FIELDS = 'id,name,mimeType,parents,trashed,createdTime,modifiedTime,webViewLink,size,md5Checksum'
+
+# Pipeline settings: concurrent downloads, and files between download and storage at once
+DOWNLOAD_WORKERS = int(os.getenv('DRIVE_DOWNLOAD_WORKERS', '4'))
+SYNC_MAX_IN_FLIGHT = int(os.getenv('DRIVE_SYNC_MAX_IN_FLIGHT', '8'))
+
+
+# One lock per user, so push, scheduled and manual syncs of the same user run one at a time
+_user_sync_locks = {}
+_user_sync_locks_lock = threading.Lock()
+
+
+def user_sync_lock(user_id):
+    """Return the lock held while a user's Drive files are synced or stored."""
+    with _user_sync_locks_lock:
+        if user_id not in _user_sync_locks:
+            _user_sync_locks[user_id] = threading.Lock()
+        return _user_sync_locks[user_id]
+
+
+def _parse_drive_time(value):
+    """Parse a Drive RFC 3339 timestamp into a naive UTC datetime, like the DB columns."""
+    return datetime.fromisoformat(value.replace('Z', '+00:00')).astimezone(timezone.utc).replace(tzinfo=None)
+
+
+class KnownSummaries:
+    """The Drive files a user already has summaries for, loaded in one query.
+
+    Holds only what a sync needs to decide whether a file must be
+    processed, so re-scanning a large folder costs one query instead of
+    one per listed file. Summaries stored before drive_file_id existed
+    are matched by their Drive link.
+    """
+
+    def __init__(self, user):
+        rows = db.session.query(
+            PDFSummary.id,
+            PDFSummary.drive_file_id,
+            PDFSummary.google_drive_link,
+            PDFSummary.date_processed,
+            PDFSummary.drive_modified_time,
+            PDFSummary.drive_md5_checksum
+        ).filter_by(user_id=user.id).all()
+        self.by_file_id = {}
+        self.by_link = {}
+        for row in rows:
+            if row.drive_file_id:
+                self.by_file_id.setdefault(row.drive_file_id, row)
+            else:
+                self.by_link.setdefault(row.google_drive_link, row)
+
+    def find(self, file):
+        """Return the known row for a Drive file, or None."""
+        return self.by_file_id.get(file['id']) or self.by_link.get(file.get('webViewLink'))
+
+    def __contains__(self, file_id):
+        return file_id in self.by_file_id
+
+
+class RetryList:
+    """The Drive files a user's next sync must try again, with their failed attempts.
+
+    Stored as JSON on the user, so the changes cursor can advance past a
+    file that failed or was deferred without losing it. A file leaves the
+    list when a sync handles it; failing again counts an attempt, and
+    files that failed SYNC_MAX_ATTEMPTS times are given up on.
+    """
+
+    def __init__(self, user):
+        self.previous = json.loads(user.drive_retry_files) if user.drive_retry_files else {}
+        self.attempts = dict(self.previous)
+
+    def file_ids(self):
+        return list(self.attempts)
+
+    def take(self, file_id):
+        """Note that this sync handles the file; it stays off the list unless it fails again."""
+        self.attempts.pop(file_id, None)
+
+    def failed(self, file):
+        self.attempts[file['id']] = self.previous.get(file['id'], 0) + 1
+
+    def deferred(self, file):
+        # Deferring is not a failure; the scheduled sync will process the file
+        self.attempts[file['id']] = self.previous.get(file['id'], 0)
+
+    def save(self, user):
+        for file_id, attempts in list(self.attempts.items()):
+            if attempts >= SYNC_MAX_ATTEMPTS:
+                logger.warning(f"Giving up on Drive file {file_id} for user {user.username} "
+                               f"after {attempts} failed syncs")
+                del self.attempts[file_id]
+        user.drive_retry_files = json.dumps(self.attempts) if self.attempts else None
+
+
+class DriveSyncService:
+    """Keeps a user's PDF summaries in step with their Google Drive folder.
+
+    The first sync lists the PDFs created in the last INITIAL_SYNC_DAYS days
+    and stores a changes cursor on the user. Later syncs read only the
+    Drive changes feed since that cursor: new PDFs are processed, modified
+    ones re-processed, and trashed or removed ones have their summaries
+    deleted. The cursor advances once the feed has been read to the end;
+    files that failed or were deferred go on the user's RetryList and are
+    fetched again by the next sync, so one broken file does not make every
+    later sync replay the feed.
+
+    Downloads, processing and DB writes run as a pipeline, so network and
+    CPU work overlap instead of alternating. Results are shared across
+    users by content checksum: a PDF that any user already has a result
+    for is neither downloaded nor processed again.
+
+    Syncs and uploads of the same user are serialized within the process
+    (``user_sync_lock``), and a user has at most one summary per Drive
+    file, so overlapping push, scheduled and manual syncs never store a
+    file twice. A failed sync rolls the session back.
+    """
+
+    def __init__(self, drive_service=None, processing_pool=None):
+        self.drive_service = drive_service or GoogleDriveService()
+        self.processing_pool = processing_pool or get_processing_pool()
+
+    def sync_user(self, user, defer_large=False):
+        """Sync one user's Drive folder and commit the resulting summaries.
+
+        With ``defer_large`` very long PDFs are skipped and reported under
+        ``deferred_files`` for the scheduled sync to process. Returns lists
+        of processed, updated, removed and deferred file titles and errors.
+        Waits for any sync of the same user that is already running.
+        """
+        lock = user_sync_lock(user.id)
+        if not lock.acquire(blocking=False):
+            logger.info(f"Waiting for the running Drive sync of user {user.username}")
+            lock.acquire()
+            # Start from the cursor the other sync stored
+            db.session.refresh(user)
+        try:
+            return self._sync_user(user, defer_large)
+        except Exception:
+            # Leave the session usable for the caller's next user or request
+            db.session.rollback()
+            raise
+        finally:
+            lock.release()
+
+    def _sync_user(self, user, defer_large):
+        result = {
+            'processed_files': [],
+            'updated_files': [],
+            'removed_files': [],
+            'deferred_files': [],
+            'errors': []
+        }
+        cursor = {}
+        known = KnownSummaries(user)
+        retries = RetryList(user)
+        # Share the Drive quota fairly between users syncing at the same time
+        self.drive_service.user_key = user.id
+
+        work = self._files_to_process(user, known, retries, result, cursor)
+        self._run_pipeline(user, work, retries, result, defer_large)
+
+        if cursor.get('new_token'):
+            user.drive_changes_token = cursor['new_token']
+        retries.save(user)
+
+        db.session.commit()
+        return result
+
+    def _files_to_process(self, user, known, retries, result, cursor):
+        """Yield (file, existing summary) for every new or modified PDF.
+
+        Removals are applied as they are read. Once the listing has been
+        read to the end, ``cursor['new_token']`` holds the next changes cursor.
+        Listing errors propagate, leaving the cursor unset so the next sync
+        lists again. Files on the retry list that the listing did not
+        mention are fetched and yielded last.
+        """
+        if user.drive_changes_token:
+            changes = self.drive_service.list_changes(user.drive_changes_token)
+            for change in changes:
+                retries.take(change['fileId'])
+                file = self._apply_change(user, change, known, result)
+                if file:
+                    yield from self._if_needs_processing(file, known)
+            cursor['new_token'] = changes.new_start_page_token
+        else:
+            # Take the cursor first so nothing created during the listing is missed
+            new_token = self.drive_service.get_start_page_token()
+            files = self.drive_service.list_files(folder_id=user.google_drive_folder_id,
+                                                  days_back=INITIAL_SYNC_DAYS)
+            for file in files:
+                retries.take(file['id'])
+                yield from self._if_needs_processing(file, known)
+            cursor['new_token'] = new_token
+
+        yield from self._files_to_retry(user, known, retries, result)
+
+    def _files_to_retry(self, user, known, retries, result):
+        """Yield the retry list's files that still need processing, fetched in one batch."""
+        file_ids = retries.file_ids()
+        if not file_ids:
+            return
+
+        files, errors = self.drive_service.get_files_info(file_ids, fields=RETRY_FIELDS)
+        for file_id in file_ids:
+            if file_id in files:
+                retries.take(file_id)
+                file = self._apply_change(user, {'fileId': file_id, 'file': files[file_id]}, known, result)
+                if file:
+                    yield from self._if_needs_processing(file, known)
+            elif errors.get(file_id, {}).get('code') == 404:
+                # Deleted, or no longer shared with us
+                retries.take(file_id)
+
+    def _apply_change(self, user, change, known, result):
+        """Apply a removal, or return the changed file if it is a PDF in the user's folder."""
+        file = change.get('file')
+        if change.get('removed') or (file and file.get('trashed')):
+            if change['fileId'] in known:
+                self._remove_file(user, change['fileId'], result)
+            return None
+
+        if not file or file.get('mimeType') != PDF_MIME_TYPE:
+            return None
+
+        folder_id = user.google_drive_folder_id
+        if folder_id and folder_id not in file.get('parents', []):
+            return None
+
+        return file
+
+    def _remove_file(self, user, file_id, result):
+        for summary in PDFSummary.query.filter_by(user_id=user.id, drive_file_id=file_id).all():
+            db.session.delete(summary)
+            result['removed_files'].append(summary.title)
+
+    def _if_needs_processing(self, file, known):
+        """Yield (file, summary to update or None) if the file is new or modified."""
+        row = known.find(file)
+        if row is None:
+            yield file, None
+        elif self._is_modified(row, file):
+            yield file, db.session.get(PDFSummary, row.id)
+        else:
+            self._update_metadata(row, file)
+
+    def _update_metadata(self, row, file):
+        """Record metadata-only changes, such as a rename, without re-processing."""
+        updates = {}
+        if row.drive_file_id is None:
+            # Record the file ID on summaries matched by link, so later syncs find them by ID
+            updates['drive_file_id'] = file['id']
+        modified_time = _parse_drive_time(file['modifiedTime']) if file.get('modifiedTime') else None
+        if modified_time and row.drive_modified_time and modified_time > row.drive_modified_time:
+            updates['file_path'] = file['name']
+            updates['drive_modified_time'] = modified_time
+        if updates:
+            PDFSummary.query.filter_by(id=row.id).update(updates)
+
+    def _run_pipeline(self, user, work, retries, result, defer_large):
+        """Download, process and store files in overlapping stages.
+
+        Downloads run on a thread pool and processing on the process pool.
+        This thread is the single DB writer: it feeds the download stage
+        from ``work``, hands finished downloads to the process pool and
+        stores finished results. At most SYNC_MAX_IN_FLIGHT files are
+        between stages at once, so memory stays bounded however many files
+        changed. If a stage raises, queued work is cancelled and every
+        download still between stages is closed.
+        """
+        downloading = {}
+        processing = {}
+
+        try:
+            with ThreadPoolExecutor(max_workers=DOWNLOAD_WORKERS, thread_name_prefix='drive-download') as downloads:
+                try:
+                    self._pump(user, iter(work), downloads, downloading, processing, retries, result,
+                               defer_large)
+                finally:
+                    # On an error, drop queued work before the executor waits for it
+                    for future in list(downloading) + list(processing):
+                        future.cancel()
+        finally:
+            self._close_outstanding(downloading, processing)
+
+    def _pump(self, user, work, downloads, downloading, processing, retries, result, defer_large):
+        """Move files through the stages until ``work`` is exhausted and every stage is empty."""
+        exhausted = False
+        while True:
+            # Fill the download stage up to the in-flight bound
+            while not exhausted and len(downloading) + len(processing) < SYNC_MAX_IN_FLIGHT:
+                try:
+                    file, summary = next(work)
+                except StopIteration:
+                    exhausted = True
+                except Exception as e:
+                    exhausted = True
+                    result['errors'].append(f"Error reading Google Drive: {str(e)}")
+                else:
+                    document = self._shared_document(file)
+                    if document is not None:
+                        self._store_shared(user, file, summary, document, result)
+                        continue
+                    future = downloads.submit(self.drive_service.download_to_spool, file['id'])
+                    downloading[future] = (file, summary)
+
+            if not downloading and not processing:
+                break
+
+            done, _ = wait(list(downloading) + list(processing), return_when=FIRST_COMPLETED)
+            for future in done:
+                if future in downloading:
+                    file, summary = downloading.pop(future)
+                    self._start_processing(user, file, summary, future, processing, retries, result,
+                                           defer_large)
+                else:
+                    file, summary, download = processing.pop(future)
+                    download.close()
+                    self._store_result(user, file, summary, future, retries, result)
+
+    def _close_outstanding(self, downloading, processing):
+        """Release the downloads of files a failed pipeline left between stages."""
+        for _, _, download in processing.values():
+            download.close()
+        for future in downloading:
+            if future.cancelled() or future.exception() is not None:
+                continue
+            download = future.result()
+            if download is not None:
+                download.close()
+
+    def _start_processing(self, user, file, summary, download_future, processing, retries, result, defer_large):
+        download = download_future.result()
+        if download is None:
+            retries.failed(file)
+            result['errors'].append(f"Error downloading {file['name']}")
+            return
+
+        try:
+            # Process the PDF; with defer_large very long documents are left to the scheduled sync
+            future = self.processing_pool.submit(download.source(), file['name'], defer_large=defer_large)
+        except Exception as e:
+            download.close()
+            logger.error(f"Error processing file {file['name']} for user {user.username}: {e}")
+            retries.failed(file)
+            result['errors'].append(f"Error processing {file['name']}: {str(e)}")
+            return
+        # The download buffer is released once its processing has finished
+        processing[future] = (file, summary, download)
+
+    def _store_result(self, user, file, summary, processing_future, retries, result):
+        try:
+            processed = processing_future.result()
+
+            if processed.get('triage', {}).get('decision') == DECISION_DEFER and not processed['text']:
+                retries.deferred(file)
+                result['deferred_files'].append(file['name'])
+                return
+
+            document = self._save_document(file, processed)
+            summary = self._summary_for(user, file, summary, processed['title'], result)
+            if document is None:
+                self._apply_result(summary, file, processed)
+            else:
+                self._apply_document(summary, file, document)
+
+        except Exception as e:
+            logger.error(f"Error processing file {file['name']} for user {user.username}: {e}")
+            retries.failed(file)
+            result['errors'].append(f"Error processing {file['name']}: {str(e)}")
+
+    def _shared_document(self, file):
+        """Return the stored result for this file's content, if any user has one."""
+        checksum = file.get('md5Checksum')
+        if not checksum:
+            return None
+        return PDFDocument.query.filter_by(md5_checksum=checksum).first()
+
+    def _store_shared(self, user, file, summary, document, result):
+        summary = self._summary_for(user, file, summary, document.title, result)
+        self._apply_document(summary, file, document)
+
+    def _summary_for(self, user, file, summary, title, result):
+        """Return the summary to fill in, creating it for a new file."""
+        if summary is None:
+            summary = PDFSummary(user_id=user.id, date_added=_parse_drive_time(file['createdTime']))
+            db.session.add(summary)
+            result['processed_files'].append(title)
+        else:
+            result['updated_files'].append(title)
+        return summary
+
+    def _save_document(self, file, processed):
+        """Store a processing result under the file's checksum so other users can share it."""
+        checksum = file.get('md5Checksum')
+        if not checksum or not processed.get('text'):
+            return None
+
+        document = PDFDocument.query.filter_by(md5_checksum=checksum).first()
+        if document is None:
+            document = PDFDocument(md5_checksum=checksum)
+            db.session.add(document)
+        document.title = processed['title']
+        document.summary = processed['summary']
+        document.key_messages = '\n'.join(processed['key_messages']) if processed['key_messages'] else ''
+        document.summary_bundle = json.dumps(processed.get('summary_bundle', {}))
+        document.triage = json.dumps(processed.get('triage', {}))
+        document.text = processed['text']
+        document.date_processed = datetime.utcnow()
+        return document
+
+    def _is_modified(self, summary, file):
+        """Whether the file's content changed since its summary was built.
+
+        Compares Drive's md5Checksum when both sides have one, so renames
+        and other metadata edits do not trigger re-processing. Otherwise
+        falls back to the recorded modifiedTime, then to the processing date.
+        """
+        checksum = file.get('md5Checksum')
+        if checksum and summary.drive_md5_checksum:
+            return checksum != summary.drive_md5_checksum
+
+        modified_time = file.get('modifiedTime')
+        built_from = summary.drive_modified_time or summary.date_processed
+        if not modified_time or not built_from:
+            return False
+        return _parse_drive_time(modified_time) > built_from
+
+    def _record_version(self, summary, file):
+        """Record which version of the Drive file a summary was built from."""
+        summary.drive_md5_checksum = file.get('md5Checksum')
+        summary.drive_modified_time = _parse_drive_time(file['modifiedTime']) if file.get('modifiedTime') else None
+
+    def _apply_result(self, summary, file, processed):
+        summary.title = processed['title']
+        summary.file_path = file['name']
+        summary.google_drive_link = file['webViewLink']
+        summary.drive_file_id = file['id']
+        summary.summary = processed['summary']
+        summary.key_messages = '\n'.join(processed['key_messages']) if processed['key_messages'] else ''
+        summary.summary_bundle = json.dumps(processed.get('summary_bundle', {}))
+        summary.text = processed.get('text')
+        summary.triage = json.dumps(processed.get('triage', {}))
+        summary.document = None
+        self._record_version(summary, file)
+        summary.date_processed = datetime.utcnow()
+
+    def _apply_document(self, summary, file, document):
+        """Fill a summary from a shared result; its text is read from the document."""
+        summary.title = document.title
+        summary.file_path = file['name']
+        summary.google_drive_link = file['webViewLink']
+        summary.drive_file_id = file['id']
+        summary.summary = document.summary
+        summary.key_messages = document.key_messages
+        summary.summary_bundle = document.summary_bundle
+        summary.triage = document.triage
+        summary.text = None
+        summary.document = document
+        self._record_version(summary, file)
+        summary.date_processed = datetime.utcnow()
@@ -1,24 +1,212 @@
 import os
 import io
 import json
-from datetime import datetime, timedelta
-from googleapiclient.discovery import build
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.http import MediaIoBaseDownload, MediaFileUpload
+import tempfile
+import threading
+from datetime import datetime, timedelta, timezone
+from src.services.drive_rate_limiter import get_drive_request_scheduler
+
+# The Google client libraries are imported inside the methods that use them;
+# importing them costs a noticeable part of app startup.
 
 # If modifying these scopes, delete the file token.json.
 SCOPES = ['https://www.googleapis.com/auth/drive']
 
-class GoogleDriveService:
-    def __init__(self, credentials_file='credentials.json', token_file='token.json'):
+# files.list returns at most 1000 files per page
+LIST_PAGE_SIZE = 1000
+# Only the fields the scan needs, to keep each page small
+LIST_FIELDS = 'nextPageToken, files(id, name, createdTime, modifiedTime, webViewLink, size, md5Checksum)'
+CHANGES_FIELDS = ('nextPageToken, newStartPageToken, changes(fileId, removed, time, '
+                  'file(id, name, mimeType, parents, trashed, createdTime, modifiedTime, webViewLink, size, '
+                  'md5Checksum))')
+
+FILE_INFO_FIELDS = 'id,name,createdTime,modifiedTime,webViewLink,size,mimeType,md5Checksum'
+
+# Metadata lookups are grouped into multipart batches of at most 100 sub-requests
+BATCH_URI = 'https://www.googleapis.com/batch/drive/v3'
+BATCH_SIZE = 100
+
+# Refresh access tokens this long before they expire
+TOKEN_REFRESH_MARGIN = int(os.getenv('GOOGLE_TOKEN_REFRESH_MARGIN_SECONDS', '300'))
+HTTP_TIMEOUT = int(os.getenv('GOOGLE_DRIVE_HTTP_TIMEOUT', '60'))
+
+# Downloads are fetched in ranged requests of this many bytes
+DOWNLOAD_CHUNK_SIZE = int(os.getenv('GOOGLE_DRIVE_DOWNLOAD_CHUNK_SIZE', str(8 * 1024 * 1024)))
+# Downloads up to this size stay in memory; larger ones spill to a temporary file
+DOWNLOAD_SPOOL_MAX_MEMORY = int(os.getenv('GOOGLE_DRIVE_SPOOL_MAX_MEMORY', str(16 * 1024 * 1024)))
+
+# Point the client at another Drive API endpoint, e.g. the local fake_google_drive.py
+DRIVE_API_ENDPOINT = os.getenv('GOOGLE_DRIVE_API_ENDPOINT')
+
+
+class SpooledDownload:
+    """Write buffer for a download that spills from memory to disk past ``max_memory`` bytes.
+
+    Unlike tempfile.SpooledTemporaryFile, the spilled file is named, so it
+    can be handed to another process by path. ``source()`` returns what the
+    PDF processor accepts: the bytes while in memory, else the file path.
+    Closing the download deletes the temporary file.
+    """
+
+    def __init__(self, max_memory=None, suffix='.pdf'):
+        self.max_memory = DOWNLOAD_SPOOL_MAX_MEMORY if max_memory is None else max_memory
+        self.suffix = suffix
+        self.name = None
+        self.size = 0
+        self._file = io.BytesIO()
+
+    @property
+    def in_memory(self):
+        return self.name is None
+
+    def write(self, data):
+        if self.name is None and self.size + len(data) > self.max_memory:
+            self._rollover()
+        self._file.write(data)
+        self.size += len(data)
+        return len(data)
+
+    def _rollover(self):
+        fd, self.name = tempfile.mkstemp(suffix=self.suffix)
+        spilled = os.fdopen(fd, 'w+b')
+        spilled.write(self._file.getbuffer())
+        self._file = spilled
+
+    def source(self):
+        if self.name is None:
+            return self._file.getvalue()
+        self._file.flush()
+        return self.name
+
+    def close(self):
+        self._file.close()
+        if self.name and os.path.exists(self.name):
+            os.unlink(self.name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class DriveChangeFeed:
+    """Iterable over the changes since a page token.
+
+    Follows ``nextPageToken`` lazily; once fully iterated,
+    ``new_start_page_token`` holds the cursor for the next sync. It stays
+    None if the feed could not be read to the end.
+    """
+
+    def __init__(self, service, page_token, execute=None):
+        self.service = service
+        self.page_token = page_token
+        self.execute = execute or (lambda request: request.execute())
+        self.new_start_page_token = None
+
+    def __iter__(self):
+        page_token = self.page_token
+        while page_token:
+            results = self.execute(self.service.changes().list(
+                pageToken=page_token,
+                pageSize=LIST_PAGE_SIZE,
+                includeRemoved=True,
+                spaces='drive',
+                fields=CHANGES_FIELDS
+            ))
+            
+            yield from results.get('changes', [])
+            
+            page_token = results.get('nextPageToken')
+            if not page_token:
+                self.new_start_page_token = results.get('newStartPageToken')
+
+class DriveClientManager:
+    """Process-wide Drive API client shared by every GoogleDriveService.
+
+    Credentials are loaded once and refreshed proactively, shortly before
+    they expire, so no request pays for a refresh. The API service (and its
+    parsed discovery document) is built once. httplib2 is not thread-safe,
+    so every request made through the shared service runs on its calling
+    thread's own transport.
+    """
+
+    def __init__(self, credentials_file='credentials.json', token_file='token.json', api_endpoint=None):
         self.credentials_file = credentials_file
         self.token_file = token_file
-        self.service = None
+        self.api_endpoint = api_endpoint
+        self._credentials = None
+        self._credentials_lock = threading.Lock()
+        self._service = None
+        self._service_lock = threading.Lock()
+        self._local = threading.local()
+
+    @property
+    def service(self):
+        """The shared Drive v3 service, built on first use."""
+        with self._service_lock:
+            if self._service is None:
+                self._service = self._build_service()
+            return self._service
+
+    def _build_service(self):
+        from googleapiclient.discovery import build
+        from googleapiclient.http import HttpRequest
+
+        def request_builder(http, *args, **kwargs):
+            # Ignore the service's transport and use the calling thread's
+            return HttpRequest(self.http(), *args, **kwargs)
+
+        # A local stand-in endpoint needs no OAuth
+        client_options = {'api_endpoint': self.api_endpoint} if self.api_endpoint else None
+        return build('drive', 'v3', http=self.http(), requestBuilder=request_builder,
+                     client_options=client_options, static_discovery=True)
+
+    def http(self):
+        """Return this thread's transport, refreshing the credentials if they expire soon."""
+        import httplib2
+
+        http = getattr(self._local, 'http', None)
+        if http is None:
+            http = httplib2.Http(timeout=HTTP_TIMEOUT)
+            if not self.api_endpoint:
+                import google_auth_httplib2
+                http = google_auth_httplib2.AuthorizedHttp(self.credentials(), http=http)
+            self._local.http = http
+        elif not self.api_endpoint:
+            self.credentials()
+        return http
+
+    def credentials(self):
+        """Return the shared credentials, refreshing them ahead of expiry."""
+        with self._credentials_lock:
+            if self._credentials is None:
+                self._credentials = self._load_credentials()
+            elif self._expires_soon(self._credentials):
+                self._refresh(self._credentials)
+            return self._credentials
+
+    def _expires_soon(self, creds):
+        if not creds.expiry:
+            return False
+        # google-auth keeps expiry as a naive UTC datetime
+        return creds.expiry - datetime.utcnow() < timedelta(seconds=TOKEN_REFRESH_MARGIN)
+
+    def _refresh(self, creds):
+        from google.auth.transport.requests import Request
+        
+        creds.refresh(Request())
+        self._save_credentials(creds)
+
+    def _save_credentials(self, creds):
+        # Save the credentials for the next run
+        with open(self.token_file, 'w') as token:
+            token.write(creds.to_json())
+
+    def _load_credentials(self):
+        from google.oauth2.credentials import Credentials
+        from google_auth_oauthlib.flow import InstalledAppFlow
         
-    def authenticate(self):
-        """Authenticate and build the Google Drive service."""
         creds = None
         
         # The file token.json stores the user's access and refresh tokens.
@@ -26,26 +214,72 @@ class GoogleDriveService:
             creds = Credentials.from_authorized_user_file(self.token_file, SCOPES)
         
         # If there are no (valid) credentials available, let the user log in.
-        if not creds or not creds.valid:
-            if creds and creds.expired and creds.refresh_token:
-                creds.refresh(Request())
-            else:
-                if not os.path.exists(self.credentials_file):
-                    raise FileNotFoundError(f"Credentials file {self.credentials_file} not found. Please download it from Google Cloud Console.")
-                
-                flow = InstalledAppFlow.from_client_secrets_file(
-                    self.credentials_file, SCOPES)
-                creds = flow.run_local_server(port=0)
+        if creds and creds.refresh_token and (not creds.valid or self._expires_soon(creds)):
+            self._refresh(creds)
+        elif not creds or not creds.valid:
+            if not os.path.exists(self.credentials_file):
+                raise FileNotFoundError(f"Credentials file {self.credentials_file} not found. Please download it from Google Cloud Console.")
             
-            # Save the credentials for the next run
-            with open(self.token_file, 'w') as token:
-                token.write(creds.to_json())
+            flow = InstalledAppFlow.from_client_secrets_file(
+                self.credentials_file, SCOPES)
+            creds = flow.run_local_server(port=0)
+            self._save_credentials(creds)
+        
+        return creds
+
+
+_client_managers = {}
+_client_managers_lock = threading.Lock()
+
+
+def get_drive_client_manager(credentials_file='credentials.json', token_file='token.json', api_endpoint=None):
+    """Return the process-wide client manager for a set of credentials, creating it on first use."""
+    key = (os.path.abspath(credentials_file), os.path.abspath(token_file), api_endpoint)
+    with _client_managers_lock:
+        if key not in _client_managers:
+            _client_managers[key] = DriveClientManager(credentials_file, token_file, api_endpoint)
+        return _client_managers[key]
+
+
+class GoogleDriveService:
+    """Google Drive operations for the app.
+
+    Every API call goes through the shared DriveRequestScheduler, which
+    keeps the process within the project quota, shares it fairly between
+    users (``user_key``) and retries rate-limited calls with backoff.
+    """
+
+    def __init__(self, credentials_file='credentials.json', token_file='token.json', api_endpoint=None,
+                 user_key=None, scheduler=None):
+        self.credentials_file = credentials_file
+        self.token_file = token_file
+        self.api_endpoint = api_endpoint or DRIVE_API_ENDPOINT
+        self.user_key = user_key
+        self.scheduler = scheduler or get_drive_request_scheduler()
+        self.service = None
         
-        self.service = build('drive', 'v3', credentials=creds)
+    def authenticate(self):
+        """Get the shared, authenticated Google Drive service.
+
+        Credentials and the built service are cached process-wide by
+        DriveClientManager, so this is cheap after the first call.
+        """
+        manager = get_drive_client_manager(self.credentials_file, self.token_file, self.api_endpoint)
+        self.service = manager.service
         return self.service
     
+    def _execute(self, request, tokens=1):
+        """Execute an API request through the rate limiter, retrying rate-limited calls."""
+        return self.scheduler.execute(request.execute, self.user_key, tokens)
+    
     def list_files(self, folder_id=None, mime_type='application/pdf', days_back=7):
-        """List files in Google Drive, optionally filtered by folder and date."""
+        """List files in Google Drive, optionally filtered by folder and date.
+
+        This is a generator: it follows ``nextPageToken`` and yields each
+        file as soon as its page arrives, so callers can start downloading
+        while later pages are still being fetched. API errors propagate
+        after the files already yielded, so a listing is never silently cut short.
+        """
         if not self.service:
             self.authenticate()
         
@@ -60,47 +294,115 @@ class GoogleDriveService:
         
         query = ' and '.join(query_parts)
         
+        page_token = None
         try:
-            results = self.service.files().list(
-                q=query,
-                pageSize=100,
-                fields="nextPageToken, files(id, name, createdTime, webViewLink, size)"
-            ).execute()
-            
-            items = results.get('files', [])
-            return items
+            while True:
+                results = self._execute(self.service.files().list(
+                    q=query,
+                    pageSize=LIST_PAGE_SIZE,
+                    pageToken=page_token,
+                    fields=LIST_FIELDS
+                ))
+                
+                yield from results.get('files', [])
+                
+                page_token = results.get('nextPageToken')
+                if not page_token:
+                    break
         except Exception as e:
             print(f"Error listing files: {e}")
-            return []
+            raise
     
-    def download_file(self, file_id, local_path):
-        """Download a file from Google Drive."""
+    def get_start_page_token(self):
+        """Return the changes cursor for the current state of the Drive."""
+        if not self.service:
+            self.authenticate()
+        
+        return self._execute(self.service.changes().getStartPageToken())['startPageToken']
+    
+    def list_changes(self, page_token):
+        """Return a DriveChangeFeed of everything changed since ``page_token``.
+
+        Changes include new, modified, trashed and removed files. API errors
+        propagate so the caller can keep its cursor.
+        """
+        if not self.service:
+            self.authenticate()
+        
+        return DriveChangeFeed(self.service, page_token, execute=self._execute)
+    
+    def watch_changes(self, page_token, channel_id, address, token=None, expiration=None):
+        """Open a push notification channel for changes since ``page_token``.
+
+        Drive POSTs to ``address`` whenever something changes. ``expiration``
+        is a datetime; Drive may shorten it. Returns the channel resource,
+        with ``resourceId`` and ``expiration`` in milliseconds. Errors propagate.
+        """
         if not self.service:
             self.authenticate()
         
+        body = {'id': channel_id, 'type': 'web_hook', 'address': address}
+        if token:
+            body['token'] = token
+        if expiration:
+            body['expiration'] = str(int(expiration.replace(tzinfo=timezone.utc).timestamp() * 1000))
+        return self._execute(self.service.changes().watch(pageToken=page_token, body=body))
+    
+    def stop_channel(self, channel_id, resource_id):
+        """Stop a push notification channel. Errors propagate."""
+        if not self.service:
+            self.authenticate()
+        
+        self._execute(self.service.channels().stop(body={'id': channel_id, 'resourceId': resource_id}))
+    
+    def download_file(self, file_id, local_path):
+        """Download a file from Google Drive, streaming it straight to ``local_path``."""
         try:
-            request = self.service.files().get_media(fileId=file_id)
-            fh = io.BytesIO()
-            downloader = MediaIoBaseDownload(fh, request)
-            
-            done = False
-            while done is False:
-                status, done = downloader.next_chunk()
-            
-            # Write to local file
             with open(local_path, 'wb') as f:
-                f.write(fh.getvalue())
-            
+                self._download_into(file_id, f)
             return True
         except Exception as e:
             print(f"Error downloading file: {e}")
             return False
     
+    def download_to_spool(self, file_id, max_memory=None):
+        """Download a file into a SpooledDownload.
+
+        Small files stay in memory; larger ones spill to a temporary file.
+        Returns None if the download failed. Use the result as a context
+        manager so its buffer is always released.
+        """
+        download = SpooledDownload(max_memory)
+        try:
+            self._download_into(file_id, download)
+            return download
+        except Exception as e:
+            download.close()
+            print(f"Error downloading file: {e}")
+            return None
+    
+    def _download_into(self, file_id, fh):
+        """Stream a file's content into ``fh`` in DOWNLOAD_CHUNK_SIZE requests."""
+        if not self.service:
+            self.authenticate()
+        
+        from googleapiclient.http import MediaIoBaseDownload
+        
+        request = self.service.files().get_media(fileId=file_id)
+        downloader = MediaIoBaseDownload(fh, request, chunksize=DOWNLOAD_CHUNK_SIZE)
+        
+        done = False
+        while done is False:
+            # A failed chunk leaves the downloader's progress unchanged, so it can be retried
+            status, done = self.scheduler.execute(downloader.next_chunk, self.user_key)
+    
     def upload_file(self, local_path, drive_filename, folder_id=None):
         """Upload a file to Google Drive."""
         if not self.service:
             self.authenticate()
         
+        from googleapiclient.http import MediaFileUpload
+        
         try:
             file_metadata = {'name': drive_filename}
             
@@ -109,27 +411,95 @@ class GoogleDriveService:
             
             media = MediaFileUpload(local_path, resumable=True)
             
-            file = self.service.files().create(
+            file = self._execute(self.service.files().create(
                 body=file_metadata,
                 media_body=media,
-                fields='id,webViewLink'
-            ).execute()
+                fields='id,webViewLink,md5Checksum'
+            ))
             
             return file
         except Exception as e:
             print(f"Error uploading file: {e}")
             return None
     
+    def get_files_info(self, file_ids, fields=FILE_INFO_FIELDS):
+        """Get metadata for many files with Drive's multipart batch endpoint.
+
+        Sends up to BATCH_SIZE sub-requests per HTTP call. Each sub-request
+        counts against the quota, so a batch takes one rate-limit token per
+        file, and sub-requests that were rate limited are sent again in a
+        smaller batch after a backoff. Returns ``(files, errors)``: metadata
+        keyed by file ID for the files that were found, and
+        ``{'code': ..., 'message': ...}`` keyed by file ID for those that
+        failed, individually or with their whole batch.
+        """
+        if not self.service:
+            self.authenticate()
+        
+        from googleapiclient.http import BatchHttpRequest
+        
+        files = {}
+        errors = {}
+        failures = {}
+        
+        def collect(request_id, response, exception):
+            if exception is None:
+                files[request_id] = response
+            else:
+                failures[request_id] = exception
+        
+        unique_ids = list(dict.fromkeys(file_ids))
+        for start in range(0, len(unique_ids), BATCH_SIZE):
+            pending = unique_ids[start:start + BATCH_SIZE]
+            attempt = 0
+            while pending:
+                batch = BatchHttpRequest(callback=collect, batch_uri=self._batch_uri())
+                for file_id in pending:
+                    batch.add(self.service.files().get(fileId=file_id, fields=fields), request_id=file_id)
+                try:
+                    self._execute(batch, tokens=len(pending))
+                except Exception as e:
+                    print(f"Error getting file info batch: {e}")
+                    for file_id in pending:
+                        if file_id not in files and file_id not in failures:
+                            errors[file_id] = {'code': getattr(e, 'status_code', None), 'message': str(e)}
+                
+                retry = []
+                delay = None
+                for file_id in pending:
+                    exception = failures.pop(file_id, None)
+                    if exception is None:
+                        continue
+                    delay = self.scheduler.retry_delay(attempt, exception)
+                    if delay is None:
+                        errors[file_id] = {
+                            'code': getattr(exception, 'status_code', None),
+                            'message': getattr(exception, 'reason', None) or str(exception)
+                        }
+                    else:
+                        retry.append(file_id)
+                if retry:
+                    self.scheduler.sleep(delay)
+                pending = retry
+                attempt += 1
+        
+        return files, errors
+    
+    def _batch_uri(self):
+        if self.api_endpoint:
+            return self.api_endpoint.rstrip('/') + '/batch/drive/v3'
+        return BATCH_URI
+    
     def get_file_info(self, file_id):
         """Get detailed information about a file."""
         if not self.service:
             self.authenticate()
         
         try:
-            file = self.service.files().get(
+            file = self._execute(self.service.files().get(
                 fileId=file_id,
-                fields='id,name,createdTime,modifiedTime,webViewLink,size,mimeType'
-            ).execute()
+                fields=FILE_INFO_FIELDS
+            ))
             return file
         except Exception as e:
             print(f"Error getting file info: {e}")
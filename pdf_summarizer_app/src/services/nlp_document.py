@@ -0,0 +1,138 @@
+import re
+from functools import cached_property, lru_cache
+from sumy.models.dom import ObjectDocumentModel, Paragraph, Sentence
+from sumy.nlp.stemmers import Stemmer
+from sumy.nlp.tokenizers import Tokenizer
+from sumy.utils import get_stop_words
+
+
+# NLTK data used by the tokenizers; installed by provision_nltk_data()
+NLTK_RESOURCES = {
+    'punkt': 'tokenizers/punkt',
+    'punkt_tab': 'tokenizers/punkt_tab',
+    'stopwords': 'corpora/stopwords'
+}
+
+
+def provision_nltk_data(download=True):
+    """Check for the NLTK data the summarizers use, downloading anything missing.
+
+    This is an explicit deployment step (``flask --app src.main provision-nltk``)
+    so that importing the app never touches the network. Returns a dict of
+    resource name -> whether it is available.
+    """
+    import nltk
+
+    available = {}
+    for name, path in NLTK_RESOURCES.items():
+        try:
+            nltk.data.find(path)
+            available[name] = True
+        except LookupError:
+            available[name] = bool(download and nltk.download(name, quiet=True))
+    get_tokenizer.cache_clear()
+    return available
+
+
+class RegexTokenizer:
+    """Punctuation-based tokenizer used when the NLTK punkt models are not installed."""
+    _SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?])\s+')
+    _WORD = re.compile(r"[^\W\d_](?:[^\W\d_]|['-])*")
+
+    def __init__(self, language):
+        self.language = language
+
+    def to_sentences(self, paragraph):
+        return tuple(s.strip() for s in self._SENTENCE_BOUNDARY.split(paragraph) if s.strip())
+
+    def to_words(self, sentence):
+        return tuple(self._WORD.findall(sentence))
+
+
+@lru_cache(maxsize=None)
+def get_tokenizer(language='english'):
+    """Return a shared sentence/word tokenizer for a language.
+
+    Falls back to a regex tokenizer when the punkt models are missing; run
+    the NLTK provisioning step to get the more accurate punkt tokenizer.
+    """
+    try:
+        tokenizer = Tokenizer(language)
+        tokenizer.to_words("Probe sentence.")
+        return tokenizer
+    except LookupError as e:
+        print(f"NLTK tokenizer data unavailable for {language}, using regex tokenizer: {e}")
+        return RegexTokenizer(language)
+
+
+@lru_cache(maxsize=None)
+def get_stemmer(language='english'):
+    """Return a shared stemmer for a language."""
+    return Stemmer(language)
+
+
+@lru_cache(maxsize=None)
+def get_stop_words_set(language='english'):
+    """Return the stop words for a language as a frozenset."""
+    return frozenset(get_stop_words(language))
+
+
+class _TokenizedSentence(Sentence):
+    """sumy sentence whose words were already tokenized by ParsedDocument."""
+    __slots__ = ('_words',)
+
+    def __init__(self, text, words, tokenizer):
+        super().__init__(text, tokenizer)
+        self._words = words
+
+    @property
+    def words(self):
+        return self._words
+
+
+class ParsedDocument:
+    """Text of one PDF, tokenized once and shared by every NLP stage.
+
+    Holds the sentences, the words of each sentence, their lowercase stems
+    and a stop word mask per sentence. Derived views (lines for title
+    detection, key message fragments, the sumy document model) are built
+    lazily from the same data.
+    """
+
+    def __init__(self, text, language='english'):
+        self.text = text
+        self.language = language
+        self.tokenizer = get_tokenizer(language)
+
+        self.sentences = self.tokenizer.to_sentences(text) if text else ()
+        self.words = [self.tokenizer.to_words(sentence) for sentence in self.sentences]
+
+        stemmer = get_stemmer(language)
+        stop_words = get_stop_words_set(language)
+        stem_cache = {}
+        self.stems = []
+        self.stopword_masks = []
+        for words in self.words:
+            lowered = [word.lower() for word in words]
+            for word in lowered:
+                if word not in stem_cache:
+                    stem_cache[word] = stemmer(word)
+            self.stems.append(tuple(stem_cache[word] for word in lowered))
+            self.stopword_masks.append(tuple(word in stop_words for word in lowered))
+
+    @cached_property
+    def lines(self):
+        return self.text.split('\n')
+
+    @cached_property
+    def key_message_sentences(self):
+        """Punctuation-delimited fragments scored by extract_key_messages."""
+        fragments = (s.strip() for s in re.split(r'[.!?]+', self.text))
+        return [s for s in fragments if len(s) > 20]
+
+    @cached_property
+    def sumy_document(self):
+        """sumy document model built from the already tokenized sentences."""
+        sentences = [_TokenizedSentence(sentence, words, self.tokenizer)
+                     for sentence, words in zip(self.sentences, self.words)]
+        return ObjectDocumentModel([Paragraph(sentences)])
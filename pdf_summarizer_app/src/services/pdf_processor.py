@@ -1,48 +1,323 @@
-import pdfplumber
 import re
-from sumy.parsers.plaintext import PlaintextParser
-from sumy.nlp.tokenizers import Tokenizer
-from sumy.summarizers.lsa import LsaSummarizer
-from sumy.summarizers.lex_rank import LexRankSummarizer
-from sumy.summarizers.text_rank import TextRankSummarizer
-import nltk
+import heapq
+import importlib
+import io
 import os
+from concurrent.futures import ProcessPoolExecutor
+from src.services.boilerplate import STRIP_BOILERPLATE, strip_repeated_lines
+from src.services.pdf_triage import DECISION_DEFER, DECISION_REJECT, triage_pdf
+from src.services.summary_cache import file_sha256, get_summary_cache
 
-# Download required NLTK data
-try:
-    nltk.data.find('tokenizers/punkt')
-except LookupError:
-    nltk.download('punkt')
+# pdfplumber, pypdfium2, sumy/NLTK and NumPy are imported on first use so that
+# importing this module stays cheap. NLTK data is installed by the explicit
+# provisioning step (flask provision-nltk), never at import time.
+
+# Parallel extraction settings - documents below the page threshold are read serially
+PARALLEL_MIN_PAGES = int(os.getenv('PDF_PARALLEL_MIN_PAGES', '40'))
+EXTRACTION_WORKERS = int(os.getenv('PDF_EXTRACTION_WORKERS', str(os.cpu_count() or 1)))
+MIN_PAGES_PER_CHUNK = 8
+
+# Extraction engine used when none is requested: 'auto', 'pdfium' or 'pdfplumber'
+DEFAULT_EXTRACTION_ENGINE = os.getenv('PDF_EXTRACTION_ENGINE', 'auto')
+
+# Extraction budget - reading stops once either limit is reached (0 disables a limit)
+MAX_TEXT_CHARS = int(os.getenv('PDF_MAX_TEXT_CHARS', '2000000'))
+MAX_TEXT_PAGES = int(os.getenv('PDF_MAX_TEXT_PAGES', '0'))
+
+# Hierarchical summarization - documents above the threshold (in sentences) are
+# split into sections of SUMMARY_CHUNK_SIZE sentences that are summarized separately
+SUMMARY_CHUNK_THRESHOLD = int(os.getenv('SUMMARY_CHUNK_THRESHOLD', '600'))
+SUMMARY_CHUNK_SIZE = int(os.getenv('SUMMARY_CHUNK_SIZE', '200'))
+SECTION_SUMMARY_SENTENCES = int(os.getenv('SUMMARY_SECTION_SENTENCES', '5'))
+
+# Summaries precomputed for every document so the UI can switch views for free
+BUNDLE_METHODS = os.getenv('SUMMARY_BUNDLE_METHODS', 'lsa_native,lexrank_native,textrank_native').split(',')
+BUNDLE_SENTENCE_COUNTS = [int(count) for count in os.getenv('SUMMARY_BUNDLE_COUNTS', '3,5,10').split(',')]
+
+SUMMARY_FAILED = "Unable to generate summary."
+
+# Words that suggest a sentence carries a key message
+IMPORTANT_KEYWORDS = (
+    'important', 'key', 'main', 'primary', 'essential', 'critical',
+    'significant', 'major', 'conclusion', 'result', 'finding',
+    'recommendation', 'summary', 'overview', 'objective', 'goal'
+)
+# A lookahead finds keywords at every offset, so overlapping matches are counted
+# just like substring tests. No keyword is a prefix of another.
+KEY_MESSAGE_PATTERN = re.compile('(?=(' + '|'.join(map(re.escape, IMPORTANT_KEYWORDS)) + '))')
+
+
+def _open_source(pdf_source):
+    """Return something the PDF libraries can open: a path, or a stream over in-memory PDF bytes."""
+    if isinstance(pdf_source, (bytes, bytearray)):
+        return io.BytesIO(pdf_source)
+    return pdf_source
+
+
+class ExtractionEngine:
+    """Base class for PDF text extraction backends.
+
+    ``pdf_path`` is a file path or the PDF bytes of a download held in memory.
+    """
+    name = None
+
+    def page_count(self, pdf_path):
+        """Return the number of pages in the document."""
+        raise NotImplementedError
+
+    def iter_pages(self, pdf_path, start=0, end=None):
+        """Yield the raw text of pages [start, end) one page at a time.
+
+        Implementations release each page's resources before moving on, so
+        only one page is held in memory at once.
+        """
+        raise NotImplementedError
+
+    def extract_pages(self, pdf_path, start, end):
+        """Return the raw text of pages [start, end), one string per page."""
+        return list(self.iter_pages(pdf_path, start, end))
+
+
+class PdfplumberEngine(ExtractionEngine):
+    """pdfminer-based extraction with full character layout analysis."""
+    name = 'pdfplumber'
+
+    def page_count(self, pdf_path):
+        import pdfplumber
+        with pdfplumber.open(_open_source(pdf_path)) as pdf:
+            return len(pdf.pages)
+
+    def iter_pages(self, pdf_path, start=0, end=None):
+        import pdfplumber
+        with pdfplumber.open(_open_source(pdf_path)) as pdf:
+            for page in pdf.pages[start:end]:
+                try:
+                    yield page.extract_text() or ""
+                finally:
+                    # Drop the cached characters/objects pdfplumber keeps per page
+                    page.close()
+
+
+class PdfiumEngine(ExtractionEngine):
+    """Native PDFium text extraction - much faster for plain text."""
+    name = 'pdfium'
+
+    def page_count(self, pdf_path):
+        import pypdfium2 as pdfium
+        pdf = pdfium.PdfDocument(pdf_path)
+        try:
+            return len(pdf)
+        finally:
+            pdf.close()
+
+    def iter_pages(self, pdf_path, start=0, end=None):
+        import pypdfium2 as pdfium
+        pdf = pdfium.PdfDocument(pdf_path)
+        try:
+            end = len(pdf) if end is None else min(end, len(pdf))
+            for index in range(start, end):
+                page = pdf[index]
+                textpage = page.get_textpage()
+                try:
+                    yield textpage.get_text_bounded() or ""
+                finally:
+                    textpage.close()
+                    page.close()
+        finally:
+            pdf.close()
+
+
+EXTRACTION_ENGINES = {
+    'pdfplumber': PdfplumberEngine(),
+    'pdfium': PdfiumEngine()
+}
+
+
+# sumy summarizers by method name, as (module, class) so they are imported on first use
+SUMMARIZER_CLASSES = {
+    'lsa': ('sumy.summarizers.lsa', 'LsaSummarizer'),
+    'lexrank': ('sumy.summarizers.lex_rank', 'LexRankSummarizer'),
+    'textrank': ('sumy.summarizers.text_rank', 'TextRankSummarizer')
+}
+
+# Every method accepted by generate_summary; the *_native rankers live in text_ranking
+SUMMARY_METHODS = tuple(SUMMARIZER_CLASSES) + ('lsa_native', 'lexrank_native', 'textrank_native')
+
+
+def _create_summarizer(method):
+    """Instantiate the sumy summarizer for a method, defaulting to LSA."""
+    module_name, class_name = SUMMARIZER_CLASSES.get(method, SUMMARIZER_CLASSES['lsa'])
+    return getattr(importlib.import_module(module_name), class_name)()
+
+
+def _summarize_section(section_text, sentences_count, method='lsa'):
+    """Summarize one section of a long document, returning its best sentences.
+
+    Runs inside worker processes, so it must stay a module-level function.
+    """
+    from src.services.nlp_document import ParsedDocument
+    document = ParsedDocument(section_text)
+    summarizer = _create_summarizer(method)
+    return [str(sentence) for sentence in summarizer(document.sumy_document, sentences_count)]
+
+
+def _extract_page_range(pdf_path, start, end, engine_name='pdfplumber'):
+    """Extract the text of pages [start, end) using a dedicated document handle.
+
+    Runs inside worker processes, so it must stay a module-level function.
+    """
+    return EXTRACTION_ENGINES[engine_name].extract_pages(pdf_path, start, end)
 
-try:
-    nltk.data.find('corpora/stopwords')
-except LookupError:
-    nltk.download('stopwords')
 
 class PDFProcessor:
-    def __init__(self):
-        self.summarizers = {
-            'lsa': LsaSummarizer(),
-            'lexrank': LexRankSummarizer(),
-            'textrank': TextRankSummarizer()
-        }
+    def __init__(self, parallel_min_pages=None, max_workers=None, engine=None,
+                 max_chars=None, max_pages=None, cache=None, chunk_threshold=None, chunk_size=None,
+                 strip_boilerplate=None):
+        self._summarizers = None
+        self.parallel_min_pages = PARALLEL_MIN_PAGES if parallel_min_pages is None else parallel_min_pages
+        self.max_workers = EXTRACTION_WORKERS if max_workers is None else max_workers
+        self.engine = engine or DEFAULT_EXTRACTION_ENGINE
+        self.max_chars = MAX_TEXT_CHARS if max_chars is None else max_chars
+        self.max_pages = MAX_TEXT_PAGES if max_pages is None else max_pages
+        self.chunk_threshold = SUMMARY_CHUNK_THRESHOLD if chunk_threshold is None else chunk_threshold
+        self.chunk_size = SUMMARY_CHUNK_SIZE if chunk_size is None else chunk_size
+        self.strip_boilerplate = STRIP_BOILERPLATE if strip_boilerplate is None else strip_boilerplate
+        # Pass cache=False to disable result caching
+        self.cache = get_summary_cache() if cache is None else cache
+    
+    @property
+    def summarizers(self):
+        """sumy summarizer instances by method name, created on first use."""
+        if self._summarizers is None:
+            self._summarizers = {method: _create_summarizer(method) for method in SUMMARIZER_CLASSES}
+        return self._summarizers
     
-    def extract_text_from_pdf(self, pdf_path):
-        """Extract text content from a PDF file."""
+    def extract_text_from_pdf(self, pdf_path, parallel=None, engine=None, layout=False,
+                              max_chars=None, max_pages=None):
+        """Extract text content from a PDF file.
+
+        ``engine`` selects the backend ('pdfium', 'pdfplumber' or 'auto');
+        it defaults to the processor's engine. The 'auto' policy reads the
+        document with pdfium and only falls back to pdfplumber when
+        ``layout`` fidelity is requested or pdfium finds no text.
+
+        Large documents are split into page ranges that are extracted in a
+        process pool. Pass ``parallel=False`` to force serial extraction.
+        ``max_chars`` and ``max_pages`` bound how much of the document is read.
+        """
         try:
-            text = ""
-            with pdfplumber.open(pdf_path) as pdf:
-                for page in pdf.pages:
-                    page_text = page.extract_text()
-                    if page_text:
-                        text += page_text + "\n"
-            
-            # Clean up the text
-            text = self._clean_text(text)
-            return text
+            return ' '.join(self.iter_page_texts(pdf_path, parallel=parallel, engine=engine, layout=layout,
+                                                 max_chars=max_chars, max_pages=max_pages))
         except Exception as e:
             print(f"Error extracting text from PDF: {e}")
             return ""
+
+    def iter_page_texts(self, pdf_path, parallel=None, engine=None, layout=False,
+                        max_chars=None, max_pages=None):
+        """Yield the cleaned text of each non-empty page, in document order.
+
+        Each page is released as soon as it has been read. Iteration stops
+        once ``max_chars`` characters or ``max_pages`` pages have been
+        produced; both default to the processor's budget and 0 means no limit.
+
+        Unless ``strip_boilerplate`` is off, lines repeated across many pages
+        (running headers, footers, page numbers, disclaimers) are dropped
+        before cleaning.
+        """
+        max_chars = self.max_chars if max_chars is None else max_chars
+        max_pages = self.max_pages if max_pages is None else max_pages
+
+        engine = engine or self.engine
+        if engine not in EXTRACTION_ENGINES:
+            engine = 'auto'
+
+        if engine == 'auto':
+            engine = 'pdfplumber' if layout else 'pdfium'
+        engines = [engine] if engine == 'pdfplumber' else [engine, 'pdfplumber']
+
+        for engine_name in engines:
+            chars_read = 0
+            pages_read = 0
+            try:
+                raw_pages = self._iter_raw_pages(pdf_path, engine_name, parallel, max_pages)
+                if self.strip_boilerplate:
+                    raw_pages = strip_repeated_lines(raw_pages)
+                for page_text in raw_pages:
+                    pages_read += 1
+                    page_text = self._clean_text(page_text)
+                    if page_text:
+                        if max_chars and chars_read + len(page_text) >= max_chars:
+                            if max_chars > chars_read:
+                                yield page_text[:max_chars - chars_read]
+                            return
+                        chars_read += len(page_text) + 1
+                        yield page_text
+                    if max_pages and pages_read >= max_pages:
+                        break
+            except Exception as e:
+                # Only fall back to the next engine if nothing has been produced yet
+                if chars_read or engine_name == engines[-1]:
+                    raise
+                print(f"Error extracting text with {engine_name}, trying {engines[-1]}: {e}")
+                continue
+            if chars_read:
+                return
+
+    def _iter_raw_pages(self, pdf_path, engine_name, parallel=None, max_pages=0):
+        """Yield raw page texts from one engine, serially or across a process pool."""
+        extraction_engine = EXTRACTION_ENGINES[engine_name]
+        page_count = extraction_engine.page_count(pdf_path)
+        if max_pages:
+            page_count = min(page_count, max_pages)
+
+        if parallel is None:
+            parallel = page_count >= self.parallel_min_pages
+        # In-memory PDFs are small; copying them to every worker is not worth it
+        parallel = parallel and self.max_workers > 1 and page_count > 1 and isinstance(pdf_path, str)
+
+        if parallel:
+            yield from self._iter_pages_parallel(pdf_path, page_count, engine_name)
+        else:
+            yield from extraction_engine.iter_pages(pdf_path, 0, page_count)
+
+    def _page_ranges(self, page_count):
+        """Split a document into contiguous page ranges, a couple per worker."""
+        chunk_size = max(MIN_PAGES_PER_CHUNK, -(-page_count // (self.max_workers * 2)))
+        return [(start, min(start + chunk_size, page_count)) for start in range(0, page_count, chunk_size)]
+
+    def _iter_pages_parallel(self, pdf_path, page_count, engine_name):
+        """Extract page ranges across a process pool, yielding pages in order."""
+        extraction_engine = EXTRACTION_ENGINES[engine_name]
+        ranges = self._page_ranges(page_count)
+        if len(ranges) == 1:
+            yield from extraction_engine.iter_pages(pdf_path, 0, page_count)
+            return
+
+        pages_done = 0
+        try:
+            executor = ProcessPoolExecutor(max_workers=min(self.max_workers, len(ranges)))
+        except (OSError, RuntimeError) as e:
+            print(f"Parallel extraction unavailable, falling back to serial: {e}")
+            yield from extraction_engine.iter_pages(pdf_path, 0, page_count)
+            return
+
+        try:
+            chunks = executor.map(_extract_page_range,
+                                  [pdf_path] * len(ranges),
+                                  [start for start, _ in ranges],
+                                  [end for _, end in ranges],
+                                  [engine_name] * len(ranges))
+            for chunk in chunks:
+                for page_text in chunk:
+                    yield page_text
+                    pages_done += 1
+        except (OSError, RuntimeError) as e:
+            # e.g. a broken pool - finish the remaining pages serially
+            print(f"Parallel extraction failed, continuing serially: {e}")
+            yield from extraction_engine.iter_pages(pdf_path, pages_done, page_count)
+        finally:
+            # Early cutoff: drop page ranges that have not started yet
+            executor.shutdown(wait=False, cancel_futures=True)
     
     def _clean_text(self, text):
         """Clean and normalize extracted text."""
@@ -55,75 +330,172 @@ class PDFProcessor:
         
         return text.strip()
     
-    def generate_summary(self, text, sentences_count=3, method='lsa'):
-        """Generate a summary of the given text."""
+    def generate_summary(self, text, sentences_count=3, method='lsa', chunked=None, document=None):
+        """Generate a summary of the given text.
+
+        ``method`` is one of the sumy summarizers ('lsa', 'lexrank',
+        'textrank') or a NumPy sparse-matrix ranker ('lsa_native',
+        'lexrank_native', 'textrank_native') that scales to very long documents.
+
+        ``document`` is an optional ParsedDocument of ``text`` so callers that
+        already tokenized the text do not pay for it again.
+
+        Documents longer than ``chunk_threshold`` sentences are summarized
+        hierarchically: fixed-size sections are summarized independently in a
+        process pool, then the concatenated section summaries are summarized
+        again. Pass ``chunked`` to force either mode.
+        """
         if not text or len(text.strip()) < 100:
             return "Text too short to summarize."
         
         try:
-            parser = PlaintextParser.from_string(text, Tokenizer("english"))
+            from src.services.nlp_document import ParsedDocument
+            from src.services.text_ranking import NATIVE_RANKERS, summarize_native
+            
+            document = document or ParsedDocument(text)
+            sentences = document.sentences
+            
+            # The NumPy rankers scale linearly and never need chunking
+            if method in NATIVE_RANKERS:
+                return ' '.join(summarize_native(document, sentences_count, method))
+            
+            if chunked is None:
+                chunked = len(sentences) > self.chunk_threshold
+            if chunked and len(sentences) > self.chunk_size:
+                return self._generate_chunked_summary(sentences, sentences_count, method)
+            
             summarizer = self.summarizers.get(method, self.summarizers['lsa'])
             
             # Generate summary
-            summary_sentences = summarizer(parser.document, sentences_count)
+            summary_sentences = summarizer(document.sumy_document, sentences_count)
             summary = ' '.join([str(sentence) for sentence in summary_sentences])
             
             return summary
         except Exception as e:
             print(f"Error generating summary: {e}")
-            return "Unable to generate summary."
+            return SUMMARY_FAILED
+
+    def generate_summaries(self, text, methods=None, sentence_counts=None, document=None):
+        """Generate several summaries of the same text at once.
+
+        The text is tokenized and vectorized a single time; each method then
+        ranks the sentences once and every requested length is read off that
+        ranking. Returns ``{method: {str(count): summary}}``, the layout
+        stored in ``PDFSummary.summary_bundle``.
+        """
+        methods = methods or BUNDLE_METHODS
+        sentence_counts = sentence_counts or BUNDLE_SENTENCE_COUNTS
+        if not text or len(text.strip()) < 100:
+            return {}
+        
+        try:
+            from src.services.nlp_document import ParsedDocument
+            from src.services.text_ranking import NATIVE_RANKERS, SentenceTermMatrix
+            
+            document = document or ParsedDocument(text)
+            matrix = SentenceTermMatrix(document)
+            
+            bundle = {}
+            for method in methods:
+                if method in NATIVE_RANKERS:
+                    scores = NATIVE_RANKERS[method](matrix)
+                    bundle[method] = {str(count): ' '.join(matrix.best_sentences(scores, count))
+                                      for count in sentence_counts}
+                elif method in SUMMARIZER_CLASSES:
+                    bundle[method] = {str(count): self.generate_summary(text, count, method, document=document)
+                                      for count in sentence_counts}
+            return bundle
+        except Exception as e:
+            print(f"Error generating summary bundle: {e}")
+            return {}
+
+    def _generate_chunked_summary(self, sentences, sentences_count, method):
+        """Map-reduce summarization: summarize sections, then summarize their summaries."""
+        sentences = list(sentences)
+        
+        # Reduce level by level until the combined section summaries fit in one pass
+        while True:
+            sections = [' '.join(sentences[start:start + self.chunk_size])
+                        for start in range(0, len(sentences), self.chunk_size)]
+            section_summaries = self._summarize_sections(sections, method)
+            reduced = [sentence for summary in section_summaries for sentence in summary]
+            if len(reduced) >= len(sentences):
+                break
+            sentences = reduced
+            if len(sentences) <= self.chunk_threshold or len(sentences) <= self.chunk_size:
+                break
+        
+        return ' '.join(_summarize_section(' '.join(sentences), sentences_count, method))
+
+    def _summarize_sections(self, sections, method):
+        """Summarize sections across a process pool, preserving section order."""
+        counts = [SECTION_SUMMARY_SENTENCES] * len(sections)
+        methods = [method] * len(sections)
+        
+        if self.max_workers > 1 and len(sections) > 1:
+            try:
+                with ProcessPoolExecutor(max_workers=min(self.max_workers, len(sections))) as executor:
+                    return list(executor.map(_summarize_section, sections, counts, methods))
+            except (OSError, RuntimeError) as e:
+                print(f"Parallel summarization unavailable, falling back to serial: {e}")
+        
+        return list(map(_summarize_section, sections, counts, methods))
     
-    def extract_key_messages(self, text, max_messages=5):
-        """Extract key messages or important points from the text."""
+    def extract_key_messages(self, text, max_messages=5, document=None):
+        """Extract key messages or important points from the text.
+
+        Sentences are scored in a single pass: one point for each distinct
+        importance keyword they contain, one for being among the first or
+        last three sentences, and one for medium length. The best
+        ``max_messages`` sentences with a positive score are returned, ties
+        broken by document order.
+        """
         if not text or len(text.strip()) < 100:
             return []
         
         try:
             # Split text into sentences
-            sentences = re.split(r'[.!?]+', text)
-            sentences = [s.strip() for s in sentences if len(s.strip()) > 20]
-            
-            # Simple heuristic: look for sentences with certain keywords that might indicate importance
-            important_keywords = [
-                'important', 'key', 'main', 'primary', 'essential', 'critical',
-                'significant', 'major', 'conclusion', 'result', 'finding',
-                'recommendation', 'summary', 'overview', 'objective', 'goal'
-            ]
-            
-            scored_sentences = []
-            for sentence in sentences:
-                score = 0
-                sentence_lower = sentence.lower()
-                
-                # Score based on keywords
-                for keyword in important_keywords:
-                    if keyword in sentence_lower:
+            if document is not None:
+                sentences = document.key_message_sentences
+            else:
+                sentences = re.split(r'[.!?]+', text)
+                sentences = [s.strip() for s in sentences if len(s.strip()) > 20]
+            sentence_count = len(sentences)
+            
+            # Duplicate sentences are scored by the position of their first occurrence
+            first_positions = {}
+            
+            def scored_sentences():
+                for position, sentence in enumerate(sentences):
+                    first_position = first_positions.setdefault(sentence, position)
+                    
+                    # Score based on keywords
+                    score = len(set(KEY_MESSAGE_PATTERN.findall(sentence.lower())))
+                    
+                    # Score based on sentence position (first and last sentences often important)
+                    if first_position < 3 or first_position >= sentence_count - 3:
                         score += 1
-                
-                # Score based on sentence position (first and last sentences often important)
-                if sentences.index(sentence) < 3 or sentences.index(sentence) >= len(sentences) - 3:
-                    score += 1
-                
-                # Score based on sentence length (medium length sentences often more informative)
-                if 50 <= len(sentence) <= 200:
-                    score += 1
-                
-                scored_sentences.append((sentence, score))
-            
-            # Sort by score and return top messages
-            scored_sentences.sort(key=lambda x: x[1], reverse=True)
-            key_messages = [sentence for sentence, score in scored_sentences[:max_messages] if score > 0]
+                    
+                    # Score based on sentence length (medium length sentences often more informative)
+                    if 50 <= len(sentence) <= 200:
+                        score += 1
+                    
+                    yield -score, position, sentence
+            
+            # Keep only the top messages instead of sorting every sentence
+            top_sentences = heapq.nsmallest(max_messages, scored_sentences())
+            key_messages = [sentence for negative_score, _, sentence in top_sentences if negative_score < 0]
             
             return key_messages
         except Exception as e:
             print(f"Error extracting key messages: {e}")
             return []
     
-    def get_document_title(self, text, filename):
+    def get_document_title(self, text, filename, document=None):
         """Extract or generate a title for the document."""
         try:
             # Try to find a title in the first few lines
-            lines = text.split('\n')[:10]
+            lines = (document.lines if document is not None else text.split('\n'))[:10]
             
             for line in lines:
                 line = line.strip()
@@ -142,41 +514,123 @@ class PDFProcessor:
             print(f"Error extracting title: {e}")
             return filename
     
-    def process_pdf(self, pdf_path, filename):
-        """Complete PDF processing: extract text, generate summary, and extract key messages."""
+    def cache_key(self, pdf_path, engine=None, method='lsa', sentences_count=3, max_messages=5):
+        """Return the summary cache key for a PDF and the settings that shape its result."""
+        return self.cache.make_key(file_sha256(pdf_path), method, {
+            'sentences_count': sentences_count,
+            'max_messages': max_messages,
+            'engine': engine or self.engine,
+            'max_chars': self.max_chars,
+            'max_pages': self.max_pages,
+            'chunk_threshold': self.chunk_threshold,
+            'chunk_size': self.chunk_size,
+            'strip_boilerplate': self.strip_boilerplate,
+            'bundle_methods': BUNDLE_METHODS,
+            'bundle_sentence_counts': BUNDLE_SENTENCE_COUNTS
+        })
+    
+    def summarize_text(self, text, filename, method='lsa', sentences_count=3, max_messages=5, bundle=True):
+        """Run the NLP stages on already extracted text.
+
+        Returns the title, summary, key messages and (unless ``bundle`` is
+        False) the summary bundle, in the same layout as ``process_pdf``.
+        Used to re-summarize stored text without touching the PDF again.
+        """
+        # Tokenize once for every NLP stage
+        from src.services.nlp_document import ParsedDocument
+        document = ParsedDocument(text)
+        
+        # Generate title
+        title = self.get_document_title(text, filename, document=document)
+        
+        # Generate summary
+        summary = self.generate_summary(text, sentences_count=sentences_count, method=method, document=document)
+        
+        # Extract key messages
+        key_messages = self.extract_key_messages(text, max_messages=max_messages, document=document)
+        
+        # Alternative summaries for the UI, from the same parsed document
+        summary_bundle = self.generate_summaries(text, document=document) if bundle else {}
+        
+        return {
+            'title': title,
+            'text': text,
+            'summary': summary,
+            'key_messages': key_messages,
+            'summary_bundle': summary_bundle
+        }
+    
+    def process_pdf(self, pdf_path, filename, engine=None, method='lsa', sentences_count=3,
+                    max_messages=5, use_cache=True, defer_large=False):
+        """Complete PDF processing: extract text, generate summary, and extract key messages.
+
+        Results are cached by the SHA-256 of the file plus the summarizer
+        settings, so a PDF seen before skips extraction and NLP entirely.
+        New files are triaged first: password protected and image-only PDFs
+        are rejected without extraction, and with ``defer_large`` very long
+        documents are returned unprocessed for the scheduled scan to pick up.
+        The triage facts are returned under ``triage``.
+
+        ``pdf_path`` is a file path or the bytes of a PDF held in memory.
+        """
         try:
-            # Extract text
-            text = self.extract_text_from_pdf(pdf_path)
+            cache = self.cache if use_cache else None
+            key = None
+            if cache:
+                key = self.cache_key(pdf_path, engine, method, sentences_count, max_messages)
+                cached = cache.get(key)
+                if cached:
+                    # The title may fall back to the filename, which differs between uploads
+                    cached['title'] = self.get_document_title(cached['text'], filename)
+                    return cached
+
+            # Triage before committing to a full extraction
+            triage = triage_pdf(pdf_path)
+            if triage['decision'] == DECISION_REJECT or (defer_large and triage['decision'] == DECISION_DEFER):
+                return {
+                    'title': filename,
+                    'text': '',
+                    'summary': triage['reason'],
+                    'key_messages': [],
+                    'summary_bundle': {},
+                    'triage': triage
+                }
+
+            # Extract text, following the triage strategy unless an engine was requested
+            strategy = triage['strategy']
+            if not engine and self.engine == 'auto':
+                engine = strategy['engine']
+            max_pages = self.max_pages
+            if strategy['max_pages']:
+                max_pages = min(max_pages or strategy['max_pages'], strategy['max_pages'])
+            text = self.extract_text_from_pdf(pdf_path, engine=engine, max_pages=max_pages)
             
             if not text:
                 return {
                     'title': filename,
                     'text': '',
                     'summary': 'Unable to extract text from PDF.',
-                    'key_messages': []
+                    'key_messages': [],
+                    'summary_bundle': {},
+                    'triage': triage
                 }
             
-            # Generate title
-            title = self.get_document_title(text, filename)
-            
-            # Generate summary
-            summary = self.generate_summary(text, sentences_count=3)
+            result = self.summarize_text(text, filename, method=method, sentences_count=sentences_count,
+                                         max_messages=max_messages)
+            result['triage'] = triage
             
-            # Extract key messages
-            key_messages = self.extract_key_messages(text, max_messages=5)
+            if cache and result['summary'] != SUMMARY_FAILED:
+                cache.set(key, result)
             
-            return {
-                'title': title,
-                'text': text,
-                'summary': summary,
-                'key_messages': key_messages
-            }
+            return result
         except Exception as e:
             print(f"Error processing PDF: {e}")
             return {
                 'title': filename,
                 'text': '',
                 'summary': f'Error processing PDF: {str(e)}',
-                'key_messages': []
+                'key_messages': [],
+                'summary_bundle': {},
+                'triage': {}
             }
 
@@ -0,0 +1,110 @@
+import os
+import time
+
+# Triage policy - these can be overridden with environment variables
+# Pages whose text layer is sampled; at least 2 (the first and last page)
+TRIAGE_SAMPLE_PAGES = int(os.getenv('TRIAGE_SAMPLE_PAGES', '5'))
+# Minimum characters across the sampled pages for a document to count as having text
+TRIAGE_MIN_SAMPLE_CHARS = int(os.getenv('TRIAGE_MIN_SAMPLE_CHARS', '20'))
+# Documents with more pages are left to the scheduled background scan
+TRIAGE_DEFER_PAGES = int(os.getenv('TRIAGE_DEFER_PAGES', '500'))
+# Documents with more pages are only read up to this many pages
+TRIAGE_MAX_PAGES = int(os.getenv('TRIAGE_MAX_PAGES', '2000'))
+
+DECISION_PROCESS = 'process'
+DECISION_DEFER = 'defer'
+DECISION_REJECT = 'reject'
+
+
+def _sample_page_indexes(page_count, sample_size):
+    """Spread the sampled pages over the start, middle and end of the document.
+
+    At least the first and last pages are sampled, whatever ``sample_size`` is.
+    """
+    sample_size = max(2, sample_size)
+    if page_count <= sample_size:
+        return list(range(page_count))
+    step = (page_count - 1) / (sample_size - 1)
+    return sorted({round(i * step) for i in range(sample_size)})
+
+
+def triage_pdf(pdf_path):
+    """Inspect a PDF cheaply before committing to a full extraction.
+
+    Only the trailer, cross-reference table and page tree are parsed, plus
+    the text layer of a few sampled pages, so this takes milliseconds even
+    for very large files. Returns a dict with the document facts (page
+    count, encryption, producer, text presence), a ``decision`` of
+    'process', 'defer' or 'reject' with its ``reason``, and the extraction
+    ``strategy`` to use when processing. ``pdf_path`` may also be the PDF bytes.
+    """
+    import pypdfium2 as pdfium
+    import pypdfium2.raw as pdfium_c
+
+    started = time.perf_counter()
+    triage = {
+        'file_size': len(pdf_path) if isinstance(pdf_path, (bytes, bytearray)) else os.path.getsize(pdf_path),
+        'page_count': 0,
+        'encrypted': False,
+        'password_protected': False,
+        'producer': None,
+        'sampled_pages': 0,
+        'sampled_text_pages': 0,
+        'sampled_chars': 0,
+        'has_text': False,
+        'decision': DECISION_PROCESS,
+        'reason': None,
+        'strategy': {}
+    }
+
+    try:
+        pdf = pdfium.PdfDocument(pdf_path)
+    except pdfium.PdfiumError as e:
+        triage['password_protected'] = 'password' in str(e).lower()
+        triage['encrypted'] = triage['password_protected']
+        triage['decision'] = DECISION_REJECT
+        triage['reason'] = ('PDF is password protected.' if triage['password_protected']
+                            else f'PDF could not be opened: {e}')
+        triage['elapsed_ms'] = round((time.perf_counter() - started) * 1000, 2)
+        return triage
+
+    try:
+        triage['page_count'] = len(pdf)
+        triage['encrypted'] = pdfium_c.FPDF_GetSecurityHandlerRevision(pdf) != -1
+        triage['producer'] = pdf.get_metadata_dict().get('Producer') or None
+
+        for index in _sample_page_indexes(triage['page_count'], TRIAGE_SAMPLE_PAGES):
+            page = pdf[index]
+            textpage = page.get_textpage()
+            try:
+                chars = textpage.count_chars()
+            finally:
+                textpage.close()
+                page.close()
+            triage['sampled_pages'] += 1
+            triage['sampled_chars'] += max(chars, 0)
+            if chars > 0:
+                triage['sampled_text_pages'] += 1
+    finally:
+        pdf.close()
+
+    triage['has_text'] = triage['sampled_chars'] >= TRIAGE_MIN_SAMPLE_CHARS
+
+    if triage['page_count'] == 0:
+        triage['decision'] = DECISION_REJECT
+        triage['reason'] = 'PDF has no pages.'
+    elif not triage['has_text']:
+        triage['decision'] = DECISION_REJECT
+        triage['reason'] = 'PDF appears to be a scanned image without a text layer.'
+    elif triage['page_count'] > TRIAGE_DEFER_PAGES:
+        triage['decision'] = DECISION_DEFER
+        triage['reason'] = f"PDF has {triage['page_count']} pages; it is processed by the scheduled scan."
+
+    # Every page sampled had text, so the fast engine is enough; mixed documents get the fallback policy
+    engine = 'pdfium' if triage['sampled_text_pages'] == triage['sampled_pages'] else 'auto'
+    triage['strategy'] = {
+        'engine': engine,
+        'max_pages': TRIAGE_MAX_PAGES if triage['page_count'] > TRIAGE_MAX_PAGES else None
+    }
+    triage['elapsed_ms'] = round((time.perf_counter() - started) * 1000, 2)
+    return triage
@@ -0,0 +1,127 @@
+import atexit
+import logging
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# Pool configuration - 0 workers processes jobs inline on the calling thread
+POOL_WORKERS = int(os.getenv('PROCESSING_POOL_WORKERS', str(max(1, (os.cpu_count() or 2) - 1))))
+# Workers are replaced after this many jobs to reclaim memory leaked by pdfminer
+POOL_MAX_TASKS_PER_WORKER = int(os.getenv('PROCESSING_POOL_MAX_TASKS_PER_WORKER', '50'))
+# Processes a worker may start for one large document (page-range extraction, section
+# summaries); unset uses PDF_EXTRACTION_WORKERS, 1 keeps every document on one core
+_document_workers = os.getenv('PROCESSING_POOL_DOCUMENT_WORKERS')
+POOL_DOCUMENT_WORKERS = int(_document_workers) if _document_workers else None
+
+# The PDFProcessor owned by the current worker process
+_worker_processor = None
+
+
+def _warm_worker(document_workers=None):
+    """Import the PDF/NLP stack once per worker and build its processor.
+
+    Most documents are processed serially, and parallelism comes from
+    running several at once. Documents long enough for PDFProcessor's
+    page-range extraction or section summaries still spread over up to
+    ``document_workers`` processes of their own.
+    """
+    global _worker_processor
+    from src.services.pdf_processor import PDFProcessor
+    _worker_processor = PDFProcessor(max_workers=document_workers)
+
+
+def _process_pdf_job(pdf_path, filename, options):
+    """Run one processing job inside a warm worker."""
+    if _worker_processor is None:
+        _warm_worker()
+    return _worker_processor.process_pdf(pdf_path, filename, **options)
+
+
+def _summarize_text_job(text, filename, options):
+    """Re-run the NLP stages on stored text inside a warm worker."""
+    if _worker_processor is None:
+        _warm_worker()
+    return _worker_processor.summarize_text(text, filename, **options)
+
+
+class ProcessingPool:
+    """Long-lived pool of warm worker processes that run PDFProcessor.process_pdf.
+
+    Jobs are submitted with ``submit`` and return a Future resolving to the
+    usual ``process_pdf`` result dict. Workers are started on first use and
+    recycled after ``max_tasks_per_worker`` jobs. ``document_workers`` is
+    the ``max_workers`` each worker's PDFProcessor uses for one large document.
+    """
+
+    def __init__(self, max_workers=None, max_tasks_per_worker=None, document_workers=None):
+        self.max_workers = POOL_WORKERS if max_workers is None else max_workers
+        self.max_tasks_per_worker = POOL_MAX_TASKS_PER_WORKER if max_tasks_per_worker is None else max_tasks_per_worker
+        self.document_workers = POOL_DOCUMENT_WORKERS if document_workers is None else document_workers
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    initializer=_warm_worker,
+                    initargs=(self.document_workers,),
+                    max_tasks_per_child=self.max_tasks_per_worker or None
+                )
+                logger.info(f"Started processing pool with {self.max_workers} workers")
+            return self._executor
+
+    def submit(self, pdf_path, filename, **options):
+        """Queue a PDF for processing and return a Future of its result.
+
+        ``options`` are passed through to ``PDFProcessor.process_pdf``.
+        """
+        return self._submit(_process_pdf_job, pdf_path, filename, options)
+
+    def submit_text(self, text, filename, **options):
+        """Queue already extracted text for summarization and return a Future.
+
+        ``options`` are passed through to ``PDFProcessor.summarize_text``.
+        """
+        return self._submit(_summarize_text_job, text, filename, options)
+
+    def _submit(self, job, *args):
+        if self.max_workers <= 0:
+            future = Future()
+            try:
+                if _worker_processor is None:
+                    _warm_worker(self.document_workers)
+                future.set_result(job(*args))
+            except Exception as e:
+                future.set_exception(e)
+            return future
+
+        return self._get_executor().submit(job, *args)
+
+    def process_pdf(self, pdf_path, filename, **options):
+        """Process a PDF in the pool and wait for the result."""
+        return self.submit(pdf_path, filename, **options).result()
+
+    def shutdown(self, wait=True):
+        """Stop the worker processes; the pool restarts on the next submit."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+
+_processing_pool = None
+_processing_pool_lock = threading.Lock()
+
+
+def get_processing_pool():
+    """Return the process-wide processing pool, creating it on first use."""
+    global _processing_pool
+    with _processing_pool_lock:
+        if _processing_pool is None:
+            _processing_pool = ProcessingPool()
+            atexit.register(_processing_pool.shutdown)
+        return _processing_pool
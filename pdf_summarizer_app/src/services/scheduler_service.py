@@ -1,15 +1,16 @@
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
-from datetime import datetime
+from datetime import datetime, timedelta
 import atexit
 import logging
+from apscheduler.jobstores.base import ConflictingIdError
 from src.models.user import User
-from src.services.google_drive import GoogleDriveService
-from src.services.pdf_processor import PDFProcessor
+from src.services import drive_push
+from src.services.drive_push import DrivePushService
+from src.services.drive_rate_limiter import get_drive_request_scheduler
+from src.services.drive_sync import DriveSyncService
 from src.services.email_service import EmailService
-from src.models.pdf_summary import PDFSummary, db
-import tempfile
-import os
+from src.models.pdf_summary import db
 
 # Set up logging for the scheduler
 logging.basicConfig(level=logging.INFO)
@@ -52,74 +53,93 @@ class SchedulerService:
                         logger.error(f"Error scanning Google Drive for user {user.username}: {e}")
                 
                 logger.info(f"Scheduled scan completed. Total files processed: {total_processed}")
+                logger.info(f"Drive API usage: {get_drive_request_scheduler().stats()}")
                 
             except Exception as e:
                 logger.error(f"Error in scheduled Google Drive scan: {e}")
     
     def _scan_user_google_drive(self, user):
-        """Scan Google Drive for a specific user."""
+        """Sync Google Drive for a specific user."""
         try:
-            # Initialize services
-            drive_service = GoogleDriveService()
-            pdf_processor = PDFProcessor()
+            result = DriveSyncService().sync_user(user)
             
-            # Get user's Google Drive folder ID (if specified)
-            folder_id = user.google_drive_folder_id
+            for error in result['errors']:
+                logger.error(f"Drive sync for user {user.username}: {error}")
+            if result['removed_files']:
+                logger.info(f"Removed {len(result['removed_files'])} summaries of deleted files for user {user.username}")
             
-            # List new PDF files from the last week
-            files = drive_service.list_files(folder_id=folder_id, days_back=7)
+            return len(result['processed_files']) + len(result['updated_files'])
             
-            processed_count = 0
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Error in _scan_user_google_drive for user {user.username}: {e}")
+            return 0
+    
+    def enqueue_drive_sync(self, user_id):
+        """Queue a Drive sync for one user, as a push notification asks.
+
+        Notifications arriving before the sync runs are coalesced into it,
+        so a burst of changes costs one sync.
+        """
+        try:
+            self.scheduler.add_job(
+                func=self.sync_user_google_drive,
+                trigger='date',
+                run_date=datetime.now() + timedelta(seconds=drive_push.DRIVE_PUSH_SYNC_DELAY_SECONDS),
+                args=[user_id],
+                id=f'drive_push_sync_{user_id}',
+                name=f'Google Drive Sync for user {user_id}',
+                replace_existing=False
+            )
+            return True
+        except ConflictingIdError:
+            return False
+    
+    def sync_user_google_drive(self, user_id):
+        """Sync one user's Google Drive now."""
+        if not self.app:
+            logger.error("Flask app not initialized")
+            return
             
-            for file in files:
-                try:
-                    # Check if we've already processed this file
-                    existing_summary = PDFSummary.query.filter_by(
-                        user_id=user.id,
-                        google_drive_link=file['webViewLink']
-                    ).first()
-                    
-                    if existing_summary:
-                        continue  # Skip already processed files
-                    
-                    # Download the file to a temporary location
-                    with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as temp_file:
-                        temp_path = temp_file.name
-                    
-                    if drive_service.download_file(file['id'], temp_path):
-                        # Process the PDF
-                        result = pdf_processor.process_pdf(temp_path, file['name'])
-                        
-                        # Create summary record
-                        summary = PDFSummary(
-                            user_id=user.id,
-                            title=result['title'],
-                            file_path=file['name'],
-                            google_drive_link=file['webViewLink'],
-                            summary=result['summary'],
-                            key_messages='\n'.join(result['key_messages']) if result['key_messages'] else '',
-                            date_added=datetime.fromisoformat(file['createdTime'].replace('Z', '+00:00')),
-                            date_processed=datetime.utcnow()
-                        )
-                        
-                        db.session.add(summary)
-                        processed_count += 1
-                    
-                    # Clean up temporary file
-                    if os.path.exists(temp_path):
-                        os.unlink(temp_path)
-                        
-                except Exception as e:
-                    logger.error(f"Error processing file {file['name']} for user {user.username}: {e}")
+        with self.app.app_context():
+            user = db.session.get(User, user_id)
+            if user is None:
+                return
+            processed_count = self._scan_user_google_drive(user)
+            logger.info(f"Processed {processed_count} files for user {user.username} after a Drive notification")
+    
+    def renew_drive_channels(self):
+        """Open or renew the Drive push channels of all users."""
+        if not self.app:
+            logger.error("Flask app not initialized")
+            return
             
-            # Commit all changes for this user
-            db.session.commit()
+        with self.app.app_context():
+            try:
+                renewed = DrivePushService().renew_channels(User.query.all())
+                if renewed:
+                    logger.info(f"Opened {renewed} Google Drive push channels")
+            except Exception as e:
+                logger.error(f"Error renewing Google Drive push channels: {e}")
+    
+    def schedule_push_tasks(self):
+        """Schedule Drive push channel renewal; the weekly scan stays as a fallback."""
+        try:
+            self.scheduler.add_job(
+                func=self.renew_drive_channels,
+                trigger='interval',
+                minutes=drive_push.DRIVE_CHANNEL_RENEWAL_INTERVAL_MINUTES,
+                next_run_time=datetime.now(),
+                id='drive_channel_renewal',
+                name='Google Drive Push Channel Renewal',
+                replace_existing=True
+            )
             
-            return processed_count
+            logger.info("Push tasks scheduled successfully")
+            logger.info(f"- Drive channel renewal: Every {drive_push.DRIVE_CHANNEL_RENEWAL_INTERVAL_MINUTES} minutes")
             
         except Exception as e:
-            logger.error(f"Error in _scan_user_google_drive for user {user.username}: {e}")
-            return 0
+            logger.error(f"Error scheduling push tasks: {e}")
     
     def send_weekly_summaries(self):
         """Send weekly summary emails to all users."""
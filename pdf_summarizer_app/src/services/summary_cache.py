@@ -0,0 +1,167 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+# Cache configuration - these can be overridden with environment variables
+CACHE_DB_PATH = os.getenv(
+    'SUMMARY_CACHE_PATH',
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), 'database', 'summary_cache.db')
+)
+CACHE_MEMORY_ENTRIES = int(os.getenv('SUMMARY_CACHE_MEMORY_ENTRIES', '128'))
+# Budget for the in-process tier, measured as serialized JSON; every worker holds its own
+CACHE_MEMORY_MAX_BYTES = int(os.getenv('SUMMARY_CACHE_MEMORY_MAX_BYTES', str(16 * 1024 * 1024)))
+CACHE_MAX_BYTES = int(os.getenv('SUMMARY_CACHE_MAX_BYTES', str(256 * 1024 * 1024)))
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def file_sha256(pdf_path):
+    """Return the hex SHA-256 digest of a file, read in chunks, or of in-memory PDF bytes."""
+    if isinstance(pdf_path, (bytes, bytearray)):
+        return hashlib.sha256(pdf_path).hexdigest()
+    digest = hashlib.sha256()
+    with open(pdf_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class SummaryCache:
+    """Two-tier cache of PDF processing results.
+
+    Entries are keyed by the SHA-256 of the PDF bytes plus the summarizer
+    method and parameters. Lookups hit an in-process LRU first and fall back
+    to a SQLite file shared by all processes. The LRU holds at most
+    ``memory_entries`` results and ``memory_max_bytes`` of serialized JSON,
+    since results carry the extracted text; the SQLite tier evicts the least
+    recently used entries once the stored payloads exceed ``max_bytes``.
+    """
+
+    def __init__(self, db_path=None, memory_entries=None, max_bytes=None, memory_max_bytes=None):
+        self.db_path = db_path or CACHE_DB_PATH
+        self.memory_entries = CACHE_MEMORY_ENTRIES if memory_entries is None else memory_entries
+        self.memory_max_bytes = CACHE_MEMORY_MAX_BYTES if memory_max_bytes is None else memory_max_bytes
+        self.max_bytes = CACHE_MAX_BYTES if max_bytes is None else max_bytes
+        # key -> (result, serialized size)
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self._init_db()
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def _init_db(self):
+        db_dir = os.path.dirname(self.db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS summary_cache ('
+                'key TEXT PRIMARY KEY, '
+                'payload BLOB NOT NULL, '
+                'size INTEGER NOT NULL, '
+                'last_access REAL NOT NULL)'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS ix_summary_cache_last_access ON summary_cache (last_access)')
+
+    @staticmethod
+    def make_key(file_hash, method, params=None):
+        """Build a cache key from a file hash, summarizer method and its parameters."""
+        params_json = json.dumps(params or {}, sort_keys=True, separators=(',', ':'))
+        return f"{file_hash}:{method}:{hashlib.sha256(params_json.encode('utf-8')).hexdigest()[:16]}"
+
+    def get(self, key):
+        """Return the cached result for ``key`` or None."""
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return dict(self._memory[key][0])
+
+        with self._connect() as conn:
+            row = conn.execute('SELECT payload FROM summary_cache WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                return None
+            conn.execute('UPDATE summary_cache SET last_access = ? WHERE key = ?', (time.time(), key))
+
+        result_json = zlib.decompress(row[0])
+        result = json.loads(result_json.decode('utf-8'))
+        self._remember(key, result, len(result_json))
+        return dict(result)
+
+    def set(self, key, result):
+        """Store a result in both tiers, evicting old SQLite entries if needed."""
+        result_json = json.dumps(result).encode('utf-8')
+        self._remember(key, result, len(result_json))
+
+        payload = zlib.compress(result_json)
+        if len(payload) > self.max_bytes:
+            return
+
+        with self._connect() as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO summary_cache (key, payload, size, last_access) VALUES (?, ?, ?, ?)',
+                (key, payload, len(payload), time.time())
+            )
+            self._evict(conn)
+
+    def _remember(self, key, result, size):
+        if self.memory_entries <= 0 or size > self.memory_max_bytes:
+            return
+        with self._lock:
+            self._forget(key)
+            self._memory[key] = (dict(result), size)
+            self._memory_bytes += size
+            while len(self._memory) > self.memory_entries or self._memory_bytes > self.memory_max_bytes:
+                self._forget(next(iter(self._memory)))
+
+    def _forget(self, key):
+        """Drop a key from the LRU; the caller holds the lock."""
+        entry = self._memory.pop(key, None)
+        if entry is not None:
+            self._memory_bytes -= entry[1]
+
+    def _evict(self, conn):
+        """Delete least recently used rows until the total payload fits the budget."""
+        total = conn.execute('SELECT COALESCE(SUM(size), 0) FROM summary_cache').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        rows = conn.execute('SELECT key, size FROM summary_cache ORDER BY last_access ASC').fetchall()
+        stale_keys = []
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            stale_keys.append((key,))
+            total -= size
+        conn.executemany('DELETE FROM summary_cache WHERE key = ?', stale_keys)
+
+        with self._lock:
+            for (key,) in stale_keys:
+                self._forget(key)
+
+    def clear(self):
+        """Remove every cached entry from both tiers."""
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+        with self._connect() as conn:
+            conn.execute('DELETE FROM summary_cache')
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_summary_cache():
+    """Return the process-wide summary cache, creating it on first use."""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = SummaryCache()
+        return _default_cache
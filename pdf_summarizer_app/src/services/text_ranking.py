@@ -0,0 +1,189 @@
+import numpy as np
+from functools import cached_property
+
+# Power iteration settings shared by the graph rankers
+DAMPING = 0.85
+TOLERANCE = 1e-6
+MAX_ITERATIONS = 100
+
+# LSA keeps the strongest topics; larger matrices use a randomized truncated SVD
+LSA_DIMENSIONS = 20
+LSA_OVERSAMPLING = 20
+LSA_POWER_ITERATIONS = 4
+LSA_TF_SMOOTHING = 0.4
+
+
+class SentenceTermMatrix:
+    """Sparse sentence x term count matrix of a ParsedDocument, stored as CSR arrays.
+
+    Rows are sentences and columns are the stems of non stop words. All
+    products are computed with ``np.bincount`` over the non-zero entries, so
+    every operation is O(non-zeros) and the dense n x n similarity matrix is
+    never built.
+    """
+
+    def __init__(self, document):
+        vocabulary = {}
+        indptr = [0]
+        indices = []
+        counts = []
+        for stems, stopword_mask in zip(document.stems, document.stopword_masks):
+            row = {}
+            for stem, is_stop_word in zip(stems, stopword_mask):
+                if is_stop_word:
+                    continue
+                term = vocabulary.setdefault(stem, len(vocabulary))
+                row[term] = row.get(term, 0) + 1
+            indices.extend(row.keys())
+            counts.extend(row.values())
+            indptr.append(len(indices))
+
+        self.sentences = document.sentences
+        self.n_sentences = len(indptr) - 1
+        self.n_terms = len(vocabulary)
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int64)
+        self.counts = np.asarray(counts, dtype=np.float64)
+        self.row_ids = np.repeat(np.arange(self.n_sentences), np.diff(self.indptr))
+
+    def matvec(self, data, x):
+        """Return X @ x for the matrix with non-zero values ``data``."""
+        return np.bincount(self.row_ids, weights=data * x[self.indices], minlength=self.n_sentences)
+
+    def rmatvec(self, data, y):
+        """Return X.T @ y for the matrix with non-zero values ``data``."""
+        return np.bincount(self.indices, weights=data * y[self.row_ids], minlength=self.n_terms)
+
+    def row_sums(self, data):
+        return np.bincount(self.row_ids, weights=data, minlength=self.n_sentences)
+
+    @cached_property
+    def tfidf(self):
+        """Row-normalized TF-IDF values of the non-zero entries."""
+        document_frequency = np.bincount(self.indices, minlength=self.n_terms)
+        idf = np.log(self.n_sentences / document_frequency)
+        data = self.counts * idf[self.indices]
+        norms = np.sqrt(self.row_sums(data ** 2))
+        return _divide(data, norms[self.row_ids])
+
+    @cached_property
+    def binary(self):
+        return np.ones_like(self.counts)
+
+    @cached_property
+    def smoothed_tf(self):
+        """Max-normalized term frequencies with the smoothing sumy's LSA uses."""
+        row_max = np.zeros(self.n_sentences)
+        np.maximum.at(row_max, self.row_ids, self.counts)
+        return LSA_TF_SMOOTHING + (1 - LSA_TF_SMOOTHING) * _divide(self.counts, row_max[self.row_ids])
+
+    def lsa_scores(self):
+        """LSA: each sentence's weight across the strongest latent topics.
+
+        A sentence scores sqrt(sum_k (sigma_k * u_ik)^2) over the top
+        LSA_DIMENSIONS singular triplets, as in sumy's LsaSummarizer.
+        """
+        data = self.smoothed_tf
+        dimensions = min(LSA_DIMENSIONS, self.n_sentences, self.n_terms)
+        if dimensions == 0:
+            return np.zeros(self.n_sentences)
+
+        block = dimensions + LSA_OVERSAMPLING
+        if block >= min(self.n_sentences, self.n_terms):
+            dense = np.zeros((self.n_sentences, self.n_terms))
+            dense[self.row_ids, self.indices] = data
+            u, sigma, _ = np.linalg.svd(dense, full_matrices=False)
+        else:
+            # Randomized subspace iteration on X^T X, using only sparse products
+            rng = np.random.default_rng(0)
+            q = rng.standard_normal((self.n_terms, block))
+            for _ in range(LSA_POWER_ITERATIONS):
+                q, _ = np.linalg.qr(self._rmatmat(data, self._matmat(data, q)))
+            u, sigma, _ = np.linalg.svd(self._matmat(data, q), full_matrices=False)
+
+        weighted = u[:, :dimensions] * sigma[:dimensions]
+        return np.sqrt((weighted ** 2).sum(axis=1))
+
+    def _matmat(self, data, block):
+        return np.column_stack([self.matvec(data, column) for column in block.T])
+
+    def _rmatmat(self, data, block):
+        return np.column_stack([self.rmatvec(data, column) for column in block.T])
+
+    def lexrank_scores(self):
+        """Continuous LexRank: PageRank over the cosine similarity of TF-IDF vectors."""
+        data = self.tfidf
+        # Self-similarity of a non-empty unit vector is 1 and is removed from the graph
+        self_similarity = self.row_sums(data ** 2)
+
+        def similarity(x):
+            return self.matvec(data, self.rmatvec(data, x)) - self_similarity * x
+
+        return _power_iteration(similarity, self.n_sentences)
+
+    def textrank_scores(self):
+        """TextRank over shared-word overlap between sentences.
+
+        The overlap is normalized by sqrt(log(1 + |a|) * log(1 + |b|)) rather
+        than the original log|a| + log|b| so the graph factorizes into sparse
+        products and never has to be materialized.
+        """
+        data = self.binary
+        lengths = self.row_sums(data)
+        scale = _divide(np.ones(self.n_sentences), np.sqrt(np.log1p(lengths)))
+        self_similarity = scale ** 2 * lengths
+
+        def similarity(x):
+            return scale * self.matvec(data, self.rmatvec(data, scale * x)) - self_similarity * x
+
+        return _power_iteration(similarity, self.n_sentences)
+
+    def best_sentences(self, scores, sentences_count):
+        """Return the highest scoring sentences in document order."""
+        order = np.argsort(-scores, kind='stable')[:sentences_count]
+        return [self.sentences[i] for i in sorted(order)]
+
+
+def _divide(numerator, denominator):
+    """Element-wise division that yields 0 where the denominator is 0."""
+    return np.divide(numerator, denominator, out=np.zeros_like(numerator), where=denominator != 0)
+
+
+def _power_iteration(similarity, n):
+    """Stationary distribution of the random walk on a symmetric similarity graph.
+
+    ``similarity`` computes S @ x. The walk moves along S normalized by each
+    sentence's degree, with the usual (1 - DAMPING) teleport.
+    """
+    if n == 0:
+        return np.zeros(0)
+
+    degrees = similarity(np.ones(n))
+    inverse_degrees = _divide(np.ones(n), degrees)
+    scores = np.full(n, 1.0 / n)
+    for _ in range(MAX_ITERATIONS):
+        updated = (1 - DAMPING) / n + DAMPING * similarity(scores * inverse_degrees)
+        # Sentences without edges leak probability mass; renormalize
+        updated /= updated.sum()
+        converged = np.abs(updated - scores).sum() < TOLERANCE
+        scores = updated
+        if converged:
+            break
+    return scores
+
+
+NATIVE_RANKERS = {
+    'lsa_native': SentenceTermMatrix.lsa_scores,
+    'lexrank_native': SentenceTermMatrix.lexrank_scores,
+    'textrank_native': SentenceTermMatrix.textrank_scores
+}
+
+
+def summarize_native(document, sentences_count, method, matrix=None):
+    """Summarize a ParsedDocument with one of the NumPy rankers.
+
+    Pass ``matrix`` to reuse a SentenceTermMatrix already built for the document.
+    """
+    matrix = matrix or SentenceTermMatrix(document)
+    scores = NATIVE_RANKERS[method](matrix)
+    return matrix.best_sentences(scores, sentences_count)
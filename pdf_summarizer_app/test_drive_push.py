@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from src.models.user import db, User
+from src.models.pdf_summary import PDFSummary
+from src.routes.scheduler import scheduler_bp, init_scheduler_routes
+from src.services import drive_push, google_drive, processing_pool
+from src.services.drive_push import DrivePushService
+from src.services.google_drive import GoogleDriveService
+from src.services.processing_pool import ProcessingPool
+from src.services.scheduler_service import SchedulerService
+from fake_google_drive import FakeGoogleDrive
+from test_drive_sync import read_pdf_bytes
+from test_pdf_processor import create_multipage_test_pdf
+from test_pdf_text import create_test_app
+from werkzeug.serving import make_server
+from datetime import datetime, timedelta
+import tempfile
+import threading
+import time
+
+def wait_for(condition, timeout=15):
+    """Poll ``condition`` until it is true or ``timeout`` seconds pass."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        db.session.rollback()
+        if condition():
+            return True
+        time.sleep(0.1)
+    return False
+
+def test_push_notifications_trigger_sync():
+    """Drive notifications queue a sync of the changed user; channels are renewed before expiry."""
+    original_pool = processing_pool._processing_pool
+    original_endpoint = google_drive.DRIVE_API_ENDPOINT
+    original_delay = drive_push.DRIVE_PUSH_SYNC_DELAY_SECONDS
+    processing_pool._processing_pool = ProcessingPool(max_workers=0)
+    drive_push.DRIVE_PUSH_SYNC_DELAY_SECONDS = 0
+
+    try:
+        with tempfile.TemporaryDirectory() as temp_dir, FakeGoogleDrive() as fake_drive:
+            google_drive.DRIVE_API_ENDPOINT = fake_drive.url
+            app = create_test_app(os.path.join(temp_dir, 'app.db'))
+            app.register_blueprint(scheduler_bp, url_prefix='/api/scheduler')
+            scheduler_service = SchedulerService(app)
+            init_scheduler_routes(scheduler_service)
+
+            server = make_server('127.0.0.1', 0, app, threaded=True)
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            webhook_url = f'http://127.0.0.1:{server.server_port}/api/scheduler/drive-notifications'
+
+            with app.app_context():
+                watcher = User(username='watcher', email='watcher@example.com', password_hash='x',
+                               google_drive_folder_id='watched-folder')
+                db.session.add(watcher)
+                db.session.commit()
+
+                push_service = DrivePushService(drive_service=GoogleDriveService(api_endpoint=fake_drive.url),
+                                                webhook_url=webhook_url)
+                assert push_service.renew_channels([watcher]) == 1
+                assert push_service.renew_channels([watcher]) == 0
+                fake_drive.flush_notifications()
+                assert fake_drive.notifications == [{'state': 'sync', 'channel': watcher.drive_channel_id,
+                                                     'status': 204}]
+                print("✅ A changes.watch channel is opened and confirmed")
+
+                fake_drive.add_file('minutes.pdf', read_pdf_bytes(create_multipage_test_pdf, 3),
+                                    parents=['watched-folder'])
+                fake_drive.flush_notifications()
+                assert fake_drive.notifications[-1]['status'] == 202
+                assert wait_for(lambda: PDFSummary.query.count() == 1)
+                assert PDFSummary.query.one().file_path == 'minutes.pdf'
+                print("✅ A change notification syncs the user without waiting for the weekly scan")
+
+                # A notification with the wrong token is refused
+                channel_id = watcher.drive_channel_id
+                response = app.test_client().post('/api/scheduler/drive-notifications', headers={
+                    'X-Goog-Channel-ID': channel_id, 'X-Goog-Channel-Token': 'forged',
+                    'X-Goog-Resource-State': 'change'})
+                assert response.status_code == 404
+
+                # A channel about to expire is replaced, and the old one stopped
+                watcher.drive_channel_expiration = datetime.utcnow() + timedelta(minutes=5)
+                db.session.commit()
+                assert push_service.renew_channels([watcher]) == 1
+                assert watcher.drive_channel_id != channel_id
+                assert list(fake_drive.channels) == [watcher.drive_channel_id]
+                print("✅ Expiring channels are renewed")
+
+                fake_drive.flush_notifications()
+                db.engine.dispose()
+
+            server.shutdown()
+    finally:
+        processing_pool._processing_pool = original_pool
+        google_drive.DRIVE_API_ENDPOINT = original_endpoint
+        drive_push.DRIVE_PUSH_SYNC_DELAY_SECONDS = original_delay
+
+if __name__ == "__main__":
+    test_push_notifications_trigger_sync()
+    print("\n✅ Drive push tests completed successfully!")
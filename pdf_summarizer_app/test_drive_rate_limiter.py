@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from src.services.drive_rate_limiter import DriveRequestScheduler, TokenBucket
+from src.services.google_drive import GoogleDriveService
+from fake_google_drive import FakeGoogleDrive
+from googleapiclient.errors import HttpError
+import threading
+import time
+
+def make_scheduler(**options):
+    """A scheduler that records its backoff sleeps instead of sleeping."""
+    sleeps = []
+    options.setdefault('backoff_base', 0.01)
+    return DriveRequestScheduler(sleep=sleeps.append, **options), sleeps
+
+def test_token_bucket_refills_at_rate():
+    """Tokens are spent immediately up to capacity, then refill at the configured rate."""
+    now = [0.0]
+    bucket = TokenBucket(rate=10, capacity=2, clock=lambda: now[0])
+    bucket.take()
+    bucket.take()
+    assert abs(bucket.wait_time() - 0.1) < 1e-9
+    now[0] = 1.0
+    assert bucket.wait_time() == 0 and bucket.tokens == 2
+    print("✅ Token bucket refills at its rate up to capacity")
+
+def test_rate_limited_requests_are_retried():
+    """429s and 403 rate-limit errors are retried with backoff; other errors are not."""
+    with FakeGoogleDrive() as fake_drive:
+        file_ids = [fake_drive.add_file(f'report-{i}.pdf', b'%PDF-1.4 report')['id'] for i in range(5)]
+        scheduler, sleeps = make_scheduler()
+        drive_service = GoogleDriveService(api_endpoint=fake_drive.url, scheduler=scheduler)
+
+        fake_drive.fail_next(2, status=429, retry_after=1)
+        assert len(list(drive_service.list_files())) == 5
+        assert len(fake_drive.requests_to('/files')) == 3
+        # Retry-After is honoured when it asks for more than the backoff
+        assert sleeps == [1, 1]
+
+        fake_drive.fail_next(1, status=403)
+        with drive_service.download_to_spool(file_ids[0]) as download:
+            assert download.source() == b'%PDF-1.4 report'
+
+        # Rate-limited items in a batch are sent again on their own
+        fake_drive.requests.clear()
+        fake_drive.fail_next(2)
+        files, errors = drive_service.get_files_info(file_ids + ['missing'])
+        assert set(files) == set(file_ids) and set(errors) == {'missing'}
+        assert len([r for r in fake_drive.requests if r['method'] == 'POST']) == 2
+        assert len([r for r in fake_drive.requests if r.get('batched')]) == 8
+
+        assert drive_service.get_file_info('missing') is None
+        stats = scheduler.stats()
+        assert stats['retryable_errors'] == stats['retried'] == 5
+        assert stats['failed'] == 0
+        print(f"✅ Rate-limited Drive calls are retried with backoff: {stats}")
+
+def test_retries_give_up_after_limit():
+    """A call still rate limited after max_retries raises and is counted as failed."""
+    with FakeGoogleDrive() as fake_drive:
+        scheduler, sleeps = make_scheduler(max_retries=2)
+        drive_service = GoogleDriveService(api_endpoint=fake_drive.url, scheduler=scheduler)
+
+        fake_drive.fail_next(3)
+        try:
+            drive_service.get_start_page_token()
+            assert False, "expected HttpError"
+        except HttpError as e:
+            assert e.resp.status == 429
+        assert len(sleeps) == 2 and scheduler.stats()['failed'] == 1
+        print("✅ Retries stop after DRIVE_MAX_RETRIES")
+
+def test_scheduler_throttles_and_shares_quota_fairly():
+    """Callers wait for tokens, and a second user is served between the first user's calls."""
+    scheduler = DriveRequestScheduler(rate=20, burst=1)
+    grants = []
+    grants_lock = threading.Lock()
+
+    def call(user):
+        scheduler.acquire(user)
+        with grants_lock:
+            grants.append(user)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=call, args=('busy',)) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.06)
+    late = [threading.Thread(target=call, args=('quiet',)) for _ in range(2)]
+    for thread in late:
+        thread.start()
+    for thread in threads + late:
+        thread.join(timeout=10)
+    elapsed = time.perf_counter() - started
+
+    assert len(grants) == 8
+    # Eight calls at 20 per second with a burst of one take at least 7 refills
+    assert elapsed >= 7 / 20 * 0.9, elapsed
+    # First come, first served would put both quiet calls last
+    assert grants.index('quiet') < 5 and grants[-1] == 'busy', grants
+    assert scheduler.stats()['throttled'] >= 6
+    print(f"✅ Requests are throttled to the quota and interleaved across users: {grants}")
+
+if __name__ == "__main__":
+    test_token_bucket_refills_at_rate()
+    test_rate_limited_requests_are_retried()
+    test_retries_give_up_after_limit()
+    test_scheduler_throttles_and_shares_quota_fairly()
+    print("\n✅ Drive rate limiter tests completed successfully!")
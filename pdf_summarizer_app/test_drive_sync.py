@@ -0,0 +1,469 @@
+#!/usr/bin/env python3
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from src.models.user import db, User
+from src.models.pdf_summary import PDFDocument, PDFSummary
+from src.services.drive_rate_limiter import DriveRequestScheduler
+from src.services import drive_sync
+from src.services.drive_sync import DriveSyncService
+from src.services.google_drive import GoogleDriveService
+from src.services.processing_pool import ProcessingPool
+from fake_google_drive import FakeGoogleDrive
+from test_pdf_processor import create_test_pdf, create_multipage_test_pdf
+from test_pdf_text import create_test_app
+from sqlalchemy import event
+from sqlalchemy.exc import SQLAlchemyError
+import json
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+def read_pdf_bytes(create_pdf, *args):
+    """Build a test PDF and return its bytes."""
+    pdf_path = create_pdf(*args)
+    try:
+        with open(pdf_path, 'rb') as pdf_file:
+            return pdf_file.read()
+    finally:
+        os.unlink(pdf_path)
+
+def make_sync_service(fake_drive):
+    return DriveSyncService(drive_service=GoogleDriveService(api_endpoint=fake_drive.url),
+                            processing_pool=ProcessingPool(max_workers=0))
+
+def test_incremental_sync_uses_changes_feed():
+    """After the first listing, syncs only read and act on the changes feed."""
+    with tempfile.TemporaryDirectory() as temp_dir, FakeGoogleDrive() as fake_drive:
+        report = fake_drive.add_file('report.pdf', read_pdf_bytes(create_test_pdf), parents=['folder-1'])
+        memo = fake_drive.add_file('memo.pdf', read_pdf_bytes(create_multipage_test_pdf, 3), parents=['folder-1'])
+        fake_drive.add_file('elsewhere.pdf', read_pdf_bytes(create_multipage_test_pdf, 2), parents=['folder-2'])
+        fake_drive.add_file('notes.txt', b'plain text', parents=['folder-1'], mime_type='text/plain')
+
+        app = create_test_app(os.path.join(temp_dir, 'app.db'))
+        with app.app_context():
+            user = User(username='syncer', email='syncer@example.com', password_hash='x',
+                        google_drive_folder_id='folder-1')
+            db.session.add(user)
+            db.session.commit()
+
+            # First sync: a dated listing of the folder, then a cursor is stored
+            result = make_sync_service(fake_drive).sync_user(user)
+            assert sorted(s.file_path for s in PDFSummary.query.all()) == ['memo.pdf', 'report.pdf']
+            assert len(result['processed_files']) == 2 and not result['errors']
+            assert user.drive_changes_token == fake_drive.get_start_page_token()['startPageToken']
+            print("✅ First sync lists the folder and stores a changes cursor")
+
+            # Nothing changed: one changes.list call, no listing and no downloads
+            fake_drive.requests.clear()
+            result = make_sync_service(fake_drive).sync_user(user)
+            assert not any(result.values())
+            assert [r['path'] for r in fake_drive.requests] == ['/changes']
+            print("✅ Unchanged Drive costs a single changes request")
+
+            # New, modified and trashed files are all picked up from the feed
+            fake_drive.add_file('minutes.pdf', read_pdf_bytes(create_multipage_test_pdf, 4), parents=['folder-1'])
+            fake_drive.update_file(memo['id'], content=read_pdf_bytes(create_multipage_test_pdf, 5))
+            fake_drive.trash_file(report['id'])
+            fake_drive.requests.clear()
+
+            result = make_sync_service(fake_drive).sync_user(user)
+            assert len(result['processed_files']) == 1
+            assert len(result['updated_files']) == 1
+            assert len(result['removed_files']) == 1
+            assert sorted(s.file_path for s in PDFSummary.query.all()) == ['memo.pdf', 'minutes.pdf']
+            assert 'Page 5 ' in PDFSummary.query.filter_by(drive_file_id=memo['id']).one().text
+            assert len(fake_drive.requests_to('/files/')) == 2
+            assert not [r for r in fake_drive.requests if r['path'] == '/files']
+            print("✅ New, modified and trashed files are synced from the changes feed")
+
+            db.engine.dispose()
+
+def test_failed_files_are_retried_without_pinning_the_cursor():
+    """A file that fails is retried by later syncs while the cursor moves on, until it is given up on."""
+    with tempfile.TemporaryDirectory() as temp_dir, FakeGoogleDrive() as fake_drive:
+        app = create_test_app(os.path.join(temp_dir, 'app.db'))
+        with app.app_context():
+            user = User(username='retry', email='retry@example.com', password_hash='x')
+            db.session.add(user)
+            db.session.commit()
+
+            sync_service = make_sync_service(fake_drive)
+            sync_service.sync_user(user)
+            cursor = user.drive_changes_token
+
+            report = fake_drive.add_file('report.pdf', read_pdf_bytes(create_test_pdf))
+            sync_service.drive_service.download_to_spool = lambda file_id: None
+            result = sync_service.sync_user(user)
+            assert result['errors'] and user.drive_changes_token != cursor
+            assert json.loads(user.drive_retry_files) == {report['id']: 1}
+
+            del sync_service.drive_service.download_to_spool
+            result = sync_service.sync_user(user)
+            assert len(result['processed_files']) == 1 and not result['errors']
+            assert user.drive_retry_files is None
+            print("✅ Failed files are retried while the cursor advances")
+
+            broken = fake_drive.add_file('broken.pdf', read_pdf_bytes(create_test_pdf))
+            sync_service.drive_service.download_to_spool = lambda file_id: None
+            for attempt in range(1, drive_sync.SYNC_MAX_ATTEMPTS):
+                sync_service.sync_user(user)
+                assert json.loads(user.drive_retry_files) == {broken['id']: attempt}
+            sync_service.sync_user(user)
+            assert user.drive_retry_files is None
+
+            fake_drive.requests.clear()
+            result = sync_service.sync_user(user)
+            assert not any(result.values())
+            assert [r['path'] for r in fake_drive.requests] == ['/changes']
+            print("✅ A file that keeps failing is given up on")
+
+            db.engine.dispose()
+
+def test_cursor_kept_when_the_listing_fails():
+    """A first sync whose listing fails stores no cursor, so the next sync lists again."""
+    with tempfile.TemporaryDirectory() as temp_dir, FakeGoogleDrive() as fake_drive:
+        fake_drive.add_file('report.pdf', read_pdf_bytes(create_test_pdf))
+
+        app = create_test_app(os.path.join(temp_dir, 'app.db'))
+        with app.app_context():
+            user = User(username='lister', email='lister@example.com', password_hash='x')
+            db.session.add(user)
+            db.session.commit()
+
+            drive_service = GoogleDriveService(api_endpoint=fake_drive.url,
+                                               scheduler=DriveRequestScheduler(max_retries=0))
+            sync_service = DriveSyncService(drive_service=drive_service,
+                                            processing_pool=ProcessingPool(max_workers=0))
+            get_start_page_token = drive_service.get_start_page_token
+
+            def start_token_then_fail_listing():
+                token = get_start_page_token()
+                fake_drive.fail_next(1)
+                return token
+
+            drive_service.get_start_page_token = start_token_then_fail_listing
+            result = sync_service.sync_user(user)
+            assert result['errors'] and not result['processed_files']
+            assert user.drive_changes_token is None
+
+            del drive_service.get_start_page_token
+            result = sync_service.sync_user(user)
+            assert result['processed_files'] and not result['errors']
+            assert user.drive_changes_token is not None
+            print("✅ A failed listing keeps the first sync from storing a cursor")
+
+            db.engine.dispose()
+
+def test_only_content_changes_are_reprocessed():
+    """Renaming a file updates its summary in place; editing its content re-processes it."""
+    with tempfile.TemporaryDirectory() as temp_dir, FakeGoogleDrive() as fake_drive:
+        report = fake_drive.add_file('report.pdf', read_pdf_bytes(create_multipage_test_pdf, 2))
+
+        app = create_test_app(os.path.join(temp_dir, 'app.db'))
+        with app.app_context():
+            user = User(username='editor', email='editor@example.com', password_hash='x')
+            db.session.add(user)
+            db.session.commit()
+
+            make_sync_service(fake_drive).sync_user(user)
+            summary = PDFSummary.query.one()
+            assert summary.drive_md5_checksum == report['md5Checksum']
+
+            fake_drive.update_file(report['id'], name='renamed.pdf')
+            fake_drive.requests.clear()
+            result = make_sync_service(fake_drive).sync_user(user)
+            assert not result['updated_files'] and not fake_drive.requests_to('/files/')
+            db.session.refresh(summary)
+            assert summary.file_path == 'renamed.pdf'
+            print("✅ Renamed files are updated without re-processing")
+
+            edited = fake_drive.update_file(report['id'], content=read_pdf_bytes(create_multipage_test_pdf, 4))
+            result = make_sync_service(fake_drive).sync_user(user)
+            assert len(result['updated_files']) == 1
+            assert PDFSummary.query.one().id == summary.id
+            assert summary.drive_md5_checksum == edited['md5Checksum'] and 'Page 4 ' in summary.text
+            print("✅ Edited files are re-processed in place")
+
+            db.engine.dispose()
+
+def summary_queries_during(engine, call):
+    """Run ``call()`` and return its result with the SELECTs it ran against pdf_summary."""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT') and 'FROM pdf_summary' in statement:
+            statements.append(statement)
+
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        return call(), statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+
+def test_rescan_looks_up_known_files_in_one_query():
+    """Re-listing a folder costs one summaries query however many files it holds."""
+    with tempfile.TemporaryDirectory() as temp_dir, FakeGoogleDrive() as fake_drive:
+        files = [fake_drive.add_file(f'report-{i}.pdf', b'%PDF-1.4 ' + bytes(i)) for i in range(40)]
+
+        app = create_test_app(os.path.join(temp_dir, 'app.db'))
+        with app.app_context():
+            user = User(username='rescan', email='rescan@example.com', password_hash='x')
+            db.session.add(user)
+            db.session.commit()
+
+            # A summary stored before drive_file_id existed is matched by its link
+            legacy = PDFSummary(user_id=user.id, title='report-0.pdf', file_path='report-0.pdf',
+                                google_drive_link=files[0]['webViewLink'], summary='Summary.')
+            db.session.add(legacy)
+            db.session.commit()
+
+            processing_pool = SlowProcessingPool(workers=2, seconds=0)
+            sync_service = DriveSyncService(drive_service=GoogleDriveService(api_endpoint=fake_drive.url),
+                                            processing_pool=processing_pool)
+            result = sync_service.sync_user(user)
+            assert len(result['processed_files']) == 39 and not result['errors']
+            assert db.session.get(PDFSummary, legacy.id).drive_file_id == files[0]['id']
+
+            # Lose the cursor so the whole folder is listed again
+            user.drive_changes_token = None
+            db.session.commit()
+            result, statements = summary_queries_during(db.engine, lambda: sync_service.sync_user(user))
+            assert not any(result.values())
+            assert len(statements) == 1, statements
+            print("✅ Re-scanning 40 files runs a single summaries query")
+
+            processing_pool.executor.shutdown()
+            db.engine.dispose()
+
+def test_shared_files_are_processed_once():
+    """A PDF several users have is downloaded and processed for the first user only."""
+    with tempfile.TemporaryDirectory() as temp_dir, FakeGoogleDrive() as fake_drive:
+        pdf_bytes = read_pdf_bytes(create_multipage_test_pdf, 3)
+        fake_drive.add_file('team-report.pdf', pdf_bytes, parents=['team-folder'])
+        fake_drive.add_file('copy-of-report.pdf', pdf_bytes, parents=['other-folder'])
+
+        app = create_test_app(os.path.join(temp_dir, 'app.db'))
+        with app.app_context():
+            users = [User(username=f'member-{i}', email=f'member-{i}@example.com', password_hash='x',
+                          google_drive_folder_id='team-folder') for i in range(3)]
+            users.append(User(username='outsider', email='outsider@example.com', password_hash='x',
+                              google_drive_folder_id='other-folder'))
+            db.session.add_all(users)
+            db.session.commit()
+
+            downloads = []
+            for user in users:
+                fake_drive.requests.clear()
+                result = make_sync_service(fake_drive).sync_user(user)
+                assert len(result['processed_files']) == 1 and not result['errors']
+                downloads.append(len(fake_drive.requests_to('/files/')))
+            assert downloads == [1, 0, 0, 0]
+
+            summaries = PDFSummary.query.order_by(PDFSummary.user_id).all()
+            assert len(summaries) == 4 and PDFDocument.query.count() == 1
+            assert len({s.document_id for s in summaries}) == 1
+            assert all('Page 3 ' in s.text for s in summaries)
+            assert summaries[3].file_path == 'copy-of-report.pdf'
+            assert summaries[1].summary == summaries[0].summary
+            print("✅ A PDF shared by four users is processed once")
+
+            db.engine.dispose()
+
+class SlowProcessingPool:
+    """Processing pool stand-in whose jobs take a fixed time, like CPU-bound extraction."""
+
+    def __init__(self, workers, seconds):
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.seconds = seconds
+        self.running = 0
+        self.max_running = 0
+        self._lock = threading.Lock()
+
+    def submit(self, pdf_source, filename, **options):
+        return self.executor.submit(self._process, pdf_source, filename)
+
+    def _process(self, pdf_source, filename):
+        with self._lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        time.sleep(self.seconds)
+        with self._lock:
+            self.running -= 1
+        return {'title': filename, 'text': f'{len(pdf_source)} bytes', 'summary': 'Summary.',
+                'key_messages': [], 'summary_bundle': {}, 'triage': {}}
+
+def test_sync_pipelines_downloads_and_processing():
+    """Downloads overlap with processing, so a sync takes about max(network, CPU), not their sum."""
+    file_count, stage_seconds = 8, 0.2
+
+    with tempfile.TemporaryDirectory() as temp_dir, FakeGoogleDrive() as fake_drive:
+        for i in range(file_count):
+            fake_drive.add_file(f'report-{i}.pdf', b'%PDF-1.4 ' + bytes(i))
+        fake_drive.media_delay = stage_seconds
+
+        app = create_test_app(os.path.join(temp_dir, 'app.db'))
+        with app.app_context():
+            user = User(username='pipeline', email='pipeline@example.com', password_hash='x')
+            db.session.add(user)
+            db.session.commit()
+
+            processing_pool = SlowProcessingPool(workers=4, seconds=stage_seconds)
+            sync_service = DriveSyncService(drive_service=GoogleDriveService(api_endpoint=fake_drive.url),
+                                            processing_pool=processing_pool)
+            started = time.perf_counter()
+            result = sync_service.sync_user(user)
+            elapsed = time.perf_counter() - started
+
+            assert len(result['processed_files']) == file_count and not result['errors']
+            assert PDFSummary.query.count() == file_count
+            # Strictly sequential stages would take file_count * 2 * stage_seconds = 3.2s
+            assert elapsed < file_count * stage_seconds, elapsed
+            assert processing_pool.max_running > 1
+            print(f"✅ Pipelined sync of {file_count} files took {elapsed:.2f}s")
+
+            processing_pool.executor.shutdown()
+            db.engine.dispose()
+
+def test_overlapping_syncs_store_each_file_once():
+    """Two syncs of one user started together, e.g. a push and a manual scan, run one after the other."""
+    with tempfile.TemporaryDirectory() as temp_dir, FakeGoogleDrive() as fake_drive:
+        for i in range(3):
+            fake_drive.add_file(f'report-{i}.pdf', b'%PDF-1.4 ' + bytes(i))
+
+        app = create_test_app(os.path.join(temp_dir, 'app.db'))
+        with app.app_context():
+            user = User(username='overlap', email='overlap@example.com', password_hash='x')
+            db.session.add(user)
+            db.session.commit()
+            user_id = user.id
+
+        processing_pool = SlowProcessingPool(workers=2, seconds=0.1)
+        barrier = threading.Barrier(2)
+
+        def sync(_):
+            with app.app_context():
+                user = db.session.get(User, user_id)
+                sync_service = DriveSyncService(drive_service=GoogleDriveService(api_endpoint=fake_drive.url),
+                                                processing_pool=processing_pool)
+                barrier.wait()
+                return sync_service.sync_user(user)
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            results = list(executor.map(sync, range(2)))
+
+        with app.app_context():
+            assert not any(result['errors'] for result in results)
+            assert sum(len(result['processed_files']) for result in results) == 3
+            assert PDFSummary.query.count() == 3
+            print("✅ Overlapping syncs of one user store each file once")
+
+            processing_pool.executor.shutdown()
+            db.engine.dispose()
+
+def test_failed_sync_leaves_the_session_usable():
+    """A sync whose commit fails rolls back, so the next user's sync still runs."""
+    with tempfile.TemporaryDirectory() as temp_dir, FakeGoogleDrive() as fake_drive:
+        report = fake_drive.add_file('report.pdf', b'%PDF-1.4 report')
+
+        app = create_test_app(os.path.join(temp_dir, 'app.db'))
+        with app.app_context():
+            first = User(username='first', email='first@example.com', password_hash='x')
+            second = User(username='second', email='second@example.com', password_hash='x')
+            db.session.add_all([first, second])
+            db.session.commit()
+            first_id = first.id
+
+            sync_service = make_sync_service(fake_drive)
+            list_files = sync_service.drive_service.list_files
+
+            def list_after_another_process_stored_the_file(**kwargs):
+                # Another process stores the same file once this sync has loaded its known files
+                with db.engine.begin() as connection:
+                    connection.execute(PDFSummary.__table__.insert().values(
+                        user_id=first_id, title='report.pdf', file_path='report.pdf',
+                        google_drive_link=report['webViewLink'], drive_file_id=report['id'],
+                        summary='Summary.'))
+                return list_files(**kwargs)
+
+            sync_service.drive_service.list_files = list_after_another_process_stored_the_file
+            try:
+                sync_service.sync_user(first)
+            except SQLAlchemyError:
+                pass
+            else:
+                assert False, "sync_user should raise on the duplicate summary"
+
+            result = make_sync_service(fake_drive).sync_user(second)
+            assert len(result['processed_files']) == 1 and not result['errors']
+            assert PDFSummary.query.count() == 2
+            print("✅ A failed sync rolls back and the next user is synced")
+
+            db.engine.dispose()
+
+def test_failed_sync_releases_outstanding_downloads():
+    """When storing a result raises mid-sync, downloads between stages are still deleted."""
+    with tempfile.TemporaryDirectory() as temp_dir, FakeGoogleDrive() as fake_drive:
+        for i in range(6):
+            fake_drive.add_file(f'report-{i}.pdf', b'%PDF-1.4 ' + bytes(i))
+
+        app = create_test_app(os.path.join(temp_dir, 'app.db'))
+        with app.app_context():
+            user = User(username='cleanup', email='cleanup@example.com', password_hash='x')
+            db.session.add(user)
+            db.session.commit()
+
+            processing_pool = SlowProcessingPool(workers=2, seconds=0.2)
+            drive_service = GoogleDriveService(api_endpoint=fake_drive.url)
+            sync_service = DriveSyncService(drive_service=drive_service, processing_pool=processing_pool)
+
+            # Spill every download to disk so leaks show up as files
+            downloads = []
+            download_to_spool = drive_service.download_to_spool
+
+            def spool_to_disk(file_id):
+                download = download_to_spool(file_id, max_memory=0)
+                downloads.append(download)
+                return download
+
+            drive_service.download_to_spool = spool_to_disk
+
+            lookups = []
+
+            def failing_lookup(file):
+                lookups.append(file)
+                if len(lookups) == 4:
+                    raise RuntimeError("database is locked")
+                return None
+
+            sync_service._shared_document = failing_lookup
+            try:
+                sync_service.sync_user(user)
+            except RuntimeError:
+                pass
+            else:
+                assert False, "sync_user should raise"
+
+            assert len(downloads) == 3
+            assert not any(os.path.exists(download.name) for download in downloads)
+            print("✅ A failed sync deletes its outstanding downloads")
+
+            processing_pool.executor.shutdown()
+            db.session.rollback()
+            db.engine.dispose()
+
+if __name__ == "__main__":
+    test_incremental_sync_uses_changes_feed()
+    test_failed_files_are_retried_without_pinning_the_cursor()
+    test_cursor_kept_when_the_listing_fails()
+    test_only_content_changes_are_reprocessed()
+    test_rescan_looks_up_known_files_in_one_query()
+    test_shared_files_are_processed_once()
+    test_sync_pipelines_downloads_and_processing()
+    test_overlapping_syncs_store_each_file_once()
+    test_failed_sync_leaves_the_session_usable()
+    test_failed_sync_releases_outstanding_downloads()
+    print("\n✅ Drive sync tests completed successfully!")
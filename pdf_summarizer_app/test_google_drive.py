@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from src.services import google_drive
+from src.services.google_drive import DriveClientManager, GoogleDriveService, SpooledDownload, LIST_PAGE_SIZE
+from src.services.pdf_processor import PDFProcessor
+from test_pdf_processor import create_test_pdf
+from fake_google_drive import FakeGoogleDrive
+from google.oauth2.credentials import Credentials
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+import json
+import tempfile
+import threading
+
+class FakeRequest:
+    def __init__(self, response):
+        self.response = response
+
+    def execute(self):
+        if isinstance(self.response, Exception):
+            raise self.response
+        return self.response
+
+class FakeFilesResource:
+    """Serves a fixed file listing in pages, recording every files.list call."""
+
+    def __init__(self, files, page_size, fail_on_page=None):
+        self.pages = [files[i:i + page_size] for i in range(0, len(files), page_size)] or [[]]
+        self.fail_on_page = fail_on_page
+        self.calls = []
+
+    def list(self, **kwargs):
+        self.calls.append(kwargs)
+        page = int(kwargs.get('pageToken') or 0)
+        if page == self.fail_on_page:
+            return FakeRequest(RuntimeError("backend error"))
+        response = {'files': self.pages[page]}
+        if page + 1 < len(self.pages):
+            response['nextPageToken'] = str(page + 1)
+        return FakeRequest(response)
+
+class FakeDriveService:
+    def __init__(self, files_resource):
+        self.files_resource = files_resource
+
+    def files(self):
+        return self.files_resource
+
+def make_files(count):
+    return [{'id': f'file-{i}', 'name': f'report-{i}.pdf', 'createdTime': '2024-01-01T00:00:00Z',
+             'webViewLink': f'https://drive/file-{i}'} for i in range(count)]
+
+def test_list_files_follows_page_tokens():
+    """Every page is fetched lazily and all files are yielded."""
+    files_resource = FakeFilesResource(make_files(250), page_size=100)
+    drive_service = GoogleDriveService()
+    drive_service.service = FakeDriveService(files_resource)
+
+    listing = drive_service.list_files(folder_id='folder-1')
+    assert files_resource.calls == []
+
+    first = next(listing)
+    assert first['id'] == 'file-0'
+    assert len(files_resource.calls) == 1
+
+    remaining = list(listing)
+    assert len(remaining) == 249
+    assert len(files_resource.calls) == 3
+    assert [call['pageToken'] for call in files_resource.calls] == [None, '1', '2']
+    assert all(call['pageSize'] == LIST_PAGE_SIZE for call in files_resource.calls)
+    assert "'folder-1' in parents" in files_resource.calls[0]['q']
+    print("✅ list_files follows nextPageToken lazily")
+
+def test_list_files_raises_on_error():
+    """A failing page raises after the files already yielded, instead of ending the listing."""
+    files_resource = FakeFilesResource(make_files(250), page_size=100, fail_on_page=1)
+    drive_service = GoogleDriveService()
+    drive_service.service = FakeDriveService(files_resource)
+
+    listed = []
+    try:
+        for file in drive_service.list_files():
+            listed.append(file)
+    except RuntimeError as e:
+        assert str(e) == "backend error"
+    else:
+        assert False, "list_files should raise on an API error"
+    assert len(listed) == 100
+    print("✅ list_files raises on an API error")
+
+def test_client_manager_shares_service_across_threads():
+    """Services share one built client while each thread gets its own transport."""
+    with FakeGoogleDrive() as fake_drive:
+        for i in range(30):
+            fake_drive.add_file(f'report-{i}.pdf', b'%PDF-1.4')
+
+        first = GoogleDriveService(api_endpoint=fake_drive.url)
+        second = GoogleDriveService(api_endpoint=fake_drive.url)
+        assert first.authenticate() is second.authenticate()
+
+        barrier = threading.Barrier(4)
+
+        def list_and_report_transport(_):
+            # Hold every worker thread until all four are running
+            barrier.wait(timeout=10)
+            files = list(GoogleDriveService(api_endpoint=fake_drive.url).list_files())
+            return len(files), _thread_transport(first)
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(executor.map(list_and_report_transport, range(4)))
+        assert all(count == 30 for count, _ in results)
+        assert len({id(transport) for _, transport in results}) == 4
+        assert _thread_transport(first) is _thread_transport(second)
+        print("✅ Drive client is built once and each thread has its own transport")
+
+def _thread_transport(drive_service):
+    """The transport a request built on this thread would use."""
+    return drive_service.service.files().list().http
+
+class RefreshCountingCredentials(Credentials):
+    """Credentials whose refresh issues a new token without network access."""
+    refreshes = 0
+
+    def refresh(self, request):
+        RefreshCountingCredentials.refreshes += 1
+        self.token = f'token-{RefreshCountingCredentials.refreshes}'
+        self.expiry = datetime.utcnow() + timedelta(hours=1)
+
+def test_credentials_refreshed_before_expiry():
+    """Credentials about to expire are refreshed once and saved, not on every call."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        token_file = os.path.join(temp_dir, 'token.json')
+        manager = DriveClientManager(token_file=token_file)
+        manager._credentials = RefreshCountingCredentials(
+            'token-0', refresh_token='refresh', client_id='id', client_secret='secret',
+            token_uri='https://oauth2.googleapis.com/token')
+        manager._credentials.expiry = datetime.utcnow() + timedelta(seconds=30)
+
+        assert manager.credentials().token == 'token-1'
+        assert manager.credentials().token == 'token-1'
+        assert RefreshCountingCredentials.refreshes == 1
+        with open(token_file) as saved:
+            assert json.load(saved)['token'] == 'token-1'
+        print("✅ Credentials are refreshed proactively and persisted")
+
+def test_spooled_download_spills_to_disk():
+    """Downloads stay in memory up to the limit, then move to a temp file removed on close."""
+    with SpooledDownload(max_memory=10) as small:
+        small.write(b'%PDF-')
+        assert small.in_memory and small.source() == b'%PDF-'
+
+    large = SpooledDownload(max_memory=10)
+    try:
+        large.write(b'%PDF-1.4 ')
+        large.write(b'more bytes')
+        path = large.source()
+        assert not large.in_memory
+        with open(path, 'rb') as spilled:
+            assert spilled.read() == b'%PDF-1.4 more bytes'
+        raise RuntimeError("processing failed")
+    except RuntimeError:
+        pass
+    finally:
+        large.close()
+    assert not os.path.exists(path)
+    print("✅ SpooledDownload spills large files and always cleans up")
+
+def test_streaming_download_feeds_extraction():
+    """A Drive download is fetched in ranged chunks and processed straight from memory."""
+    pdf_path = create_test_pdf()
+    chunk_size = google_drive.DOWNLOAD_CHUNK_SIZE
+    google_drive.DOWNLOAD_CHUNK_SIZE = 1024
+
+    try:
+        with open(pdf_path, 'rb') as pdf_file:
+            pdf_bytes = pdf_file.read()
+
+        with FakeGoogleDrive() as fake_drive:
+            file = fake_drive.add_file('report.pdf', pdf_bytes)
+            drive_service = GoogleDriveService(api_endpoint=fake_drive.url)
+
+            with drive_service.download_to_spool(file['id']) as download:
+                assert download.in_memory and download.source() == pdf_bytes
+            assert len(fake_drive.requests_to('/files/')) == -(-len(pdf_bytes) // 1024)
+
+            assert drive_service.download_to_spool('missing') is None
+
+        processor = PDFProcessor(cache=False)
+        from_memory = processor.process_pdf(pdf_bytes, 'report.pdf')
+        from_disk = processor.process_pdf(pdf_path, 'report.pdf')
+        assert from_memory['text'] and from_memory['text'] == from_disk['text']
+        assert from_memory['triage']['file_size'] == len(pdf_bytes)
+        assert processor.extract_text_from_pdf(pdf_bytes, engine='pdfplumber')
+        print("✅ Downloads stream in chunks and are processed from memory")
+
+    finally:
+        google_drive.DOWNLOAD_CHUNK_SIZE = chunk_size
+        os.unlink(pdf_path)
+
+def test_batched_file_info():
+    """Metadata for many files takes one HTTP call per 100 IDs, with per-item errors."""
+    with FakeGoogleDrive() as fake_drive:
+        file_ids = [fake_drive.add_file(f'report-{i}.pdf', b'%PDF-1.4')['id'] for i in range(230)]
+        requested = file_ids + ['missing-1', 'missing-2'] + file_ids[:5]
+
+        drive_service = GoogleDriveService(api_endpoint=fake_drive.url)
+        files, errors = drive_service.get_files_info(requested)
+
+        assert set(files) == set(file_ids)
+        assert files[file_ids[7]]['name'] == 'report-7.pdf'
+        assert set(errors) == {'missing-1', 'missing-2'}
+        assert errors['missing-1']['code'] == 404
+
+        batch_calls = [r for r in fake_drive.requests if r['method'] == 'POST']
+        assert len(batch_calls) == 3
+        assert len([r for r in fake_drive.requests if r.get('batched')]) == 232
+        print("✅ File metadata is fetched in batches of 100 with per-item errors")
+
+if __name__ == "__main__":
+    test_list_files_follows_page_tokens()
+    test_list_files_raises_on_error()
+    test_client_manager_shares_service_across_threads()
+    test_credentials_refreshed_before_expiry()
+    test_spooled_download_spills_to_disk()
+    test_streaming_download_feeds_extraction()
+    test_batched_file_info()
+    print("\n✅ Google Drive tests completed successfully!")
@@ -4,10 +4,23 @@ import sys
 import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
-from src.services.pdf_processor import PDFProcessor
+from src.services import summary_cache
+from src.services.pdf_processor import PDFProcessor, EXTRACTION_ENGINES, IMPORTANT_KEYWORDS
+from src.services.nlp_document import ParsedDocument
 from reportlab.pdfgen import canvas
 from reportlab.lib.pagesizes import letter
+import atexit
+import shutil
 import tempfile
+import random
+import re
+
+# Keep test runs out of the app's summary cache; spawned pool workers inherit the variable
+if 'SUMMARY_CACHE_PATH' not in os.environ:
+    cache_dir = tempfile.mkdtemp()
+    atexit.register(shutil.rmtree, cache_dir, ignore_errors=True)
+    os.environ['SUMMARY_CACHE_PATH'] = os.path.join(cache_dir, 'summary_cache.db')
+summary_cache.CACHE_DB_PATH = os.environ['SUMMARY_CACHE_PATH']
 
 def create_test_pdf():
     """Create a simple test PDF for testing."""
@@ -89,7 +102,249 @@ def test_pdf_processor():
         if os.path.exists(test_pdf_path):
             os.unlink(test_pdf_path)
 
+def create_multipage_test_pdf(page_count=30):
+    """Create a PDF with one numbered paragraph per page."""
+    with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as temp_file:
+        temp_path = temp_file.name
+    
+    c = canvas.Canvas(temp_path, pagesize=letter)
+    width, height = letter
+    
+    for page_number in range(1, page_count + 1):
+        c.setFont("Helvetica", 12)
+        c.drawString(100, height - 100, f"Page {page_number} discusses quarterly results for region {page_number}.")
+        c.drawString(100, height - 120, "The main finding is that revenue grew across every business unit.")
+        c.showPage()
+    
+    c.save()
+    return temp_path
+
+def test_parallel_extraction_matches_serial():
+    """Parallel page-range extraction must reassemble pages in document order."""
+    test_pdf_path = create_multipage_test_pdf(page_count=30)
+    
+    try:
+        processor = PDFProcessor(parallel_min_pages=1, max_workers=3)
+        
+        serial_text = processor.extract_text_from_pdf(test_pdf_path, parallel=False)
+        parallel_text = processor.extract_text_from_pdf(test_pdf_path, parallel=True)
+        
+        assert serial_text
+        assert parallel_text == serial_text
+        assert serial_text.index("Page 9 ") < serial_text.index("Page 10 ") < serial_text.index("Page 30 ")
+        print("✅ Parallel extraction matches serial extraction")
+    
+    finally:
+        if os.path.exists(test_pdf_path):
+            os.unlink(test_pdf_path)
+
+def test_extraction_engines():
+    """Both engines read the same words; 'auto' falls back to pdfplumber when pdfium finds nothing."""
+    test_pdf_path = create_multipage_test_pdf(page_count=3)
+    
+    try:
+        processor = PDFProcessor()
+        
+        pdfium_text = processor.extract_text_from_pdf(test_pdf_path, engine='pdfium')
+        pdfplumber_text = processor.extract_text_from_pdf(test_pdf_path, engine='pdfplumber')
+        auto_text = processor.extract_text_from_pdf(test_pdf_path, engine='auto')
+        
+        assert pdfium_text.split() == pdfplumber_text.split()
+        assert auto_text == pdfium_text
+        print("✅ pdfium and pdfplumber engines agree")
+        
+        pdfium_engine = EXTRACTION_ENGINES['pdfium']
+        pdfium_engine.iter_pages = lambda pdf_path, start=0, end=None: iter([''] * (end - start))
+        try:
+            assert processor.extract_text_from_pdf(test_pdf_path, engine='auto') == pdfplumber_text
+            # A page budget still leaves room for the fallback
+            assert processor.extract_text_from_pdf(test_pdf_path, engine='auto', max_pages=3) == pdfplumber_text
+            assert (processor.extract_text_from_pdf(test_pdf_path, engine='auto', max_pages=2) ==
+                    processor.extract_text_from_pdf(test_pdf_path, engine='pdfplumber', max_pages=2))
+        finally:
+            del pdfium_engine.iter_pages
+        print("✅ 'auto' engine falls back to pdfplumber")
+    
+    finally:
+        if os.path.exists(test_pdf_path):
+            os.unlink(test_pdf_path)
+
+def test_streaming_extraction_budget():
+    """Page-at-a-time extraction stops once the page or character budget is reached."""
+    test_pdf_path = create_multipage_test_pdf(page_count=10)
+    
+    try:
+        # Every page repeats a line; keep it so that short budgets see the same pages
+        processor = PDFProcessor(strip_boilerplate=False)
+        
+        pages = list(processor.iter_page_texts(test_pdf_path))
+        assert len(pages) == 10
+        assert pages[0].startswith("Page 1 ")
+        
+        first_pages = list(processor.iter_page_texts(test_pdf_path, max_pages=2))
+        assert first_pages == pages[:2]
+        
+        text = processor.extract_text_from_pdf(test_pdf_path, max_chars=150)
+        assert len(text) == 150
+        assert text == ' '.join(pages)[:150]
+        print("✅ Streaming extraction honours page and character budgets")
+    
+    finally:
+        if os.path.exists(test_pdf_path):
+            os.unlink(test_pdf_path)
+
+def create_report_with_boilerplate(page_count=8):
+    """Create a PDF whose pages share a running header, footer and page number."""
+    with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as temp_file:
+        temp_path = temp_file.name
+    
+    rng = random.Random(1)
+    topics = ['revenue', 'hiring', 'logistics', 'pricing', 'security', 'marketing']
+    c = canvas.Canvas(temp_path, pagesize=letter)
+    width, height = letter
+    
+    for page_number in range(1, page_count + 1):
+        c.setFont("Helvetica", 10)
+        c.drawString(72, height - 50, "ACME Holdings Annual Report 2024")
+        for line in range(6):
+            topic = rng.choice(topics)
+            c.drawString(72, height - 100 - 18 * line,
+                         f"Section {page_number}.{line} reviews {topic} trends seen by team {rng.randint(1, 99)}.")
+        c.drawString(72, 60, "Confidential - not for distribution outside the company.")
+        c.drawString(280, 40, f"Page {page_number} of {page_count}")
+        c.showPage()
+    
+    c.save()
+    return temp_path
+
+def test_repeated_boilerplate_is_stripped():
+    """Running headers, footers and page numbers are removed during extraction."""
+    test_pdf_path = create_report_with_boilerplate(page_count=8)
+    
+    try:
+        stripped = PDFProcessor().extract_text_from_pdf(test_pdf_path)
+        raw = PDFProcessor(strip_boilerplate=False).extract_text_from_pdf(test_pdf_path)
+        
+        assert raw.count("ACME Holdings Annual Report") == 8
+        for boilerplate in ("ACME Holdings Annual Report", "Confidential", "Page 3 of 8"):
+            assert boilerplate not in stripped
+        for page_number in range(1, 9):
+            assert f"Section {page_number}.0 reviews" in stripped
+        
+        assert len(stripped) < 0.8 * len(raw)
+        print(f"✅ Boilerplate stripping cut text from {len(raw)} to {len(stripped)} characters")
+    
+    finally:
+        if os.path.exists(test_pdf_path):
+            os.unlink(test_pdf_path)
+
+def legacy_extract_key_messages(text, max_messages=5):
+    """Reference copy of the original quadratic key message scorer."""
+    if not text or len(text.strip()) < 100:
+        return []
+    
+    sentences = re.split(r'[.!?]+', text)
+    sentences = [s.strip() for s in sentences if len(s.strip()) > 20]
+    
+    scored_sentences = []
+    for sentence in sentences:
+        score = 0
+        sentence_lower = sentence.lower()
+        for keyword in IMPORTANT_KEYWORDS:
+            if keyword in sentence_lower:
+                score += 1
+        if sentences.index(sentence) < 3 or sentences.index(sentence) >= len(sentences) - 3:
+            score += 1
+        if 50 <= len(sentence) <= 200:
+            score += 1
+        scored_sentences.append((sentence, score))
+    
+    scored_sentences.sort(key=lambda x: x[1], reverse=True)
+    return [sentence for sentence, score in scored_sentences[:max_messages] if score > 0]
+
+def generate_key_message_text(sentence_count, seed=0):
+    """Generate text mixing keywords, filler, duplicates and overlapping keywords."""
+    rng = random.Random(seed)
+    vocabulary = list(IMPORTANT_KEYWORDS) + [
+        'revenue', 'team', 'quarter', 'customer', 'Majoresult', 'keynote', 'MAINTAIN',
+        'growth', 'the', 'and', 'of', 'market', 'analysis', 'strategy', 'regional'
+    ]
+    sentences = []
+    for _ in range(sentence_count):
+        if sentences and rng.random() < 0.05:
+            sentences.append(rng.choice(sentences))
+        else:
+            sentences.append(' '.join(rng.choice(vocabulary) for _ in range(rng.randint(2, 30))))
+    return ''.join(sentence + rng.choice(['. ', '! ', '? ', '... ']) for sentence in sentences)
+
+def test_key_messages_match_legacy_scoring():
+    """The single-pass scorer returns exactly what the original scorer returned."""
+    processor = PDFProcessor(cache=False)
+    
+    for seed in range(20):
+        text = generate_key_message_text(200, seed=seed)
+        for max_messages in (1, 5, 12):
+            assert processor.extract_key_messages(text, max_messages) == legacy_extract_key_messages(text, max_messages)
+    
+    for keyword in IMPORTANT_KEYWORDS:
+        assert not any(other != keyword and other.startswith(keyword) for other in IMPORTANT_KEYWORDS)
+    print("✅ Key message scoring matches the original implementation")
+
+def generate_long_document(sentence_count, seed=0):
+    """Generate prose-like text with one topic word per sentence."""
+    rng = random.Random(seed)
+    topics = ['revenue', 'hiring', 'logistics', 'pricing', 'security', 'marketing', 'research']
+    filler = ['the', 'team', 'reported', 'steady', 'progress', 'on', 'quarterly', 'plans', 'across', 'regions']
+    sentences = []
+    for i in range(sentence_count):
+        words = [rng.choice(topics)] + [rng.choice(filler) for _ in range(rng.randint(6, 14))]
+        sentences.append(' '.join(words).capitalize() + f' in period {i}.')
+    return ' '.join(sentences)
+
+def test_chunked_summary():
+    """Long documents are summarized section by section, then reduced."""
+    text = generate_long_document(1200)
+    processor = PDFProcessor(cache=False, max_workers=2, chunk_threshold=300, chunk_size=100)
+    
+    summary = processor.generate_summary(text, sentences_count=3)
+    assert summary and summary != "Unable to generate summary."
+    assert summary.count(' in period ') == 3
+    assert all(sentence.strip() + '.' in text for sentence in summary.split('.') if sentence.strip())
+    
+    direct = processor.generate_summary(generate_long_document(150), sentences_count=3, chunked=True)
+    assert direct.count(' in period ') == 3
+    print("✅ Chunked summarization reduces long documents to the requested length")
+
+def test_parsed_document_shared_by_stages():
+    """One ParsedDocument feeds title, summary and key message extraction."""
+    text = generate_long_document(40)
+    document = ParsedDocument(text)
+    
+    assert len(document.sentences) == 40
+    assert len(document.words) == len(document.stems) == len(document.stopword_masks) == 40
+    assert all(len(words) == len(stems) == len(mask)
+               for words, stems, mask in zip(document.words, document.stems, document.stopword_masks))
+    
+    small = ParsedDocument("The reports were ready. Revenue grew.")
+    assert small.sentences == ("The reports were ready.", "Revenue grew.")
+    assert small.stems[0] == ('the', 'report', 'were', 'readi')
+    assert small.stopword_masks[0] == (True, False, True, False)
+    
+    processor = PDFProcessor(cache=False)
+    assert processor.extract_key_messages(text, document=document) == processor.extract_key_messages(text)
+    assert processor.get_document_title(text, 'report.pdf', document=document) == processor.get_document_title(text, 'report.pdf')
+    assert processor.generate_summary(text, document=document) == processor.generate_summary(text)
+    assert processor.generate_summary(text).count(' in period ') == 3
+    print("✅ Parsed document is shared by every NLP stage")
+
 if __name__ == "__main__":
+    test_key_messages_match_legacy_scoring()
+    test_parsed_document_shared_by_stages()
+    test_chunked_summary()
+    test_parallel_extraction_matches_serial()
+    test_streaming_extraction_budget()
+    test_repeated_boilerplate_is_stripped()
+    test_extraction_engines()
     success = test_pdf_processor()
     if success:
         print("\n✅ PDF Processor test completed successfully!")
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from flask import Flask
+from flask_login import LoginManager
+from src.models.user import db, User
+from src.models.pdf_summary import PDFSummary, PDFText
+from src.routes.auth import auth_bp
+from src.routes.pdf import pdf_bp
+from src.services import processing_pool
+from src.services.processing_pool import ProcessingPool
+from test_pdf_processor import generate_long_document
+import tempfile
+
+def create_test_app(db_path):
+    """Build a minimal app with the auth and PDF blueprints on a scratch database."""
+    app = Flask(__name__)
+    app.config['SECRET_KEY'] = 'test-secret'
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{db_path}"
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+
+    login_manager = LoginManager()
+    login_manager.init_app(app)
+
+    @login_manager.user_loader
+    def load_user(user_id):
+        return db.session.get(User, int(user_id))
+
+    app.register_blueprint(auth_bp, url_prefix='/api/auth')
+    app.register_blueprint(pdf_bp, url_prefix='/api/pdf')
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+    return app
+
+def login_test_user(client, username='reader'):
+    """Register and log in a user through the auth routes; returns the user id."""
+    credentials = {'username': username, 'email': f'{username}@example.com', 'password': 'secret'}
+    user_id = client.post('/api/auth/register', json=credentials).get_json()['user']['id']
+    assert client.post('/api/auth/login', json=credentials).status_code == 200
+    return user_id
+
+def test_text_is_stored_compressed_and_lazily():
+    """Extracted text round-trips through its own table and stays out of to_dict."""
+    text = generate_long_document(200)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        app = create_test_app(os.path.join(temp_dir, 'app.db'))
+        with app.app_context():
+            user = User(username='owner', email='owner@example.com', password_hash='x')
+            db.session.add(user)
+            db.session.commit()
+
+            summary = PDFSummary(user_id=user.id, title='Report', file_path='report.pdf',
+                                 google_drive_link='https://drive/report', summary='Short.', text=text)
+            db.session.add(summary)
+            db.session.commit()
+            summary_id = summary.id
+            db.session.expunge_all()
+
+            stored = db.session.get(PDFText, 1)
+            assert stored.char_count == len(text)
+            assert len(stored.compressed_text) < len(text) / 3
+
+            reloaded = db.session.get(PDFSummary, summary_id)
+            assert 'document_text' not in reloaded.__dict__
+            assert 'text' not in reloaded.to_dict()
+            assert 'document_text' not in reloaded.__dict__
+            assert reloaded.text == text
+
+            db.session.delete(reloaded)
+            db.session.commit()
+            assert PDFText.query.count() == 0
+            print("✅ Extracted text is stored compressed and loaded lazily")
+
+        with app.app_context():
+            db.engine.dispose()
+
+def test_resummarize_endpoint_uses_stored_text():
+    """Re-summarizing reads the stored text and never touches a PDF or Drive."""
+    text = generate_long_document(120)
+    original_pool = processing_pool._processing_pool
+    processing_pool._processing_pool = ProcessingPool(max_workers=0)
+
+    try:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            app = create_test_app(os.path.join(temp_dir, 'app.db'))
+            client = app.test_client()
+            user_id = login_test_user(client)
+
+            with app.app_context():
+                with_text = PDFSummary(user_id=user_id, title='Report', file_path='report.pdf',
+                                       google_drive_link='https://drive/report', summary='Old.', text=text)
+                without_text = PDFSummary(user_id=user_id, title='Legacy', file_path='legacy.pdf',
+                                          google_drive_link='https://drive/legacy', summary='Old.')
+                db.session.add_all([with_text, without_text])
+                db.session.commit()
+                with_text_id, without_text_id = with_text.id, without_text.id
+
+            response = client.post(f'/api/pdf/summaries/{with_text_id}/resummarize',
+                                   json={'method': 'lexrank_native', 'sentences_count': 6})
+            assert response.status_code == 200, response.get_json()
+            body = response.get_json()
+            assert body['summary'] != 'Old.'
+            assert 'text' not in body
+
+            assert client.post(f'/api/pdf/summaries/{with_text_id}/resummarize',
+                               json={'method': 'bogus'}).status_code == 400
+            assert client.post(f'/api/pdf/summaries/{without_text_id}/resummarize',
+                               json={}).status_code == 409
+            print("✅ Re-summarize endpoint recomputes from stored text")
+
+            with app.app_context():
+                db.engine.dispose()
+
+    finally:
+        processing_pool._processing_pool = original_pool
+
+if __name__ == "__main__":
+    test_text_is_stored_compressed_and_lazily()
+    test_resummarize_endpoint_uses_stored_text()
+    print("\n✅ Stored text tests completed successfully!")
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from src.services import pdf_triage
+from src.services.pdf_triage import triage_pdf
+from src.services.pdf_processor import PDFProcessor
+from test_pdf_processor import create_test_pdf, create_multipage_test_pdf
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.pdfencrypt import StandardEncryption
+from reportlab.pdfgen import canvas
+import tempfile
+
+def create_image_only_pdf(page_count=3):
+    """Create a PDF whose pages only contain graphics, like a scan without OCR."""
+    with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as temp_file:
+        temp_path = temp_file.name
+
+    c = canvas.Canvas(temp_path, pagesize=letter)
+    for _ in range(page_count):
+        c.rect(72, 72, 300, 400, fill=1)
+        c.showPage()
+    c.save()
+    return temp_path
+
+def create_encrypted_pdf(user_password):
+    """Create an encrypted PDF; an empty user password opens without prompting."""
+    with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as temp_file:
+        temp_path = temp_file.name
+
+    encryption = StandardEncryption(user_password, ownerPassword='owner-secret')
+    c = canvas.Canvas(temp_path, pagesize=letter, encrypt=encryption)
+    c.drawString(100, 700, "Confidential quarterly results for the finance committee.")
+    c.save()
+    return temp_path
+
+def test_triage_text_pdf():
+    """A normal text PDF is processed with the fast engine."""
+    test_pdf_path = create_test_pdf()
+
+    try:
+        triage = triage_pdf(test_pdf_path)
+        assert triage['decision'] == 'process'
+        assert triage['page_count'] == 1
+        assert triage['has_text'] and not triage['encrypted']
+        assert triage['producer'] and 'ReportLab' in triage['producer']
+        assert triage['strategy']['engine'] == 'pdfium'
+        print(f"✅ Text PDF triaged in {triage['elapsed_ms']}ms")
+
+    finally:
+        os.unlink(test_pdf_path)
+
+def test_triage_rejects_unprocessable_pdfs():
+    """Password protected and image-only PDFs are rejected without extraction."""
+    locked_pdf_path = create_encrypted_pdf('user-secret')
+    owner_only_pdf_path = create_encrypted_pdf('')
+    image_pdf_path = create_image_only_pdf()
+
+    try:
+        locked = triage_pdf(locked_pdf_path)
+        assert locked['decision'] == 'reject'
+        assert locked['password_protected']
+
+        # Encrypted with only an owner password: readable, so it is processed
+        owner_only = triage_pdf(owner_only_pdf_path)
+        assert owner_only['encrypted'] and not owner_only['password_protected']
+        assert owner_only['decision'] == 'process'
+
+        image_only = triage_pdf(image_pdf_path)
+        assert image_only['decision'] == 'reject'
+        assert not image_only['has_text']
+        assert image_only['sampled_pages'] == 3
+
+        processor = PDFProcessor(cache=False)
+        def fail_extraction(*args, **kwargs):
+            raise AssertionError("rejected PDFs should not be extracted")
+        processor.extract_text_from_pdf = fail_extraction
+
+        result = processor.process_pdf(locked_pdf_path, "locked.pdf")
+        assert result['summary'] == 'PDF is password protected.'
+        assert result['triage']['decision'] == 'reject'
+        print("✅ Password protected and image-only PDFs are rejected")
+
+    finally:
+        for path in (locked_pdf_path, owner_only_pdf_path, image_pdf_path):
+            os.unlink(path)
+
+def test_triage_defers_large_pdfs():
+    """Long documents are deferred for interactive requests and processed otherwise."""
+    test_pdf_path = create_multipage_test_pdf(page_count=12)
+    defer_pages = pdf_triage.TRIAGE_DEFER_PAGES
+    pdf_triage.TRIAGE_DEFER_PAGES = 10
+
+    try:
+        triage = triage_pdf(test_pdf_path)
+        assert triage['decision'] == 'defer'
+        assert triage['sampled_pages'] == pdf_triage.TRIAGE_SAMPLE_PAGES
+
+        processor = PDFProcessor(cache=False)
+        deferred = processor.process_pdf(test_pdf_path, "long.pdf", defer_large=True)
+        assert deferred['text'] == '' and deferred['triage']['decision'] == 'defer'
+
+        processed = processor.process_pdf(test_pdf_path, "long.pdf")
+        assert processed['text'] and processed['triage']['page_count'] == 12
+        print("✅ Large PDFs are deferred only when requested")
+
+    finally:
+        pdf_triage.TRIAGE_DEFER_PAGES = defer_pages
+        os.unlink(test_pdf_path)
+
+def test_sample_pages_cover_first_and_last():
+    """Sampling spreads over the document and never samples fewer than two pages."""
+    assert pdf_triage._sample_page_indexes(100, 5) == [0, 25, 50, 74, 99]
+    assert pdf_triage._sample_page_indexes(3, 5) == [0, 1, 2]
+    assert pdf_triage._sample_page_indexes(100, 1) == [0, 99]
+    assert pdf_triage._sample_page_indexes(100, 0) == [0, 99]
+    assert pdf_triage._sample_page_indexes(1, 1) == [0]
+    print("✅ Triage samples at least the first and last pages")
+
+if __name__ == "__main__":
+    test_sample_pages_cover_first_and_last()
+    test_triage_text_pdf()
+    test_triage_rejects_unprocessable_pdfs()
+    test_triage_defers_large_pdfs()
+    print("\n✅ PDF triage tests completed successfully!")
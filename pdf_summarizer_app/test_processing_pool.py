@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from src.services.processing_pool import ProcessingPool
+from test_pdf_processor import create_test_pdf, create_multipage_test_pdf
+
+def test_pool_processes_jobs_in_warm_workers():
+    """Jobs submitted to the pool resolve to process_pdf results."""
+    pdf_paths = [create_test_pdf(), create_multipage_test_pdf(page_count=4)]
+    pool = ProcessingPool(max_workers=2, max_tasks_per_worker=2)
+    
+    try:
+        jobs = [pool.submit(path, name, use_cache=False)
+                for path, name in zip(pdf_paths * 2, ['ai.pdf', 'regions.pdf'] * 2)]
+        results = [job.result(timeout=120) for job in jobs]
+        
+        assert results[0]['title'] == results[2]['title']
+        assert 'machine learning' in results[0]['text']
+        assert 'Page 4 ' in results[1]['text']
+        assert all(result['summary'] for result in results)
+        print("✅ Processing pool runs jobs and recycles workers")
+    
+    finally:
+        pool.shutdown()
+        for path in pdf_paths:
+            if os.path.exists(path):
+                os.unlink(path)
+
+def test_inline_pool():
+    """A pool with no workers processes jobs on the calling thread."""
+    pdf_path = create_test_pdf()
+    
+    try:
+        pool = ProcessingPool(max_workers=0)
+        job = pool.submit(pdf_path, 'ai.pdf', use_cache=False)
+        assert job.done()
+        assert 'machine learning' in job.result()['text']
+        print("✅ Inline processing pool works without worker processes")
+    
+    finally:
+        if os.path.exists(pdf_path):
+            os.unlink(pdf_path)
+
+def worker_document_workers():
+    """Report the max_workers of the processor warmed in this worker process."""
+    from src.services import processing_pool
+    return processing_pool._worker_processor.max_workers
+
+def test_workers_keep_intra_document_parallelism():
+    """Each worker's processor can still spread one large document over several processes."""
+    pool = ProcessingPool(max_workers=2, document_workers=3)
+    
+    try:
+        assert pool._get_executor().submit(worker_document_workers).result(timeout=120) == 3
+        print("✅ Pool workers keep page-range and section parallelism")
+    
+    finally:
+        pool.shutdown()
+
+if __name__ == "__main__":
+    test_pool_processes_jobs_in_warm_workers()
+    test_inline_pool()
+    test_workers_keep_intra_document_parallelism()
+    print("\n✅ Processing pool tests completed successfully!")
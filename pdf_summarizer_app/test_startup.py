@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+
+import sys
+import os
+import json
+import subprocess
+import tempfile
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Modules that must only be imported when a PDF is actually processed
+HEAVY_MODULES = ['pdfplumber', 'pypdfium2', 'sumy', 'nltk', 'numpy', 'googleapiclient', 'google_auth_oauthlib']
+
+def test_app_import_is_lazy():
+    """Importing the app loads no PDF/NLP/Google client libraries and does no NLTK download."""
+    snippet = (
+        "import json, sys\n"
+        "import src.main\n"
+        f"print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))\n"
+    )
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        env = dict(os.environ, DATABASE_URL=f"sqlite:///{os.path.join(temp_dir, 'startup.db')}")
+        completed = subprocess.run([sys.executable, '-c', snippet], cwd=APP_DIR, env=env,
+                                   capture_output=True, text=True, timeout=120)
+    
+    assert completed.returncode == 0, completed.stderr
+    loaded = json.loads(completed.stdout.strip().splitlines()[-1])
+    assert loaded == [], f"heavy modules imported at startup: {loaded}"
+    assert 'nltk_data' not in completed.stderr
+    print("✅ App startup imports no heavy dependencies")
+
+def worker_scheduler_jobs():
+    """Report the jobs of the scheduler started by main.py in this process, or None."""
+    main = sys.modules.get('__mp_main__')
+    service = getattr(main, 'scheduler_service', None)
+    return None if service is None else sorted(job.id for job in service.scheduler.get_jobs())
+
+def test_pool_workers_start_no_scheduler():
+    """Spawned pool workers re-run main.py without starting a second scheduler."""
+    snippet = (
+        "import json, runpy, sys\n"
+        "from flask import Flask\n"
+        "from test_startup import worker_scheduler_jobs\n"
+        "def run(app, *args, **kwargs):\n"
+        "    from src.services.processing_pool import ProcessingPool\n"
+        "    pool = ProcessingPool(max_workers=1, max_tasks_per_worker=1)\n"
+        "    main = sys.modules['__main__']\n"
+        "    jobs = sorted(job.id for job in main.scheduler_service.scheduler.get_jobs())\n"
+        "    worker_jobs = pool._get_executor().submit(worker_scheduler_jobs).result(timeout=120)\n"
+        "    pool.shutdown()\n"
+        "    print(json.dumps([jobs, worker_jobs]))\n"
+        "Flask.run = run\n"
+        "runpy.run_path('src/main.py', run_name='__main__')\n"
+    )
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        env = dict(os.environ, DATABASE_URL=f"sqlite:///{os.path.join(temp_dir, 'startup.db')}")
+        completed = subprocess.run([sys.executable, '-c', snippet], cwd=APP_DIR, env=env,
+                                   capture_output=True, text=True, timeout=120)
+    
+    assert completed.returncode == 0, completed.stderr
+    jobs, worker_jobs = json.loads(completed.stdout.strip().splitlines()[-1])
+    assert 'weekly_drive_scan' in jobs
+    assert worker_jobs is None, f"pool worker scheduled {worker_jobs}"
+    print("✅ Pool workers start no scheduler")
+
+if __name__ == "__main__":
+    test_app_import_is_lazy()
+    test_pool_workers_start_no_scheduler()
+    print("\n✅ Startup tests completed successfully!")
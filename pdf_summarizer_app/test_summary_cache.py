@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from src.services.summary_cache import SummaryCache
+from src.services.pdf_processor import PDFProcessor
+from test_pdf_processor import create_test_pdf
+import tempfile
+import shutil
+
+def test_memory_and_sqlite_tiers():
+    """Entries survive a new cache instance through the SQLite tier."""
+    cache_dir = tempfile.mkdtemp()
+    
+    try:
+        db_path = os.path.join(cache_dir, 'cache.db')
+        cache = SummaryCache(db_path=db_path, memory_entries=2)
+        key = cache.make_key('abc123', 'lsa', {'sentences_count': 3})
+        
+        assert cache.get(key) is None
+        cache.set(key, {'title': 'Report', 'summary': 'Short summary.', 'key_messages': ['One']})
+        assert cache.get(key)['summary'] == 'Short summary.'
+        
+        # A fresh instance has an empty LRU and must read from SQLite
+        reopened = SummaryCache(db_path=db_path)
+        assert reopened.get(key)['key_messages'] == ['One']
+        
+        # Different parameters produce a different key
+        assert cache.make_key('abc123', 'lsa', {'sentences_count': 5}) != key
+        assert cache.make_key('abc123', 'lexrank', {'sentences_count': 3}) != key
+        print("✅ Summary cache persists across instances")
+    
+    finally:
+        shutil.rmtree(cache_dir)
+
+def test_size_based_eviction():
+    """The SQLite tier drops least recently used entries beyond its byte budget."""
+    cache_dir = tempfile.mkdtemp()
+    
+    try:
+        db_path = os.path.join(cache_dir, 'cache.db')
+        cache = SummaryCache(db_path=db_path, memory_entries=0, max_bytes=3000)
+        
+        for i in range(10):
+            cache.set(f'key-{i}', {'text': os.urandom(400).hex()})
+        
+        assert cache.get('key-9') is not None
+        assert cache.get('key-0') is None
+        with cache._connect() as conn:
+            total = conn.execute('SELECT SUM(size) FROM summary_cache').fetchone()[0]
+        assert total <= 3000
+        print("✅ Summary cache evicts by size")
+    
+    finally:
+        shutil.rmtree(cache_dir)
+
+def test_memory_tier_is_bounded_by_bytes():
+    """The in-process LRU drops old results once their serialized size exceeds its budget."""
+    cache_dir = tempfile.mkdtemp()
+    
+    try:
+        cache = SummaryCache(db_path=os.path.join(cache_dir, 'cache.db'), memory_max_bytes=3000)
+        
+        for i in range(10):
+            cache.set(f'key-{i}', {'text': 'x' * 1000})
+        cache.set('huge', {'text': 'x' * 5000})
+        
+        assert list(cache._memory) == ['key-8', 'key-9']
+        assert cache._memory_bytes <= 3000
+        # Results dropped from memory are still served from SQLite
+        assert cache.get('key-0')['text'] == 'x' * 1000
+        assert cache.get('huge')['text'] == 'x' * 5000 and 'huge' not in cache._memory
+        print("✅ Summary cache memory tier is bounded by bytes")
+    
+    finally:
+        shutil.rmtree(cache_dir)
+
+def test_process_pdf_cache_hit_skips_extraction():
+    """A second process_pdf call for the same bytes is served from the cache."""
+    cache_dir = tempfile.mkdtemp()
+    test_pdf_path = create_test_pdf()
+    
+    try:
+        cache = SummaryCache(db_path=os.path.join(cache_dir, 'cache.db'))
+        processor = PDFProcessor(cache=cache)
+        
+        key = processor.cache_key(test_pdf_path)
+        cache.set(key, {'title': 'Cached', 'text': 'cached text', 'summary': 'Cached summary.', 'key_messages': []})
+        
+        def fail_extraction(*args, **kwargs):
+            raise AssertionError("extraction should be skipped on a cache hit")
+        processor.extract_text_from_pdf = fail_extraction
+        
+        result = processor.process_pdf(test_pdf_path, "cached_report.pdf")
+        assert result['summary'] == 'Cached summary.'
+        assert result['title'] == 'Cached Report'
+        print("✅ process_pdf skips extraction on a cache hit")
+    
+    finally:
+        shutil.rmtree(cache_dir)
+        if os.path.exists(test_pdf_path):
+            os.unlink(test_pdf_path)
+
+if __name__ == "__main__":
+    test_memory_and_sqlite_tiers()
+    test_size_based_eviction()
+    test_memory_tier_is_bounded_by_bytes()
+    test_process_pdf_cache_hit_skips_extraction()
+    print("\n✅ Summary cache tests completed successfully!")
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+import numpy as np
+import random
+from src.services.nlp_document import ParsedDocument
+from src.services.text_ranking import SentenceTermMatrix, summarize_native, LSA_DIMENSIONS, LSA_OVERSAMPLING
+from src.services.pdf_processor import PDFProcessor
+from test_pdf_processor import generate_long_document
+
+SAMPLE_TEXT = (
+    "Revenue grew strongly in every region this quarter. "
+    "Regional revenue growth was driven by strong demand. "
+    "The cafeteria menu changed on Tuesday. "
+    "Strong demand lifted revenue in the northern region. "
+    "Parking permits are renewed in spring."
+)
+
+def dense_matrix(matrix, data):
+    """Dense copy of the sparse matrix, for checking the CSR products."""
+    dense = np.zeros((matrix.n_sentences, matrix.n_terms))
+    dense[matrix.row_ids, matrix.indices] = data
+    return dense
+
+def test_sparse_products_match_dense():
+    """CSR products agree with the equivalent dense NumPy computation."""
+    matrix = SentenceTermMatrix(ParsedDocument(SAMPLE_TEXT))
+    dense = dense_matrix(matrix, matrix.tfidf)
+    x = np.arange(matrix.n_sentences, dtype=float)
+    y = np.arange(matrix.n_terms, dtype=float)
+    
+    assert np.allclose(matrix.matvec(matrix.tfidf, y), dense @ y)
+    assert np.allclose(matrix.rmatvec(matrix.tfidf, x), dense.T @ x)
+    assert np.allclose(np.linalg.norm(dense, axis=1), 1.0)
+    print("✅ Sparse matrix products match dense computation")
+
+def test_native_rankers_prefer_central_sentences():
+    """Sentences sharing vocabulary with the rest of the document rank highest."""
+    document = ParsedDocument(SAMPLE_TEXT)
+    matrix = SentenceTermMatrix(document)
+    
+    for scores in (matrix.lexrank_scores(), matrix.textrank_scores()):
+        assert np.isclose(scores.sum(), 1.0)
+        outliers = {2, 4}
+        central = [i for i in range(5) if i not in outliers]
+        assert min(scores[i] for i in central) > max(scores[i] for i in outliers)
+    
+    summary = summarize_native(document, 2, 'lexrank_native')
+    assert len(summary) == 2
+    assert "cafeteria" not in ' '.join(summary) and "Parking" not in ' '.join(summary)
+    print("✅ Native LexRank/TextRank rank central sentences first")
+
+def test_generate_summary_native_methods():
+    """generate_summary exposes the native rankers and keeps document order."""
+    processor = PDFProcessor(cache=False)
+    text = generate_long_document(2000)
+    
+    for method in ('lexrank_native', 'textrank_native'):
+        summary = processor.generate_summary(text, sentences_count=4, method=method)
+        periods = [int(part.split('.')[0]) for part in summary.split(' in period ')[1:]]
+        assert len(periods) == 4
+        assert periods == sorted(periods)
+    print("✅ generate_summary supports native ranking methods")
+
+def generate_rich_vocabulary_document(sentence_count, seed=0):
+    """Generate topical text with a large vocabulary so LSA takes the randomized SVD path."""
+    rng = random.Random(seed)
+    vocabulary = [''.join(rng.choice('bcdfghklmnprstvz') + rng.choice('aeiou') for _ in range(3))
+                  for _ in range(1500)]
+    topics = [vocabulary[i * 40:(i + 1) * 40] for i in range(30)]
+    sentences = []
+    for _ in range(sentence_count):
+        topic = topics[min(int(rng.expovariate(0.25)), len(topics) - 1)]
+        words = [rng.choice(topic) for _ in range(10)] + [rng.choice(vocabulary) for _ in range(2)]
+        sentences.append(' '.join(words).capitalize() + '.')
+    return ' '.join(sentences)
+
+def test_lsa_randomized_svd_matches_dense():
+    """The truncated randomized SVD closely tracks the exact top-topic LSA scores."""
+    matrix = SentenceTermMatrix(ParsedDocument(generate_rich_vocabulary_document(400)))
+    assert min(matrix.n_sentences, matrix.n_terms) > LSA_DIMENSIONS + LSA_OVERSAMPLING
+    
+    dense = dense_matrix(matrix, matrix.smoothed_tf)
+    u, sigma, _ = np.linalg.svd(dense, full_matrices=False)
+    expected = np.sqrt(((u[:, :LSA_DIMENSIONS] * sigma[:LSA_DIMENSIONS]) ** 2).sum(axis=1))
+    
+    scores = matrix.lsa_scores()
+    assert np.median(np.abs(scores - expected) / expected) < 0.05
+    assert len(set(np.argsort(-scores)[:10]) & set(np.argsort(-expected)[:10])) >= 8
+    print("✅ Randomized LSA matches dense SVD")
+
+def test_summary_bundle_from_one_matrix():
+    """generate_summaries returns every method at every requested length."""
+    processor = PDFProcessor(cache=False)
+    text = generate_long_document(300)
+    
+    bundle = processor.generate_summaries(text, methods=['lsa_native', 'lexrank_native', 'textrank_native', 'lsa'],
+                                          sentence_counts=[3, 5])
+    assert set(bundle) == {'lsa_native', 'lexrank_native', 'textrank_native', 'lsa'}
+    for method, summaries in bundle.items():
+        assert set(summaries) == {'3', '5'}
+        assert summaries['3'].count(' in period ') == 3
+        assert summaries['5'].count(' in period ') == 5
+    
+    # Native lengths come from a single ranking, so shorter summaries are subsets of longer ones
+    for method in ('lsa_native', 'lexrank_native', 'textrank_native'):
+        short = set(bundle[method]['3'].split('. '))
+        assert short <= set(bundle[method]['5'].split('. ')) | {s + '.' for s in bundle[method]['5'].split('. ')}
+        assert bundle[method]['5'] == processor.generate_summary(text, 5, method)
+    print("✅ Summary bundle covers every method and length")
+
+if __name__ == "__main__":
+    test_sparse_products_match_dense()
+    test_lsa_randomized_svd_matches_dense()
+    test_summary_bundle_from_one_matrix()
+    test_native_rankers_prefer_central_sentences()
+    test_generate_summary_native_methods()
+    print("\n✅ Text ranking tests completed successfully!")